@@ -0,0 +1,88 @@
+import numpy as np
+
+
+class AccessCounter:
+    def __init__(self, bus: "Bus", buffer_size: int = 4096) -> None:
+        """Per address read, write and execute counts for the whole address space. Installed on a
+        Bus by Bus.enable_access_counter, which routes the bus accesses through this class.
+
+        The hot path only appends the address to a small list; the lists are folded into the
+        uint32 count arrays with np.add.at once they hold `buffer_size` addresses, or when the
+        counts are requested.
+
+        Args:
+            bus (Bus): Bus being instrumented.
+            buffer_size (int, optional): Addresses buffered per access kind before a flush. Defaults to 4096.
+        """
+        self.buffer_size = buffer_size
+        self.reads = np.zeros(0x10000, dtype=np.uint32)
+        self.writes = np.zeros(0x10000, dtype=np.uint32)
+        self.executes = np.zeros(0x10000, dtype=np.uint32)
+        self.read_buffer = []
+        self.write_buffer = []
+        self.execute_buffer = []
+        # The wrapped bus methods, bus_read, bus_write, bus_fetch, bus_read_u16 and bus_write_u16,
+        # are set by Bus.add_hooks
+
+    def read(self, addr: np.uint16) -> np.uint8:
+        self.read_buffer.append(addr)
+        if len(self.read_buffer) >= self.buffer_size:
+            self.flush()
+        return self.bus_read(addr)
+
+    def write(self, addr: np.uint16, value: np.uint8) -> None:
+        self.write_buffer.append(addr)
+        if len(self.write_buffer) >= self.buffer_size:
+            self.flush()
+        self.bus_write(addr, value)
+
+    def fetch(self, addr: np.uint16) -> np.uint8:
+        self.execute_buffer.append(addr)
+        if len(self.execute_buffer) >= self.buffer_size:
+            self.flush()
+        return self.bus_fetch(addr)
+
+    def read_u16(self, addr: np.uint16) -> np.uint16:
+        self.read_buffer.append(addr)
+        self.read_buffer.append(addr + 1)
+        if len(self.read_buffer) >= self.buffer_size:
+            self.flush()
+        return self.bus_read_u16(addr)
+
+    def write_u16(self, addr: np.uint16, value: np.uint16) -> None:
+        self.write_buffer.append(addr)
+        self.write_buffer.append(addr + 1)
+        if len(self.write_buffer) >= self.buffer_size:
+            self.flush()
+        self.bus_write_u16(addr, value)
+
+    def flush(self) -> None:
+        """Fold the buffered addresses into the count arrays."""
+        for counts, buffer in (
+            (self.reads, self.read_buffer),
+            (self.writes, self.write_buffer),
+            (self.executes, self.execute_buffer),
+        ):
+            if buffer:
+                np.add.at(counts, np.array(buffer, dtype=np.int64) & 0xFFFF, 1)
+                buffer.clear()
+
+    def counts(self) -> dict:
+        """Flush and return the count arrays.
+
+        Returns:
+            dict: {"reads": np.ndarray, "writes": np.ndarray, "executes": np.ndarray}
+        """
+        self.flush()
+        return {"reads": self.reads, "writes": self.writes, "executes": self.executes}
+
+    def top(self, kind: str = "reads", n: int = 10, start: int = 0x0000, end: int = 0xFFFF) -> list:
+        """Most accessed addresses in a range, e.g. top("writes", start=0x00, end=0xFF) for the
+        busiest zero-page variables.
+
+        Returns:
+            list: [(address, count)] in decreasing order of count.
+        """
+        counts = self.counts()[kind][start : end + 1]
+        order = np.argsort(counts, kind="stable")[::-1][:n]
+        return [(start + int(i), int(counts[i])) for i in order if counts[i]]
@@ -0,0 +1,60 @@
+import array
+
+import numpy as np
+
+# Flag bits of a table entry: the status register bits, shifted above the result byte
+C = 0x01 << 8
+Z = 0x02 << 8
+V = 0x40 << 8
+N = 0x80 << 8
+
+
+def zn(result: np.ndarray) -> np.ndarray:
+    return np.where(result == 0, Z, 0) | np.where(result & 0x80, N, 0)
+
+
+def build_tables() -> dict:
+    """Build every ALU table with vectorised NumPy (a few milliseconds, so no cache file is
+    needed). Each entry holds the result byte in bits 0-7 and the C, Z, V and N flags above it.
+
+    Returns:
+        dict: {name: np.ndarray of uint16 entries}, indexed by
+            ADC, SBC: carry << 16 | a << 8 | operand
+            CMP: register << 8 | operand (flags only)
+            ASL, LSR: value
+            ROL, ROR: carry << 8 | value
+    """
+    carry = np.arange(2)[:, None, None]
+    a = np.arange(256)[None, :, None]
+    m = np.arange(256)[None, None, :]
+
+    tables = {}
+    for name, operand in (("ADC", m), ("SBC", m ^ 0xFF)):  # A - M = A + ~M + C
+        total = a + operand + carry
+        result = total & 0xFF
+        overflow = ~(a ^ operand) & (a ^ result) & 0x80
+        tables[name] = result | np.where(total > 0xFF, C, 0) | np.where(overflow, V, 0) | zn(result)
+
+    difference = (a - m)[0] & 0xFF
+    r = a[0]
+    tables["CMP"] = np.where(r >= m[0], C, 0) | np.where(r == m[0], Z, 0) | np.where(difference & 0x80, N, 0)
+
+    value = np.arange(256)
+    carry = np.arange(2)[:, None]
+    shifts = {
+        "ASL": ((value << 1) & 0xFF, value >> 7),
+        "LSR": (value >> 1, value & 1),
+        "ROL": (((value << 1) | carry) & 0xFF, np.broadcast_to(value >> 7, (2, 256))),
+        "ROR": ((value >> 1) | (carry << 7), np.broadcast_to(value & 1, (2, 256))),
+    }
+    for name, (result, carry_out) in shifts.items():
+        tables[name] = result | np.where(carry_out, C, 0) | zn(result)
+
+    return {name: table.astype(np.uint16).ravel() for name, table in tables.items()}
+
+
+TABLES = build_tables()
+# Flat arrays of Python ints, so the opcodes index them without creating NumPy scalars
+ADC, SBC, CMP, ASL, LSR, ROL, ROR = (
+    array.array("H", TABLES[name].tobytes()) for name in ("ADC", "SBC", "CMP", "ASL", "LSR", "ROL", "ROR")
+)
@@ -0,0 +1,122 @@
+from .cpu import AddressingMode
+from .opcode_table import INSTRUCTION_SIZES
+
+# Instructions which may leave straight line code (branches are found by their RELATIVE mode).
+# PLP is included as it can set flag_B0 and halt the program.
+BLOCK_END = {"JMP", "JSR", "RTS", "RTI", "BRK", "PLP"}
+MAX_BLOCK = 64
+
+
+class BlockCache:
+    def __init__(self, cpu: "MOS6502") -> None:
+        """Predecoded basic blocks for the pure Python core. Installed by MOS6502.enable_block_cache,
+        it replaces run_until on that CPU with a loop that runs a whole block per dictionary lookup:
+        the decode table entries of every instruction in the block are looked up once, when the
+        block is translated, instead of fetching and decoding each instruction as it runs.
+
+        Blocks are translated the first time execution reaches them (a miss), or ahead of time
+        from the block starts of a disassembler code map with preload(). Execution is identical to
+        step_program: the $FE random byte is written before every instruction, and the loop
+        leaves a block for a due scheduler event, the end of the cycle budget or a halt. Before
+        each instruction the opcode byte is compared with the one translated, so self modifying
+        code drops the stale block. Blocks are not built in device pages, and runs with the
+        profiler, access counter, debug printing or debugger watchpoints fall back to step_program.
+
+        Args:
+            cpu (MOS6502): MOS6502 class to accelerate.
+        """
+        self.cpu = cpu
+        self.blocks = {}  # {start address: tuple of (address, opcode, function, mode, cycles)}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def translate(self, start: int) -> tuple:
+        """Decode the block starting at `start` from memory.
+
+        Returns:
+            tuple: The block, empty if `start` is in a device page or not a known opcode.
+        """
+        cpu = self.cpu
+        memory = cpu.bus.wram.memory
+        io_pages = cpu.bus.io_pages
+        block = []
+        addr = start
+        while len(block) < MAX_BLOCK and addr <= 0xFFFF and io_pages[addr >> 8] is None:
+            opcode = int(memory[addr])
+            entry = cpu.lookup_table.get(opcode)
+            if entry is None:
+                break
+            function, cycles, mode, mnemonic = entry
+            block.append((addr, opcode, function, mode, cycles))
+            if mode is AddressingMode.RELATIVE or mnemonic in BLOCK_END:
+                break
+            addr += INSTRUCTION_SIZES[mode]
+        block = tuple(block)
+        if block:
+            self.blocks[start] = block
+        return block
+
+    def preload(self, code_map: "CodeMap") -> int:
+        """Translate every block of a disassembler code map ahead of execution.
+
+        Returns:
+            int: Number of blocks translated.
+        """
+        return sum(1 for start in code_map.blocks if self.translate(start))
+
+    def python_only(self) -> bool:
+        cpu = self.cpu
+        return (
+            cpu.debug
+            or cpu.profiler is not None
+            or cpu.bus.access_counter is not None
+            or (cpu.debugger is not None and cpu.debugger.active)
+        )
+
+    def run_until(self, cycle: int) -> int:
+        """Block at a time equivalent of MOS6502.run_until."""
+        cpu = self.cpu
+        if self.python_only():
+            return type(cpu).run_until(cpu, cycle)
+
+        bus = cpu.bus
+        memory = bus.wram.memory
+        opcodes = cpu.opcodes
+        scheduler = cpu.scheduler
+        status = cpu.r_status
+        blocks = self.blocks
+        random_byte = cpu.random_byte
+        instructions = 0
+        while cpu.cycles < cycle and not status["flag_B0"]:
+            if cpu.cycles >= scheduler.next_event:
+                type(cpu).step_program(cpu)  # Delivers the due events
+                instructions += 1
+                continue
+            pc = int(cpu.r_program_counter)
+            block = blocks.get(pc)
+            if block is None:
+                self.misses += 1
+                block = self.translate(pc)
+                if not block:
+                    type(cpu).step_program(cpu)
+                    instructions += 1
+                    continue
+            else:
+                self.hits += 1
+
+            for addr, opcode, function, mode, cycles in block:
+                if cpu.cycles >= cycle or cpu.cycles >= scheduler.next_event or status["flag_B0"]:
+                    break
+                if memory[addr] != opcode:
+                    del blocks[pc]  # Overwritten since it was translated
+                    self.invalidations += 1
+                    break
+                # As step_program, without the fetch and decode
+                bus.write(0xFE, random_byte())
+                cpu.r_program_counter += 1
+                function(opcodes, mode)
+                cpu.cycles += cycles
+                cpu.instructions += 1
+                instructions += 1
+        return instructions
@@ -1,6 +1,12 @@
 import numpy as np
 from memory import Memory
 
+from .access_counter import AccessCounter
+from .state_hash import INSTRUMENTED, StateHash
+
+# Bus methods which instrumentation may hook, see Bus.add_hooks
+HOOKABLE = ("read", "write", "fetch", "read_u16", "write_u16", "write_block")
+
 class Bus:
     def __init__(self) -> None:
         """Main for component interfacing.
@@ -8,15 +14,227 @@ class Bus:
         """
         self.wram = Memory()
         self.vram = None
+        # Device mapped to each 256 byte page of the address space (None for plain memory)
+        self.io_pages = [None] * 0x100
+        self.io_mask = np.zeros(0x100, dtype=np.uint8)  # 1 for the device pages, for the compiled loop
+        self.devices = []
+
+        # Opcode fetches, kept separate from read so they can be counted as executes
+        self.fetch = self.read
+        self.hooks = []  # [(instrumentation, method names)], innermost first
+        self.access_counter = None
+        self.state_hash = None
+
+    def enable_access_counter(self, buffer_size: int = 4096) -> AccessCounter:
+        """Count reads, writes and executes per address. The instrumented accesses shadow the bus
+        methods on this instance only, so there is no cost while disabled.
+
+        Args:
+            buffer_size (int, optional): See AccessCounter. Defaults to 4096.
+
+        Returns:
+            AccessCounter: The counter holding the per address counts.
+        """
+        self.disable_access_counter()
+        self.access_counter = AccessCounter(self, buffer_size)
+        self.add_hooks(self.access_counter, ("read", "write", "fetch", "read_u16", "write_u16"))
+        return self.access_counter
+
+    def disable_access_counter(self) -> None:
+        if self.access_counter is None:
+            return
+        self.access_counter.flush()
+        self.remove_hooks(self.access_counter)
+        self.access_counter = None
+
+    def enable_state_hash(self) -> StateHash:
+        """Keep a per page hash of WRAM up to date as it is written, for MOS6502.fingerprint. The
+        instrumented writes shadow the bus methods on this instance only.
+
+        Returns:
+            StateHash: The page hashes.
+        """
+        if self.state_hash is None:
+            self.install_state_hash(StateHash(self))
+        return self.state_hash
+
+    def install_state_hash(self, state_hash: StateHash) -> None:
+        self.state_hash = state_hash
+        self.add_hooks(state_hash, INSTRUMENTED)
+
+    def disable_state_hash(self) -> None:
+        if self.state_hash is None:
+            return
+        self.remove_hooks(self.state_hash)
+        self.state_hash = None
+
+    def add_hooks(self, hook, names: tuple) -> None:
+        """Route bus methods through an instrumentation object (access counter, state hash,
+        debugger watchpoints). `hook.<name>` shadows each named method on this instance, and is
+        given the method it wraps as `hook.bus_<name>`. Hooks stack in the order added, and any of
+        them can be removed without unhooking the others.
+
+        Args:
+            hook: Object with the instrumented methods.
+            names (tuple): Names of the methods it instruments, from HOOKABLE.
+        """
+        self.hooks.append((hook, names))
+        self.chain_hooks()
+
+    def remove_hooks(self, hook) -> None:
+        self.hooks = [(h, names) for h, names in self.hooks if h is not hook]
+        self.chain_hooks()
+
+    def chain_hooks(self) -> None:
+        """Rebuild the method shadows from the plain methods outwards through the hooks."""
+        for name in HOOKABLE:
+            self.__dict__.pop(name, None)
+        methods = {name: getattr(self, name) for name in HOOKABLE if name != "fetch"}
+        methods["fetch"] = methods["read"]
+        hooked = {"fetch"}
+        for hook, names in self.hooks:
+            for name in names:
+                setattr(hook, f"bus_{name}", methods[name])
+                methods[name] = getattr(hook, name)
+                hooked.add(name)
+        for name in hooked:
+            setattr(self, name, methods[name])
+
+    def clone(self, memo: dict) -> "Bus":
+        """Copy of the bus for a cloned CPU, with its own memory and the cloned devices.
+
+        Args:
+            memo (dict): {id(original device): cloned device}, see MOS6502.clone.
+
+        Returns:
+            Bus: Bus for the clone, without instrumentation.
+        """
+        bus = Bus.__new__(Bus)
+        bus.wram = self.wram.clone()
+        bus.vram = self.vram
+        bus.io_pages = self.io_pages.copy()
+        bus.io_mask = self.io_mask.copy()
+        bus.devices = [memo[id(device)] for device in self.devices]
+        if self.devices:
+            bus.io_pages = [None if device is None else memo[id(device)] for device in self.io_pages]
+        bus.fetch = bus.read
+        bus.hooks = []
+        bus.access_counter = None
+        bus.state_hash = None
+        if self.state_hash is not None:
+            bus.install_state_hash(self.state_hash.clone(bus))
+        return bus
+
+    def attach(self, device: "Device", start: int, end: int) -> None:
+        """Map a device's registers into the address space. Accesses to the mapped pages are
+        routed to the device instead of WRAM.
+
+        Args:
+            device (Device): Device to attach.
+            start (int): First address handled by the device.
+            end (int): Last address handled by the device (inclusive).
+        """
+        if device not in self.devices:
+            self.devices.append(device)
+        for page in range(start >> 8, (end >> 8) + 1):
+            self.io_pages[page] = device
+            self.io_mask[page] = 1
+
+    def regions(self, start: int, length: int):
+        """Split an address range into runs of consecutive pages handled by the same device.
+
+        Args:
+            start (int): First address.
+            length (int): Number of bytes, with start + length no more than 0x10000.
+
+        Yields:
+            tuple: (start, stop, device) with stop exclusive, and device None for WRAM.
+        """
+        stop = start + length
+        if start < 0 or length < 0 or stop > 0x10000:
+            raise ValueError(f"Block ${start:04X} + {length} is outside the address space")
+        addr = start
+        while addr < stop:
+            device = self.io_pages[addr >> 8]
+            end = (addr | 0xFF) + 1
+            while end < stop and self.io_pages[end >> 8] is device:
+                end += 0x100
+            end = min(end, stop)
+            yield addr, end, device
+            addr = end
+
+    def read_block(self, start: int, length: int) -> memoryview:
+        """Read a block of memory without per byte calls. A block entirely in WRAM is returned as
+        a read only view of the memory itself (no copy); blocks touching device pages are copied,
+        reading the device registers a byte at a time.
+
+        Block transfers bypass the access counter and debugger watchpoints.
+
+        Args:
+            start (int): First address.
+            length (int): Number of bytes.
+
+        Returns:
+            memoryview: The bytes, format "B".
+        """
+        regions = list(self.regions(start, length))
+        if len(regions) == 1 and regions[0][2] is None:
+            return memoryview(self.wram.memory[start : start + length]).toreadonly()
+
+        block = np.empty(length, dtype=np.uint8)
+        for a, b, device in regions:
+            if device is None:
+                block[a - start : b - start] = self.wram.memory[a:b]
+            else:
+                block[a - start : b - start] = [device.read(addr) for addr in range(a, b)]
+        return memoryview(block)
+
+    def write_block(self, start: int, data) -> None:
+        """Write a block of memory, with WRAM written as slices and device registers a byte at a
+        time.
+
+        Args:
+            start (int): First address.
+            data (bytes-like): Bytes to write, e.g. bytes, a memoryview or a uint8 np.ndarray.
+        """
+        values = np.frombuffer(data, dtype=np.uint8)
+        for a, b, device in self.regions(start, len(values)):
+            if device is None:
+                self.wram.memory[a:b] = values[a - start : b - start]
+            else:
+                for addr in range(a, b):
+                    device.write(addr, values[addr - start])
+
+    def copy_block(self, src: int, dst: int, length: int) -> None:
+        """Copy `length` bytes from `src` to `dst`. Overlapping WRAM blocks are copied as if
+        through an intermediate buffer.
+        """
+        self.write_block(dst, self.read_block(src, length))
 
     def write(self, addr: np.uint16, value: np.uint8) -> None:
+        device = self.io_pages[addr >> 8]
+        if device is not None:
+            device.write(addr, value)
+            return
         self.wram.write(addr, value)
-    
+
     def read(self, addr: np.uint16) -> np.uint8:
+        device = self.io_pages[addr >> 8]
+        if device is not None:
+            return device.read(addr)
         return self.wram.read(addr)
-    
+
     def write_u16(self, addr: np.uint16, value: np.uint16) -> None:
-        self.wram.write_u16(addr, value)
-    
+        hi_addr = (int(addr) + 1) & 0xFFFF
+        if self.io_pages[addr >> 8] is None and self.io_pages[hi_addr >> 8] is None:
+            self.wram.write_u16(addr, value)
+            return
+        # Either byte in a device page: a byte at a time, past the instrumentation hooking this method
+        Bus.write(self, addr, np.uint8(value & 0xFF))
+        Bus.write(self, hi_addr, np.uint8(value >> 8))
+
     def read_u16(self, addr: np.uint16) -> np.uint16:
-        return self.wram.read_u16(addr)
\ No newline at end of file
+        hi_addr = (int(addr) + 1) & 0xFFFF
+        if self.io_pages[addr >> 8] is None and self.io_pages[hi_addr >> 8] is None:
+            return self.wram.read_u16(addr)
+        return np.uint16(int(Bus.read(self, addr)) | int(Bus.read(self, hi_addr)) << 8)
@@ -3,9 +3,11 @@ from enum import Enum, auto
 import numpy as np
 
 from memory import Memory
+from pacing import CYCLES_PER_FRAME, NTSC_FPS, FramePacer
 from program import Program
-import pygame
-import time
+import copy
+import hashlib
+import warnings
 
 
 class AddressingMode(Enum):
@@ -24,15 +26,33 @@ class AddressingMode(Enum):
     RELATIVE = auto()
 
 
+def random_byte() -> np.uint8:
+    """Random value between 1 and 15 for the snake program's $FE byte."""
+    return np.random.randint(1, 16, dtype=np.uint8)
+
+
 from .opcodes import MOS6502_OpCodes
+from .opcode_table import LOOKUP_TABLE
+from .blocks import BlockCache
 from .bus import Bus
+from .debugger import Debugger
+from .metrics import Metrics
+from .profiler import Profiler
+from .scheduler import Scheduler
 
 
 class MOS6502:
-    def __init__(self) -> None:
+    def __init__(self, debug: bool = True, backend: str = "python") -> None:
         """Class which emulates the behaviour of the MOS6502 processor, notably used
         inside the Nintendo Entertainment System.
+
+        Args:
+            debug (bool, optional): Print the system state on every step. Disable for headless
+                runs. Defaults to True.
+            backend (str, optional): "python", or "numba" for the compiled interpreter loop
+                (falls back to "python" when Numba is not installed). Defaults to "python".
         """
+        self.debug = debug
 
         # The Registers
         self.r_program_counter = np.uint16(0)
@@ -51,10 +71,62 @@ class MOS6502:
             "flag_N": False,
         }
         self.memory = None
+        self.cycles = 0
+        self.instructions = 0
 
-        # imported from opcodes
+        # imported from opcodes, the decode table is shared by every instance
         self.opcodes = MOS6502_OpCodes(self)
-        self.lookup_table = self.opcodes.lookup_table
+        self.lookup_table = LOOKUP_TABLE
+
+        # 6502 level profiler, only consulted when enabled
+        self.profiler = None
+
+        # Breakpoints and watchpoints, instrumenting the loop only while any are set
+        self.debugger = None
+
+        # Counters and gauges sampled once per frame
+        self.metrics = None
+
+        # Predecoded basic blocks for the Python backend
+        self.block_cache = None
+
+        # Cycle timestamped events (NMI, IRQ and device callbacks)
+        self.scheduler = Scheduler(self)
+
+        # Optional shared memory export of the screen (framebuffer.FramePublisher)
+        self.frame_publisher = None
+
+        # Generator behind the $FE byte, the compiled loop's own with the numba backend
+        self.random_byte = random_byte
+
+        self.backend = "python"
+        if backend == "numba":
+            from . import jit
+
+            if jit.numba is None:
+                warnings.warn("Numba is not installed, using the pure Python backend")
+            else:
+                # The compiled loop takes over stepping for this instance only
+                self.backend = "numba"
+                self.jit = jit.JitBackend(self)
+                self.step_program = self.jit.step
+                self.run_until = self.jit.run_until
+                self.random_byte = jit.random_byte  # One random stream across handoffs
+                if debug:
+                    warnings.warn("Debug printing runs the pure Python core, pass debug=False to use Numba")
+
+    def seed(self, value: int) -> None:
+        """Seed the generator behind the $FE random byte, NumPy's and, with the numba backend, the
+        compiled loop's, which the Python core and block cache then draw from as well.
+
+        Args:
+            value (int): Seed.
+        """
+        np.random.seed(value)
+        if self.backend == "numba":
+            from . import jit
+
+            jit.seed(value)
 
     def connect_to_bus(self) -> None:
         """Initiate the Bus and attach to CPU object. Could probably be made part of the init method."""
@@ -66,12 +138,156 @@ class MOS6502:
         Args:
             program (Program): Target program object to load into memory.
         """
-        for i, val in enumerate(program.program):
-            self.bus.write(0x0600 + i, val)
+        self.bus.write_block(0x0600, program.program)
         self.bus.write_u16(0xFFFC, 0x0600)  # Write the start of the program to addr 0xFFFC
         # self.bus.write_u16(0x07FE, 0x0600)
         self.reset()
 
+    def clone(self) -> "MOS6502":
+        """Fork the machine, e.g. for tree search over inputs. The clone has its own registers,
+        memory, scheduler and devices, and shares the immutable decode tables. Profiler, debugger
+        and frame publisher are not carried over.
+
+        Returns:
+            MOS6502: Independent copy of this machine in its current state.
+        """
+        clone = MOS6502.__new__(type(self))
+        clone.__dict__.update(self.__dict__)
+        for name in ("step_program", "run_until"):
+            clone.__dict__.pop(name, None)  # Instance overrides bound to this machine
+        clone.r_status = self.r_status.copy()
+        clone.opcodes = MOS6502_OpCodes(clone)
+        clone.profiler = None
+        clone.debugger = None
+        clone.metrics = None
+        clone.block_cache = None
+        clone.frame_publisher = None
+
+        # Devices (and anything else referring to this machine) are rebound through the memo
+        memo = {id(self): clone}
+        devices = self.bus.devices
+        for device in devices:
+            copy.deepcopy(device, memo)
+        clone.bus = self.bus.clone(memo)
+        clone.scheduler = self.scheduler.clone(clone, memo)
+        if devices:
+            for name, value in list(vars(clone).items()):
+                if any(value is device for device in devices):
+                    setattr(clone, name, memo[id(value)])
+
+        if self.backend == "numba":
+            from . import jit
+
+            clone.jit = jit.JitBackend(clone)
+            clone.step_program = clone.jit.step
+            clone.run_until = clone.jit.run_until
+        return clone
+
+    def fingerprint(self) -> int:
+        """64 bit hash of the machine state: the registers, status and WRAM. Equal states give
+        equal fingerprints, so runs, farm workers and replays can be compared without comparing
+        memory. WRAM is hashed incrementally by the bus's StateHash, which the first call enables,
+        so a fingerprint costs the rehashing of the pages written since the previous one.
+
+        Returns:
+            int: The fingerprint.
+        """
+        state_hash = self.bus.state_hash or self.bus.enable_state_hash()
+        registers = bytes(
+            [
+                int(self.r_program_counter) & 0xFF,
+                int(self.r_program_counter) >> 8,
+                int(self.r_stack_pointer),
+                int(self.r_accumulator),
+                int(self.r_index_X),
+                int(self.r_index_Y),
+                int(self.status_to_value()),
+            ]
+        )
+        h = hashlib.blake2b(state_hash.update().to_bytes(8, "little") + registers, digest_size=8)
+        return int.from_bytes(h.digest(), "little")
+
+    def enable_profiler(self) -> Profiler:
+        """Start counting instructions and cycles per address, opcode and subroutine.
+
+        Returns:
+            Profiler: The attached profiler, holding the counters and reports.
+        """
+        self.profiler = Profiler(self)
+        return self.profiler
+
+    def disable_profiler(self) -> None:
+        self.profiler = None
+
+    def enable_metrics(self) -> Metrics:
+        """Start a metrics registry, sampled once per frame by the frame loops.
+
+        Returns:
+            Metrics: The attached registry.
+        """
+        self.metrics = Metrics(self)
+        return self.metrics
+
+    def disable_metrics(self) -> None:
+        self.metrics = None
+
+    def enable_block_cache(self, code_map: "CodeMap" = None) -> BlockCache:
+        """Run the Python backend a basic block at a time, decoding each block once. Blocks are
+        translated as execution first reaches them, and those of a disassembler code map (see
+        disassembler.analyse) ahead of time, so the first frames do not pay for the decoding.
+
+        Args:
+            code_map (CodeMap, optional): Blocks to translate now. Defaults to None.
+
+        Returns:
+            BlockCache: The attached cache.
+        """
+        if self.backend != "python":
+            raise ValueError(f"The block cache runs the Python backend, not {self.backend}")
+        if self.block_cache is None:
+            self.block_cache = BlockCache(self)
+            self.update_run_until()
+        if code_map is not None:
+            self.block_cache.preload(code_map)
+        return self.block_cache
+
+    def disable_block_cache(self) -> None:
+        if self.block_cache is None:
+            return
+        self.block_cache = None
+        self.update_run_until()
+
+    def update_run_until(self) -> None:
+        """Shadow run_until with the loop of the tools in use: the debugger's while it has
+        breakpoints or watchpoints, otherwise the block cache's, otherwise the compiled backend's,
+        or else the plain loop. The tools call this when they change, so they can be enabled and
+        disabled in any order.
+        """
+        self.__dict__.pop("run_until", None)
+        if self.debugger is not None and self.debugger.running:
+            self.run_until = self.debugger.run_until
+        elif self.block_cache is not None:
+            self.run_until = self.block_cache.run_until
+        elif self.backend == "numba":
+            self.run_until = self.jit.run_until
+
+    def enable_debugger(self) -> Debugger:
+        """Attach a debugger for breakpoints and watchpoints. Execution is only instrumented while
+        at least one is set.
+
+        Returns:
+            Debugger: The attached debugger.
+        """
+        if self.debugger is None:
+            self.debugger = Debugger(self)
+        return self.debugger
+
+    def disable_debugger(self) -> None:
+        if self.debugger is None:
+            return
+        self.debugger.clear()
+        self.debugger = None
+
     def step_program(self) -> None:
         """Step through the program, by reading from memory, executing the instruction, and then
         incrementing the program counter (offloaded to the addressing modes)
@@ -81,16 +297,42 @@ class MOS6502:
         """
 
         # Random value required for Snake program
-        self.bus.write(0xFE, np.random.randint(1, 16, dtype=np.uint8))  # random value to memory
+        self.bus.write(0xFE, self.random_byte())  # random value to memory
+
+        # Deliver any due events / interrupts before fetching the next instruction
+        if self.cycles >= self.scheduler.next_event:
+            self.scheduler.run()
 
-        opcode = self.bus.read(self.r_program_counter)
+        pc = self.r_program_counter
+        opcode = self.bus.fetch(pc)
         # print(f'{hex(opcode)}, {self.lookup_table[opcode][3]}')
-        self.print_system()
+        if self.debug:
+            self.print_system()
 
         self.r_program_counter += 1
         f = self.lookup_table[opcode][0]
         a = self.lookup_table[opcode][2]
-        f(a)  # run the opcode with the specified addressing mode
+        f(self.opcodes, a)  # run the opcode with the specified addressing mode
+        self.cycles += self.lookup_table[opcode][1]
+        self.instructions += 1
+
+        if self.profiler is not None:
+            self.profiler.record(pc, opcode)
+
+    def run_until(self, cycle: int) -> int:
+        """Step headlessly until the cycle count reaches `cycle` or the program halts (BRK).
+
+        Args:
+            cycle (int): Absolute cycle count to run to.
+
+        Returns:
+            int: Number of instructions executed.
+        """
+        instructions = 0
+        while self.cycles < cycle and not self.r_status["flag_B0"]:
+            self.step_program()
+            instructions += 1
+        return instructions
 
     """
     def run_program(self) -> None:
@@ -102,23 +344,33 @@ class MOS6502:
                 break
     """
 
-    def run_program(self) -> None:
+    def run_program(self, fps: float = NTSC_FPS, cycles_per_frame: int = CYCLES_PER_FRAME, turbo: bool = False) -> None:
         """Execute the program loaded into memory. This method is more elaborate
         as due to the snake game, we wish to render a region of memory to the screen.
         We do this using the pygame library.
+
+        The program runs a frame of `cycles_per_frame` cycles at a time, paced to `fps` frames
+        per second of wall clock time by a FramePacer. When the host can't keep up, frames are
+        still emulated but not drawn; in turbo mode the program runs as fast as the host allows.
+
+        Args:
+            fps (float, optional): Target emulated frame rate. Defaults to NTSC_FPS.
+            cycles_per_frame (int, optional): CPU cycles per frame. Defaults to CYCLES_PER_FRAME.
+            turbo (bool, optional): Run unthrottled. Defaults to False.
         """
+        import pygame  # Front end only, kept out of the headless core import
 
         # For the snake program
         pygame.init()
         # Speed up pygame
         pygame.event.set_allowed([pygame.QUIT, pygame.KEYDOWN])
         screen = pygame.display.set_mode((640, 640))
-        data = np.zeros(32 * 32)
+        data = np.zeros(32 * 32)  # Screen as last drawn
+        published = np.zeros(32 * 32)
         pygame.display.update()
+        pacer = FramePacer(fps, turbo)
 
         while True:
-            self.step_program()
-
             # This is Explicitly for the snake program
             for event in pygame.event.get():
                 match event.type:
@@ -140,10 +392,20 @@ class MOS6502:
                                 self.bus.write(0xFF, 0x73)
                                 # print('DOWN PRESSED')
 
+            self.run_until(self.cycles + cycles_per_frame)
+            render = pacer.end_frame()
+
+            screen_block = np.asarray(self.bus.read_block(0x0200, 0x0400))
+            if np.all(published == screen_block) == False:
+                published = np.copy(screen_block)
+                if self.frame_publisher is not None:
+                    self.frame_publisher.publish(published)
+            if self.metrics is not None:
+                self.metrics.sample(dropped=0 if render else 1)
+
             # Render to screen if there's a change between the data var and the appropriate memory address.
-            if np.all(data == self.bus.wram.memory[0x0200 : 0x05FF + 1]) == False:
-                time.sleep(0.05)
-                data = np.copy(self.bus.wram.memory[0x0200 : 0x05FF + 1])
+            if render and np.all(data == screen_block) == False:
+                data = np.copy(screen_block)
                 # Change background to white
                 data_c = np.copy(data)
                 data_c[data_c == 0] = 255
@@ -192,6 +454,34 @@ class MOS6502:
         self.r_status["flag_B0"] = False
         self.r_status["flag_B1"] = True
         ###
+        self.r_status["flag_I"] = True  # Interrupts are disabled on reset
+
+    def interrupt(self, vector: int, brk: bool = False) -> None:
+        """Interrupt entry sequence shared by NMI, IRQ and BRK: push the program counter and the
+        status register, disable interrupts, then jump through the vector.
+
+        Args:
+            vector (int): Address of the interrupt vector, 0xFFFA (NMI) or 0xFFFE (IRQ/BRK).
+            brk (bool, optional): Set the B flag in the pushed status, as for BRK. Defaults to False.
+        """
+        self.stack_push_u16(self.r_program_counter)
+        status = self.status_to_value() | 0b0010_0000  # Bit 5 always reads as set
+        status = status | 0b0001_0000 if brk else status & 0b1110_1111
+        self.stack_push(np.uint8(status))
+        self.r_status["flag_I"] = True
+        self.r_program_counter = self.bus.read_u16(vector)
+
+    def nmi(self) -> None:
+        """Non-maskable interrupt, vectored through 0xFFFA."""
+        self.interrupt(0xFFFA)
+        self.cycles += 7
+
+    def irq(self) -> None:
+        """Maskable interrupt, vectored through 0xFFFE. Ignored while the I flag is set."""
+        if self.r_status["flag_I"]:
+            return
+        self.interrupt(0xFFFE)
+        self.cycles += 7
 
     def get_operand_address(self, mode: AddressingMode) -> np.uint16:
         """Return the address from a respective operation based on the addressing mode used.
@@ -242,11 +532,12 @@ class MOS6502:
                 return base + np.uint16(self.r_index_Y)  # Wrapping Add (may throw overflow exception)
 
             case AddressingMode.INDIRECT:
-                base = self.bus.read_u16(self.r_program_counter)
-                self.r_program_counter += 2
-                base = self.bus.read_u16(base)
+                ptr = int(self.bus.read_u16(self.r_program_counter))
                 self.r_program_counter += 2
-                return base
+                # As on the 6502, the pointer's high byte is read without carrying into the next page
+                lo = self.bus.read(ptr)
+                hi = self.bus.read((ptr & 0xFF00) | ((ptr + 1) & 0xFF))
+                return np.uint16(int(hi) << 8 | int(lo))
 
             case AddressingMode.INDIRECT_X:
                 base = self.bus.read(self.r_program_counter)
@@ -289,6 +580,19 @@ class MOS6502:
         for i, f in enumerate(self.r_status):
             self.r_status[f] = value & (1 << i) != 0
 
+    def pull_status(self, value: np.uint8) -> None:
+        """Load the status register from a copy pulled off the stack (PLP, RTI). Bits 4 and 5, the
+        B flags, only exist on the stack copy, so they are ignored and flag_B0 keeps meaning the
+        program has halted.
+
+        Args:
+            value (np.uint8): status number
+        """
+        b0, b1 = self.r_status["flag_B0"], self.r_status["flag_B1"]
+        self.value_to_status(value)
+        self.r_status["flag_B0"] = b0
+        self.r_status["flag_B1"] = b1
+
     def status_to_value(self) -> np.uint8:
         """Convert the status register (a dict) to a usigned 8 bit integer.
 
@@ -0,0 +1,173 @@
+import numpy as np
+
+
+class Debugger:
+    def __init__(self, cpu: "MOS6502") -> None:
+        """Execution breakpoints and memory watchpoints. Installed on a MOS6502 by
+        MOS6502.enable_debugger.
+
+        Nothing is instrumented while no breakpoints or watchpoints are set. The instrumented
+        run_until loop shadows the CPU method, and the watching bus accesses hook the Bus methods
+        (see Bus.add_hooks), on their instances only and only while there is something to check,
+        so normal runs keep the plain loop. Breakpoints are a set lookup on the program counter, and watchpoints first
+        test a per page count so accesses to unwatched pages cost a single list index.
+
+        Conditions are optional callables: `condition(cpu)` for breakpoints and
+        `condition(cpu, addr, value)` for watchpoints, which only trigger when they return True.
+
+        After run_until returns, `hit` holds what stopped it, as a tuple:
+            ("break", pc, None), ("read", addr, value) or ("write", addr, value)
+        or None if the run ended normally. Watchpoints stop the run after the accessing
+        instruction completes.
+
+        Args:
+            cpu (MOS6502): CPU being debugged.
+        """
+        self.cpu = cpu
+        self.breakpoints = {}  # {pc: condition}
+        self.watchpoints = {"read": {}, "write": {}}  # {kind: {addr: condition}}
+        # Number of watched addresses in each 256 byte page
+        self.watched_pages = {"read": [0] * 0x100, "write": [0] * 0x100}
+        self.hit = None
+
+        self.running = False
+        self.watching = False
+
+    @property
+    def active(self) -> bool:
+        return self.running or self.watching
+
+    def add_breakpoint(self, pc: int, condition=None) -> None:
+        """Stop before the instruction at `pc` runs.
+
+        Args:
+            pc (int): Address of the instruction.
+            condition (callable, optional): condition(cpu) -> bool. Defaults to None (always stop).
+        """
+        self.breakpoints[pc & 0xFFFF] = condition
+        self.update()
+
+    def remove_breakpoint(self, pc: int) -> None:
+        self.breakpoints.pop(pc & 0xFFFF, None)
+        self.update()
+
+    def add_watchpoint(self, addr: int, kind: str = "write", condition=None) -> None:
+        """Stop after an instruction reads or writes `addr`, e.g. add_watchpoint(0xFF) for input.
+
+        Args:
+            addr (int): Address to watch.
+            kind (str, optional): "read", "write" or "access" (both). Defaults to "write".
+            condition (callable, optional): condition(cpu, addr, value) -> bool. Defaults to None.
+        """
+        addr &= 0xFFFF
+        for k in ("read", "write") if kind == "access" else (kind,):
+            if addr not in self.watchpoints[k]:
+                self.watched_pages[k][addr >> 8] += 1
+            self.watchpoints[k][addr] = condition
+        self.update()
+
+    def remove_watchpoint(self, addr: int, kind: str = "access") -> None:
+        addr &= 0xFFFF
+        for k in ("read", "write") if kind == "access" else (kind,):
+            if self.watchpoints[k].pop(addr, False) is not False:
+                self.watched_pages[k][addr >> 8] -= 1
+        self.update()
+
+    def clear(self) -> None:
+        """Remove every breakpoint and watchpoint, restoring the plain loop."""
+        self.breakpoints.clear()
+        for k in ("read", "write"):
+            self.watchpoints[k].clear()
+            self.watched_pages[k] = [0] * 0x100
+        self.update()
+
+    def update(self) -> None:
+        """Install or remove the instrumentation to match the current breakpoints and watchpoints."""
+        cpu, bus = self.cpu, self.cpu.bus
+        watching = bool(self.watchpoints["read"] or self.watchpoints["write"])
+        running = watching or bool(self.breakpoints)
+
+        if watching and not self.watching:
+            bus.add_hooks(self, ("read", "write", "read_u16", "write_u16"))
+        elif self.watching and not watching:
+            bus.remove_hooks(self)
+
+        self.watching = watching
+        if running != self.running:
+            self.running = running
+            cpu.update_run_until()
+
+    def run_until(self, cycle: int) -> int:
+        """Instrumented MOS6502.run_until, which also stops at breakpoints and watchpoints. The
+        breakpoint at the current program counter is skipped, so a stopped run can be resumed by
+        calling run_until again.
+
+        Args:
+            cycle (int): Absolute cycle count to run to.
+
+        Returns:
+            int: Number of instructions executed.
+        """
+        cpu = self.cpu
+        step = type(cpu).step_program  # Always the Python core, which goes through the bus
+        breakpoints = self.breakpoints
+        self.hit = None
+
+        instructions = 0
+        while cpu.cycles < cycle and not cpu.r_status["flag_B0"]:
+            pc = int(cpu.r_program_counter)
+            if instructions and pc in breakpoints:
+                condition = breakpoints[pc]
+                if condition is None or condition(cpu):
+                    self.hit = ("break", pc, None)
+                    break
+            step(cpu)
+            instructions += 1
+            if self.hit is not None:
+                break
+        return instructions
+
+    def step(self) -> tuple:
+        """Run a single instruction.
+
+        Returns:
+            tuple: The watchpoint hit by the instruction, or None.
+        """
+        self.hit = None
+        type(self.cpu).step_program(self.cpu)
+        return self.hit
+
+    def watch(self, kind: str, addr: int, value: np.uint8) -> None:
+        condition = self.watchpoints[kind].get(addr, False)
+        if condition is False:
+            return
+        if condition is None or condition(self.cpu, addr, value):
+            self.hit = (kind, addr, int(value))
+
+    def read(self, addr: np.uint16) -> np.uint8:
+        value = self.bus_read(addr)
+        if self.watched_pages["read"][(addr >> 8) & 0xFF]:
+            self.watch("read", int(addr) & 0xFFFF, value)
+        return value
+
+    def write(self, addr: np.uint16, value: np.uint8) -> None:
+        self.bus_write(addr, value)
+        if self.watched_pages["write"][(addr >> 8) & 0xFF]:
+            self.watch("write", int(addr) & 0xFFFF, value)
+
+    def read_u16(self, addr: np.uint16) -> np.uint16:
+        value = self.bus_read_u16(addr)
+        watched = self.watched_pages["read"]
+        for i, byte in ((0, value & 0xFF), (1, value >> 8)):
+            a = (int(addr) + i) & 0xFFFF
+            if watched[a >> 8]:
+                self.watch("read", a, byte)
+        return value
+
+    def write_u16(self, addr: np.uint16, value: np.uint16) -> None:
+        self.bus_write_u16(addr, value)
+        watched = self.watched_pages["write"]
+        for i, byte in ((0, value & 0xFF), (1, value >> 8)):
+            a = (int(addr) + i) & 0xFFFF
+            if watched[a >> 8]:
+                self.watch("write", a, byte)
@@ -0,0 +1,435 @@
+import numpy as np
+
+from .cpu import AddressingMode
+from .opcode_table import LOOKUP_TABLE
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Register file shared with the compiled loop
+PC, SP, A, X, Y, P = range(6)
+
+# Exit codes of the compiled loop
+BUDGET, HANDOFF = range(2)
+NO_BUDGET = 1 << 62
+
+# Addressing modes as plain integers (0 for implied)
+IMPLIED = 0
+IMMEDIATE = AddressingMode.IMMEDIATE.value
+ZERO_PAGE = AddressingMode.ZERO_PAGE.value
+ZERO_PAGE_X = AddressingMode.ZERO_PAGE_X.value
+ZERO_PAGE_Y = AddressingMode.ZERO_PAGE_Y.value
+ABSOLUTE = AddressingMode.ABSOLUTE.value
+ABSOLUTE_X = AddressingMode.ABSOLUTE_X.value
+ABSOLUTE_Y = AddressingMode.ABSOLUTE_Y.value
+INDIRECT = AddressingMode.INDIRECT.value
+INDIRECT_X = AddressingMode.INDIRECT_X.value
+INDIRECT_Y = AddressingMode.INDIRECT_Y.value
+ACCUMULATOR = AddressingMode.ACCUMULATOR.value
+RELATIVE = AddressingMode.RELATIVE.value
+
+MNEMONICS = (
+    "ADC", "AND", "ASL", "BCC", "BCS", "BEQ", "BIT", "BMI", "BNE", "BPL", "BRK", "BVC", "BVS", "CLC",
+    "CLD", "CLI", "CLV", "CMP", "CPX", "CPY", "DEC", "DEX", "DEY", "EOR", "INC", "INX", "INY", "JMP",
+    "JSR", "LDA", "LDX", "LDY", "LSR", "NOP", "ORA", "PHA", "PHP", "PLA", "PLP", "ROL", "ROR", "RTI",
+    "RTS", "SBC", "SEC", "SED", "SEI", "STA", "STX", "STY", "TAX", "TAY", "TSX", "TXA", "TXS", "TYA",
+)  # fmt: skip
+(
+    ADC, AND, ASL, BCC, BCS, BEQ, BIT, BMI, BNE, BPL, BRK, BVC, BVS, CLC,
+    CLD, CLI, CLV, CMP, CPX, CPY, DEC, DEX, DEY, EOR, INC, INX, INY, JMP,
+    JSR, LDA, LDX, LDY, LSR, NOP, ORA, PHA, PHP, PLA, PLP, ROL, ROR, RTI,
+    RTS, SBC, SEC, SED, SEI, STA, STX, STY, TAX, TAY, TSX, TXA, TXS, TYA,
+) = range(len(MNEMONICS))  # fmt: skip
+UNKNOWN = len(MNEMONICS)
+
+
+def decode_tables(lookup_table: dict) -> tuple:
+    """Flatten the CPU lookup table into mnemonic, addressing mode and cycle arrays indexed by
+    opcode, for use inside the compiled loop.
+    """
+    mnemonics = np.full(0x100, UNKNOWN, dtype=np.int64)
+    modes = np.zeros(0x100, dtype=np.int64)
+    cycles = np.zeros(0x100, dtype=np.int64)
+    for opcode, (_, n, mode, name) in lookup_table.items():
+        mnemonics[opcode] = MNEMONICS.index(name)
+        modes[opcode] = IMPLIED if mode is None else mode.value
+        cycles[opcode] = n
+    return mnemonics, modes, cycles
+
+
+DECODE_TABLES = decode_tables(LOOKUP_TABLE)  # Shared by every backend using the standard table
+
+
+def zn(v):
+    """Zero and negative flag bits for a result byte."""
+    return (v & 0x80) | (0x02 if v == 0 else 0)
+
+
+def random_byte():
+    """Random value between 1 and 15 for $FE. Compiled, it draws from Numba's generator, which
+    the Python core then shares (see MOS6502.seed).
+    """
+    return np.random.randint(1, 16)
+
+
+def run(regs, memory, io_pages, dirty, mnemonics, modes, cycle_table, cycles, cycle_budget, max_instructions):
+    """Fetch-decode-execute loop over a flat register array and the WRAM buffer.
+
+    Runs until the cycle count reaches `cycle_budget` or `max_instructions` have run, or hands back
+    to Python (HANDOFF) before an instruction the compiled loop does not execute itself: BRK, unknown
+    opcodes, code in a page mapped to a device and any data access to one. The registers and memory are updated in
+    place, and every page written to is flagged in `dirty` (see StateHash).
+
+    Returns:
+        tuple: (exit code, cycle count, instructions executed)
+    """
+    pc = regs[PC]
+    sp = regs[SP]
+    a = regs[A]
+    x = regs[X]
+    y = regs[Y]
+    p = regs[P]
+    instructions = 0
+    code = BUDGET
+    dirty[0] = 1  # $FE
+    dirty[1] = 1  # Stack
+
+    while cycles < cycle_budget and instructions < max_instructions:
+        # Random value required for Snake program
+        memory[0xFE] = random_byte()
+
+        # Code in a device page (e.g. save RAM) is fetched through the bus
+        if io_pages[pc >> 8] or io_pages[((pc + 2) & 0xFFFF) >> 8]:
+            code = HANDOFF
+            break
+        opcode = int(memory[pc])
+        m = mnemonics[opcode]
+        mode = modes[opcode]
+        if m == BRK or m == UNKNOWN:
+            code = HANDOFF
+            break
+
+        # Operand address
+        operand = (pc + 1) & 0xFFFF
+        addr = 0
+        nxt = operand
+        io = 0  # An indirect jump's pointer is in a device page
+        if mode == IMMEDIATE or mode == RELATIVE:
+            addr = operand
+            nxt = operand + 1
+        elif mode == ZERO_PAGE:
+            addr = int(memory[operand])
+            nxt = operand + 1
+        elif mode == ZERO_PAGE_X:
+            addr = (int(memory[operand]) + x) & 0xFF
+            nxt = operand + 1
+        elif mode == ZERO_PAGE_Y:
+            addr = (int(memory[operand]) + y) & 0xFF
+            nxt = operand + 1
+        elif mode == ABSOLUTE:
+            addr = int(memory[operand]) | (int(memory[(operand + 1) & 0xFFFF]) << 8)
+            nxt = operand + 2
+        elif mode == ABSOLUTE_X:
+            addr = ((int(memory[operand]) | (int(memory[(operand + 1) & 0xFFFF]) << 8)) + x) & 0xFFFF
+            nxt = operand + 2
+        elif mode == ABSOLUTE_Y:
+            addr = ((int(memory[operand]) | (int(memory[(operand + 1) & 0xFFFF]) << 8)) + y) & 0xFFFF
+            nxt = operand + 2
+        elif mode == INDIRECT:
+            ptr = int(memory[operand]) | (int(memory[(operand + 1) & 0xFFFF]) << 8)
+            io = io_pages[ptr >> 8]
+            # The pointer's high byte is read without carrying into the next page
+            addr = int(memory[ptr]) | (int(memory[(ptr & 0xFF00) | ((ptr + 1) & 0xFF)]) << 8)
+            nxt = operand + 2
+        elif mode == INDIRECT_X:
+            zp = (int(memory[operand]) + x) & 0xFF
+            addr = int(memory[zp]) | (int(memory[(zp + 1) & 0xFF]) << 8)
+            nxt = operand + 1
+        elif mode == INDIRECT_Y:
+            zp = int(memory[operand])
+            addr = ((int(memory[zp]) | (int(memory[(zp + 1) & 0xFF]) << 8)) + y) & 0xFFFF
+            nxt = operand + 1
+        nxt &= 0xFFFF
+
+        if io or (mode != IMPLIED and mode != ACCUMULATOR and m != JMP and m != JSR and io_pages[addr >> 8]):
+            code = HANDOFF
+            break
+
+        pc = nxt
+        if m == ADC or m == SBC:
+            v = int(memory[addr]) if m == ADC else int(memory[addr]) ^ 0xFF
+            t = a + v + (p & 0x01)
+            p = (p & ~0x41) | (t >> 8) | (((~(a ^ v) & (a ^ t)) & 0x80) >> 1)
+            a = t & 0xFF
+            p = (p & ~0x82) | zn(a)
+        elif m == AND or m == ORA or m == EOR:
+            if m == AND:
+                a &= int(memory[addr])
+            elif m == ORA:
+                a |= int(memory[addr])
+            else:
+                a ^= int(memory[addr])
+            p = (p & ~0x82) | zn(a)
+        elif m == ASL or m == LSR or m == ROL or m == ROR:
+            v = a if mode == ACCUMULATOR else int(memory[addr])
+            c = p & 0x01
+            if m == ASL:
+                p = (p & ~0x01) | (v >> 7)
+                v = (v << 1) & 0xFF
+            elif m == LSR:
+                p = (p & ~0x01) | (v & 0x01)
+                v >>= 1
+            elif m == ROL:
+                p = (p & ~0x01) | (v >> 7)
+                v = ((v << 1) | c) & 0xFF
+            else:
+                p = (p & ~0x01) | (v & 0x01)
+                v = (v >> 1) | (c << 7)
+            p = (p & ~0x82) | zn(v)
+            if mode == ACCUMULATOR:
+                a = v
+            else:
+                memory[addr] = v
+                dirty[addr >> 8] = 1
+        elif mode == RELATIVE:
+            if m == BCC:
+                taken = p & 0x01 == 0
+            elif m == BCS:
+                taken = p & 0x01 != 0
+            elif m == BEQ:
+                taken = p & 0x02 != 0
+            elif m == BNE:
+                taken = p & 0x02 == 0
+            elif m == BMI:
+                taken = p & 0x80 != 0
+            elif m == BPL:
+                taken = p & 0x80 == 0
+            elif m == BVS:
+                taken = p & 0x40 != 0
+            else:
+                taken = p & 0x40 == 0
+            if taken:
+                offset = int(memory[addr])
+                pc = (pc + offset - (offset & 0x80) * 2) & 0xFFFF
+        elif m == BIT:
+            v = int(memory[addr])
+            p = (p & ~0xC2) | (v & 0xC0) | (0x02 if a & v == 0 else 0)
+        elif m == CMP or m == CPX or m == CPY:
+            r = a if m == CMP else x if m == CPX else y
+            v = int(memory[addr])
+            t = (r - v) & 0xFF
+            p = (p & ~0x83) | (0x01 if r >= v else 0) | (0x02 if r == v else 0) | (t & 0x80)
+        elif m == DEC or m == INC:
+            v = (int(memory[addr]) + (1 if m == INC else 0xFF)) & 0xFF
+            memory[addr] = v
+            dirty[addr >> 8] = 1
+            p = (p & ~0x82) | zn(v)
+        elif m == DEX or m == DEY or m == INX or m == INY or m == TAX or m == TAY or m == TSX or m == TXA or m == TYA:
+            if m == DEX:
+                x = (x - 1) & 0xFF
+                v = x
+            elif m == DEY:
+                y = (y - 1) & 0xFF
+                v = y
+            elif m == INX:
+                x = (x + 1) & 0xFF
+                v = x
+            elif m == INY:
+                y = (y + 1) & 0xFF
+                v = y
+            elif m == TAX:
+                x = a
+                v = x
+            elif m == TAY:
+                y = a
+                v = y
+            elif m == TSX:
+                x = sp
+                v = x
+            elif m == TXA:
+                a = x
+                v = a
+            else:
+                a = y
+                v = a
+            p = (p & ~0x82) | zn(v)
+        elif m == JMP:
+            pc = addr
+        elif m == JSR:
+            ret = (pc - 1) & 0xFFFF
+            memory[0x0100 + sp] = ret >> 8
+            sp = (sp - 1) & 0xFF
+            memory[0x0100 + sp] = ret & 0xFF
+            sp = (sp - 1) & 0xFF
+            pc = addr
+        elif m == RTS:
+            sp = (sp + 1) & 0xFF
+            lo = int(memory[0x0100 + sp])
+            sp = (sp + 1) & 0xFF
+            hi = int(memory[0x0100 + sp])
+            pc = (((hi << 8) | lo) + 1) & 0xFFFF
+        elif m == RTI:
+            sp = (sp + 1) & 0xFF
+            p = (int(memory[0x0100 + sp]) & ~0x10) | 0x20
+            sp = (sp + 1) & 0xFF
+            lo = int(memory[0x0100 + sp])
+            sp = (sp + 1) & 0xFF
+            hi = int(memory[0x0100 + sp])
+            pc = (hi << 8) | lo
+        elif m == LDA:
+            a = int(memory[addr])
+            p = (p & ~0x82) | zn(a)
+        elif m == LDX:
+            x = int(memory[addr])
+            p = (p & ~0x82) | zn(x)
+        elif m == LDY:
+            y = int(memory[addr])
+            p = (p & ~0x82) | zn(y)
+        elif m == STA:
+            memory[addr] = a
+            dirty[addr >> 8] = 1
+        elif m == STX:
+            memory[addr] = x
+            dirty[addr >> 8] = 1
+        elif m == STY:
+            memory[addr] = y
+            dirty[addr >> 8] = 1
+        elif m == PHA or m == PHP:
+            memory[0x0100 + sp] = a if m == PHA else p | 0x30
+            sp = (sp - 1) & 0xFF
+        elif m == PLA:
+            sp = (sp + 1) & 0xFF
+            a = int(memory[0x0100 + sp])
+            p = (p & ~0x82) | zn(a)
+        elif m == PLP:
+            sp = (sp + 1) & 0xFF
+            p = (int(memory[0x0100 + sp]) & ~0x10) | 0x20
+        elif m == CLC:
+            p &= ~0x01
+        elif m == CLD:
+            p &= ~0x08
+        elif m == CLI:
+            p &= ~0x04
+        elif m == CLV:
+            p &= ~0x40
+        elif m == SEC:
+            p |= 0x01
+        elif m == SED:
+            p |= 0x08
+        elif m == SEI:
+            p |= 0x04
+        elif m == TXS:
+            sp = x
+        # NOP falls through
+
+        cycles += cycle_table[opcode]
+        instructions += 1
+
+    regs[PC] = pc
+    regs[SP] = sp
+    regs[A] = a
+    regs[X] = x
+    regs[Y] = y
+    regs[P] = p
+    return code, cycles, instructions
+
+
+def seed(value):
+    """Seed the random number generator used inside the compiled loop."""
+    np.random.seed(value)
+
+
+if numba is not None:
+    zn = numba.njit(cache=True)(zn)
+    random_byte = numba.njit(cache=True)(random_byte)
+    # Keep the registers and addresses integral when Numba unifies their types across branches
+    registers = ("pc", "sp", "a", "x", "y", "p", "addr", "nxt", "operand", "v", "t", "io")
+    run = numba.njit(cache=True, locals=dict.fromkeys(registers, numba.int64))(run)
+    seed = numba.njit(cache=True)(seed)
+
+
+class JitBackend:
+    def __init__(self, cpu: "MOS6502") -> None:
+        """Numba compiled interpreter backend. Selected with MOS6502(backend="numba"), it replaces
+        step_program and run_until on that CPU. Instructions which touch a device page, BRK, due
+        scheduler events, and runs with the profiler, access counter or debug printing enabled
+        are handed back to the pure Python core.
+
+        Args:
+            cpu (MOS6502): MOS6502 class to accelerate.
+        """
+        self.cpu = cpu
+        self.regs = np.zeros(6, dtype=np.int64)
+        self.compiled_instructions = 0  # Instructions run by the compiled loop, for Metrics
+        self.dirty = np.zeros(0x100, dtype=np.uint8)  # Written pages, discarded without a StateHash
+        if cpu.lookup_table is LOOKUP_TABLE:
+            self.mnemonics, self.modes, self.cycle_table = DECODE_TABLES
+        else:
+            self.mnemonics, self.modes, self.cycle_table = decode_tables(cpu.lookup_table)
+
+    def python_only(self) -> bool:
+        cpu = self.cpu
+        return (
+            cpu.debug
+            or cpu.profiler is not None
+            or cpu.bus.access_counter is not None
+            or (cpu.debugger is not None and cpu.debugger.watching)
+        )
+
+    def execute(self, cycle_budget: int, max_instructions: int) -> tuple:
+        """Run the compiled loop from the CPU's current state and write the state back."""
+        cpu = self.cpu
+        regs = self.regs
+        regs[:] = (
+            cpu.r_program_counter,
+            cpu.r_stack_pointer,
+            cpu.r_accumulator,
+            cpu.r_index_X,
+            cpu.r_index_Y,
+            cpu.status_to_value(),
+        )
+        dirty = cpu.bus.state_hash.dirty if cpu.bus.state_hash is not None else self.dirty
+        code, cpu.cycles, instructions = run(
+            regs, cpu.bus.wram.memory, cpu.bus.io_mask, dirty, self.mnemonics, self.modes, self.cycle_table,
+            cpu.cycles, cycle_budget, max_instructions,
+        )  # fmt: skip
+        cpu.r_program_counter = np.uint16(regs[PC])
+        cpu.r_stack_pointer = np.uint8(regs[SP])
+        cpu.r_accumulator = np.uint8(regs[A])
+        cpu.r_index_X = np.uint8(regs[X])
+        cpu.r_index_Y = np.uint8(regs[Y])
+        cpu.value_to_status(int(regs[P]))
+        cpu.instructions += instructions
+        self.compiled_instructions += instructions
+        return code, instructions
+
+    def step(self) -> None:
+        """Single step, with the same behaviour as MOS6502.step_program."""
+        cpu = self.cpu
+        if self.python_only() or cpu.cycles >= cpu.scheduler.next_event:
+            type(cpu).step_program(cpu)
+            return
+        code, _ = self.execute(NO_BUDGET, 1)
+        if code == HANDOFF:
+            type(cpu).step_program(cpu)
+
+    def run_until(self, cycle: int) -> int:
+        """Compiled equivalent of MOS6502.run_until."""
+        cpu = self.cpu
+        if self.python_only():
+            return type(cpu).run_until(cpu, cycle)
+
+        instructions = 0
+        while cpu.cycles < cycle and not cpu.r_status["flag_B0"]:
+            if cpu.cycles >= cpu.scheduler.next_event:
+                type(cpu).step_program(cpu)  # Delivers the due events
+                instructions += 1
+                continue
+            code, n = self.execute(min(cycle, cpu.scheduler.next_event), NO_BUDGET)
+            instructions += n
+            if code == HANDOFF:
+                type(cpu).step_program(cpu)
+                instructions += 1
+        return instructions
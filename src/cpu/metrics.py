@@ -0,0 +1,137 @@
+import json
+import os
+import time
+
+NTSC_CLOCK = 1_789_773  # 2A03 CPU cycles per second
+
+
+class Metrics:
+    def __init__(self, cpu: "MOS6502", clock: int = NTSC_CLOCK, prefix: str = "davenes_") -> None:
+        """Registry of counters and gauges describing how a session is running. Installed on a
+        MOS6502 by MOS6502.enable_metrics.
+
+        Nothing is measured per instruction beyond the CPU's own instruction and cycle counts.
+        Whoever drives the frames (run_program, SnakeEnv, the serve command) calls sample() once
+        per frame, which reads those counts and the monotonic clock, updates the rate gauges over
+        the time since the previous sample, and evaluates any registered sources.
+
+        Built in metrics:
+            instructions_total, cycles_total, frames_total, dropped_frames_total (counters)
+            instructions_per_second, cycles_per_second, frames_per_second, speed_ratio (gauges),
+            the speed ratio being emulated time over wall clock time.
+            jit_hit_ratio (gauge, numba backend only): share of instructions run by the compiled loop.
+
+        Args:
+            cpu (MOS6502): CPU being measured.
+            clock (int, optional): CPU cycles per emulated second. Defaults to NTSC_CLOCK.
+            prefix (str, optional): Prefix for exported metric names. Defaults to "davenes_".
+        """
+        self.cpu = cpu
+        self.clock = clock
+        self.prefix = prefix
+        self.counters = {}
+        self.gauges = {}
+        self.help = {}
+        self.sources = {}  # {name: callable returning the current value}
+
+        self.counter("instructions_total", "Instructions executed")
+        self.counter("cycles_total", "CPU cycles executed")
+        self.counter("frames_total", "Frames emulated")
+        self.counter("dropped_frames_total", "Frames emulated but not rendered")
+        self.gauge("instructions_per_second", "Instructions per wall clock second")
+        self.gauge("cycles_per_second", "CPU cycles per wall clock second")
+        self.gauge("frames_per_second", "Frames per wall clock second")
+        self.gauge("speed_ratio", "Emulated time over wall clock time")
+        if cpu.backend == "numba":
+            jit = cpu.jit
+            self.gauge(
+                "jit_hit_ratio",
+                "Share of instructions run by the compiled loop",
+                lambda: jit.compiled_instructions / max(cpu.instructions, 1),
+            )
+
+        self.last_time = time.monotonic()
+        self.last_instructions = cpu.instructions
+        self.last_cycles = cpu.cycles
+        self.last_frames = 0
+
+    def counter(self, name: str, help: str = "", source=None) -> None:
+        """Register a monotonically increasing counter, optionally read from `source()` on sample."""
+        self.counters.setdefault(name, 0)
+        self.help[name] = help
+        if source is not None:
+            self.sources[name] = source
+
+    def gauge(self, name: str, help: str = "", source=None) -> None:
+        """Register a gauge, optionally read from `source()` on sample."""
+        self.gauges.setdefault(name, 0.0)
+        self.help[name] = help
+        if source is not None:
+            self.sources[name] = source
+
+    def inc(self, name: str, n: int = 1) -> None:
+        self.counters[name] += n
+
+    def set(self, name: str, value: float) -> None:
+        self.gauges[name] = value
+
+    def sample(self, frames: int = 1, dropped: int = 0) -> None:
+        """Update the metrics at the end of a frame.
+
+        Args:
+            frames (int, optional): Frames emulated since the last sample. Defaults to 1.
+            dropped (int, optional): Of which were not rendered. Defaults to 0.
+        """
+        cpu = self.cpu
+        counters, gauges = self.counters, self.gauges
+        counters["instructions_total"] = cpu.instructions
+        counters["cycles_total"] = cpu.cycles
+        counters["frames_total"] += frames
+        counters["dropped_frames_total"] += dropped
+
+        now = time.monotonic()
+        elapsed = now - self.last_time
+        if elapsed > 0:
+            cycles = cpu.cycles - self.last_cycles
+            gauges["instructions_per_second"] = (cpu.instructions - self.last_instructions) / elapsed
+            gauges["cycles_per_second"] = cycles / elapsed
+            gauges["frames_per_second"] = (counters["frames_total"] - self.last_frames) / elapsed
+            gauges["speed_ratio"] = gauges["cycles_per_second"] / self.clock
+        self.last_time = now
+        self.last_instructions = cpu.instructions
+        self.last_cycles = cpu.cycles
+        self.last_frames = counters["frames_total"]
+
+        for name, source in self.sources.items():
+            if name in counters:
+                counters[name] = source()
+            else:
+                gauges[name] = source()
+
+    def as_dict(self) -> dict:
+        """Current values of every metric, keyed by name (without the prefix)."""
+        return {**self.counters, **self.gauges}
+
+    def write_jsonl(self, filename: str) -> None:
+        """Append the current values, with a Unix timestamp, as one JSON line."""
+        with open(filename, "a") as f:
+            f.write(json.dumps({"time": time.time(), **self.as_dict()}) + "\n")
+
+    def prometheus(self) -> str:
+        """The metrics in the Prometheus text exposition format."""
+        lines = []
+        for kind, metrics in (("counter", self.counters), ("gauge", self.gauges)):
+            for name, value in metrics.items():
+                lines.append(f"# HELP {self.prefix}{name} {self.help[name]}")
+                lines.append(f"# TYPE {self.prefix}{name} {kind}")
+                lines.append(f"{self.prefix}{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, filename: str) -> None:
+        """Write the metrics for a node_exporter style textfile collector. The file is replaced
+        atomically so a scrape never reads a partial file.
+        """
+        temporary = f"{filename}.{os.getpid()}.tmp"
+        with open(temporary, "w") as f:
+            f.write(self.prometheus())
+        os.replace(temporary, filename)
@@ -1,3 +1,23 @@
 from .cpu import AddressingMode
-from .opcodes import *
+from .opcodes import MOS6502_OpCodes
 
+# Decode table shared by every MOS6502 instance (and its clones), built once at import:
+# {opcode: (function, cycles, AddressingMode, mnemonic)}
+LOOKUP_TABLE = MOS6502_OpCodes.decode_table()
+
+# Instruction length in bytes for each addressing mode (None is implied)
+INSTRUCTION_SIZES = {
+    None: 1,
+    AddressingMode.ACCUMULATOR: 1,
+    AddressingMode.IMMEDIATE: 2,
+    AddressingMode.ZERO_PAGE: 2,
+    AddressingMode.ZERO_PAGE_X: 2,
+    AddressingMode.ZERO_PAGE_Y: 2,
+    AddressingMode.INDIRECT_X: 2,
+    AddressingMode.INDIRECT_Y: 2,
+    AddressingMode.RELATIVE: 2,
+    AddressingMode.ABSOLUTE: 3,
+    AddressingMode.ABSOLUTE_X: 3,
+    AddressingMode.ABSOLUTE_Y: 3,
+    AddressingMode.INDIRECT: 3,
+}
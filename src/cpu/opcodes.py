@@ -2,187 +2,209 @@ from .cpu import AddressingMode
 #from .cpu import MOS6502
 import numpy as np
 
+from . import alu
+
 class MOS6502_OpCodes():
     def __init__(self, cpu: 'MOS6502') -> None:
         """Class containing the MOS6502 56 operating codes. Dependency injection
         used to attach to the MOS6502 CPU class.
-        The lookup_table attribute is used to pull the relevant OpCode based on the input key.
+        The decode table used to pull the relevant OpCode based on the input key is shared by all
+        instances, see decode_table.
         Methods are not documented purposefully.
 
         Args:
             cpu (MOS6502): MOS6502 class dependent on operating codes.
         """
         self.cpu = cpu
-        self.lookup_table = {
-            0x69: [self.ADC, 2, AddressingMode.IMMEDIATE, "ADC", ],
-            0x65: [self.ADC, 3, AddressingMode.ZERO_PAGE, "ADC"],
-            0x75: [self.ADC, 4, AddressingMode.ZERO_PAGE_X, "ADC"],
-            0x6D: [self.ADC, 4, AddressingMode.ABSOLUTE, "ADC"],
-            0x7D: [self.ADC, 4, AddressingMode.ABSOLUTE_X, "ADC"],
-            0x79: [self.ADC, 4, AddressingMode.ABSOLUTE_Y, "ADC"],
-            0x61: [self.ADC, 6, AddressingMode.INDIRECT_X, "ADC"],
-            0x71: [self.ADC, 5, AddressingMode.INDIRECT_Y, "ADC"],
-            0x29: [self.AND, 2, AddressingMode.IMMEDIATE, "AND"],
-            0x25: [self.AND, 3, AddressingMode.ZERO_PAGE, "AND"],
-            0x35: [self.AND, 4, AddressingMode.ZERO_PAGE_X, "AND"],
-            0x2D: [self.AND, 4, AddressingMode.ABSOLUTE, "AND"],
-            0x3D: [self.AND, 4, AddressingMode.ABSOLUTE_X, "AND"],
-            0x39: [self.AND, 4, AddressingMode.ABSOLUTE_Y, "AND"],
-            0x21: [self.AND, 6, AddressingMode.INDIRECT_X, "AND"],
-            0x31: [self.AND, 5, AddressingMode.INDIRECT_Y, "AND"],
-            0x0A: [self.ASL, 2, AddressingMode.ACCUMULATOR, "ASL"],
-            0x06: [self.ASL, 5, AddressingMode.ZERO_PAGE, "ASL"],
-            0x16: [self.ASL, 6, AddressingMode.ZERO_PAGE_X, "ASL"],
-            0x0E: [self.ASL, 6, AddressingMode.ABSOLUTE, "ASL"],
-            0x1E: [self.ASL, 7, AddressingMode.ABSOLUTE_X, "ASL"],
-            0x90: [self.BCC, 2, AddressingMode.RELATIVE, "BCC"],
-            0xB0: [self.BCS, 2, AddressingMode.RELATIVE, "BCS"],
-            0xF0: [self.BEQ, 2, AddressingMode.RELATIVE, "BEQ"],
-            0x24: [self.BIT, 3, AddressingMode.ZERO_PAGE, "BIT"],
-            0x2C: [self.BIT, 4, AddressingMode.ABSOLUTE, "BIT"],
-            0x30: [self.BMI, 2, AddressingMode.RELATIVE, "BMI"],
-            0xD0: [self.BNE, 2, AddressingMode.RELATIVE, "BNE"],
-            0x10: [self.BPL, 2, AddressingMode.RELATIVE, "BPL"],
-            0x00: [self.BRK, 7, None, "BRK"],
-            0x50: [self.BVC, 2, AddressingMode.RELATIVE, "BVC"],
-            0x70: [self.BVS, 2, AddressingMode.RELATIVE, "BVS"],
-            0x18: [self.CLC, 2, None, "CLC"],
-            0xD8: [self.CLD, 2, None, "CLD"],
-            0x58: [self.CLI, 2, None, "CLI"],
-            0xB8: [self.CLV, 2, None, "CLV"],
-            0xC9: [self.CMP, 2, AddressingMode.IMMEDIATE, "CMP"],
-            0xC5: [self.CMP, 3, AddressingMode.ZERO_PAGE, "CMP"],
-            0xD5: [self.CMP, 4, AddressingMode.ZERO_PAGE_X, "CMP"],
-            0xCD: [self.CMP, 4, AddressingMode.ABSOLUTE, "CMP"],
-            0xDD: [self.CMP, 4, AddressingMode.ABSOLUTE_X, "CMP"],
-            0xD9: [self.CMP, 4, AddressingMode.ABSOLUTE_Y, "CMP"],
-            0xC1: [self.CMP, 6, AddressingMode.INDIRECT_X, "CMP"],
-            0xD1: [self.CMP, 5, AddressingMode.INDIRECT_Y, "CMP"],
-            0xE0: [self.CPX, 2, AddressingMode.IMMEDIATE, "CPX"],
-            0xE4: [self.CPX, 3, AddressingMode.ZERO_PAGE, "CPX"],
-            0xEC: [self.CPX, 4, AddressingMode.ABSOLUTE, "CPX"],
-            0xC0: [self.CPY, 2, AddressingMode.IMMEDIATE, "CPY"],
-            0xC4: [self.CPY, 3, AddressingMode.ZERO_PAGE, "CPY"],
-            0xCC: [self.CPY, 4, AddressingMode.ABSOLUTE, "CPY"],
-            0xC6: [self.DEC, 5, AddressingMode.ZERO_PAGE, "DEC"],
-            0xD6: [self.DEC, 6, AddressingMode.ZERO_PAGE_X, "DEC"],
-            0xCE: [self.DEC, 6, AddressingMode.ABSOLUTE, "DEC"],
-            0xDE: [self.DEC, 7, AddressingMode.ABSOLUTE_X, "DEC"],
-            0xCA: [self.DEX, 2, None, "DEX"],
-            0x88: [self.DEY, 2, None, "DEY"],
-            0x49: [self.EOR, 2, AddressingMode.IMMEDIATE, "EOR"],
-            0x45: [self.EOR, 3, AddressingMode.ZERO_PAGE, "EOR"],
-            0x55: [self.EOR, 4, AddressingMode.ZERO_PAGE_X, "EOR"],
-            0x4D: [self.EOR, 4, AddressingMode.ABSOLUTE, "EOR"],
-            0x5D: [self.EOR, 4, AddressingMode.ABSOLUTE_X, "EOR"],
-            0x59: [self.EOR, 4, AddressingMode.ABSOLUTE_Y, "EOR"],
-            0x41: [self.EOR, 6, AddressingMode.INDIRECT_X, "EOR"],
-            0x51: [self.EOR, 5, AddressingMode.INDIRECT_Y, "EOR"],
-            0xE6: [self.INC, 5, AddressingMode.ZERO_PAGE, "INC"],
-            0xF6: [self.INC, 6, AddressingMode.ZERO_PAGE_X, "INC"],
-            0xEE: [self.INC, 6, AddressingMode.ABSOLUTE, "INC"],
-            0xFE: [self.INC, 7, AddressingMode.ABSOLUTE_X, "INC"],
-            0xE8: [self.INX, 2, None, "INX"],
-            0xC8: [self.INY, 2, None, "INY"],
-            0x4C: [self.JMP, 3, AddressingMode.ABSOLUTE, "JMP"],
-            0x6C: [self.JMP, 3, AddressingMode.INDIRECT, "JMP"],
-            0x20: [self.JSR, 6, AddressingMode.ABSOLUTE, "JSR"],
-            0xA9: [self.LDA, 2, AddressingMode.IMMEDIATE, "LDA"],
-            0xA5: [self.LDA, 3, AddressingMode.ZERO_PAGE, "LDA"],
-            0xB5: [self.LDA, 4, AddressingMode.ZERO_PAGE_X, "LDA"],
-            0xAD: [self.LDA, 4, AddressingMode.ABSOLUTE, "LDA"],
-            0xBD: [self.LDA, 4, AddressingMode.ABSOLUTE_X, "LDA"],
-            0xB9: [self.LDA, 4, AddressingMode.ABSOLUTE_Y, "LDA"],
-            0xA1: [self.LDA, 6, AddressingMode.INDIRECT_X, "LDA"],
-            0xB1: [self.LDA, 5, AddressingMode.INDIRECT_Y, "LDA"],
-            0xA2: [self.LDX, 2, AddressingMode.IMMEDIATE, "LDX"],
-            0xA6: [self.LDX, 3, AddressingMode.ZERO_PAGE, "LDX"],
-            0xB6: [self.LDX, 4, AddressingMode.ZERO_PAGE_Y, "LDX"],
-            0xAE: [self.LDX, 4, AddressingMode.ABSOLUTE, "LDX"],
-            0xBE: [self.LDX, 4, AddressingMode.ABSOLUTE_Y, "LDX"],
-            0xA0: [self.LDY, 2, AddressingMode.IMMEDIATE, "LDY"],
-            0xA4: [self.LDY, 3, AddressingMode.ZERO_PAGE, "LDY"],
-            0xB4: [self.LDY, 4, AddressingMode.ZERO_PAGE_X, "LDY"],
-            0xAC: [self.LDY, 4, AddressingMode.ABSOLUTE, "LDY"],
-            0xBC: [self.LDY, 4, AddressingMode.ABSOLUTE_X, "LDY"],
-            0x4A: [self.LSR_accumulator, 2, AddressingMode.ACCUMULATOR, "LSR"],
-            0x46: [self.LSR, 5, AddressingMode.ZERO_PAGE, "LSR"],
-            0x56: [self.LSR, 6, AddressingMode.ZERO_PAGE_X, "LSR"],
-            0x4E: [self.LSR, 6, AddressingMode.ABSOLUTE, "LSR"],
-            0x5E: [self.LSR, 7, AddressingMode.ABSOLUTE_X, "LSR"],
-            0xEA: [self.NOP, 2, None, "NOP"],
-            0x09: [self.ORA, 2, AddressingMode.IMMEDIATE, "ORA"],
-            0x05: [self.ORA, 3, AddressingMode.ZERO_PAGE, "ORA"],
-            0x15: [self.ORA, 4, AddressingMode.ZERO_PAGE_X, "ORA"],
-            0x0D: [self.ORA, 4, AddressingMode.ABSOLUTE, "ORA"],
-            0x1D: [self.ORA, 4, AddressingMode.ABSOLUTE_X, "ORA"],
-            0x19: [self.ORA, 4, AddressingMode.ABSOLUTE_Y, "ORA"],
-            0x01: [self.ORA, 6, AddressingMode.INDIRECT_X, "ORA"],
-            0x11: [self.ORA, 5, AddressingMode.INDIRECT_Y, "ORA"],
-            0x48: [self.PHA, 3, None, "PHA"],
-            0x08: [self.PHP, 3, None, "PHP"],
-            0x68: [self.PLA, 4, None, "PLA"],
-            0x28: [self.PLP, 4, None, "PLP"],
-            0x2A: [self.ROL, 2, AddressingMode.ACCUMULATOR, "ROL"],
-            0x26: [self.ROL, 5, AddressingMode.ZERO_PAGE, "ROL"],
-            0x36: [self.ROL, 6, AddressingMode.ZERO_PAGE_X, "ROL"],
-            0x2E: [self.ROL, 6, AddressingMode.ABSOLUTE, "ROL"],
-            0x3E: [self.ROL, 7, AddressingMode.ABSOLUTE_X, "ROL"],
-            0x6A: [self.ROR, 2, AddressingMode.ACCUMULATOR, "ROR"],
-            0x66: [self.ROR, 5, AddressingMode.ZERO_PAGE, "ROR"],
-            0x76: [self.ROR, 6, AddressingMode.ZERO_PAGE_X, "ROR"],
-            0x6E: [self.ROR, 6, AddressingMode.ABSOLUTE, "ROR"],
-            0x7E: [self.ROR, 7, AddressingMode.ABSOLUTE_X, "ROR"],
-            0x40: [self.RTI, 6, None, "RTI"],
-            0x60: [self.RTS, 6, None, "RTS"],
-            0xE9: [self.SBC, 2, AddressingMode.IMMEDIATE, "SBC"],
-            0xE5: [self.SBC, 3, AddressingMode.ZERO_PAGE, "SBC"],
-            0xF5: [self.SBC, 4, AddressingMode.ZERO_PAGE_X, "SBC"],
-            0xED: [self.SBC, 4, AddressingMode.ABSOLUTE, "SBC"],
-            0xFD: [self.SBC, 4, AddressingMode.ABSOLUTE_X, "SBC"],
-            0xF9: [self.SBC, 4, AddressingMode.ABSOLUTE_Y, "SBC"],
-            0xE1: [self.SBC, 6, AddressingMode.INDIRECT_X, "SBC"],
-            0xF1: [self.SBC, 5, AddressingMode.INDIRECT_Y, "SBC"],
-            0x38: [self.SEC, 2, None, "SEC"],
-            0xF8: [self.SED, 2, None, "SED"],
-            0x78: [self.SEI, 2, None, "SEI"],
-            0x85: [self.STA, 3, AddressingMode.ZERO_PAGE, "STA"],
-            0x95: [self.STA, 4, AddressingMode.ZERO_PAGE_X, "STA"],
-            0x8D: [self.STA, 4, AddressingMode.ABSOLUTE, "STA"],
-            0x9D: [self.STA, 5, AddressingMode.ABSOLUTE_X, "STA"],
-            0x99: [self.STA, 5, AddressingMode.ABSOLUTE_Y, "STA"],
-            0x81: [self.STA, 6, AddressingMode.INDIRECT_X, "STA"],
-            0x91: [self.STA, 6, AddressingMode.INDIRECT_Y, "STA"],
-            0x86: [self.STX, 3, AddressingMode.ZERO_PAGE, "STX"],
-            0x96: [self.STX, 4, AddressingMode.ZERO_PAGE_Y, "STX"],
-            0x8E: [self.STX, 4, AddressingMode.ABSOLUTE, "STX"],
-            0x84: [self.STY, 3, AddressingMode.ZERO_PAGE, "STY"],
-            0x94: [self.STY, 4, AddressingMode.ZERO_PAGE_X, "STY"],
-            0x8C: [self.STY, 4, AddressingMode.ABSOLUTE, "STY"],
-            0xAA: [self.TAX, 2, None, "TAX"],
-            0xA8: [self.TAY, 2, None, "TAY"],
-            0xBA: [self.TSX, 2, None, "TSX"],
-            0x8A: [self.TXA, 2, None, "TXA"],
-            0x9A: [self.TXS, 2, None, "TXS"],
-            0x98: [self.TYA, 2, None, "TYA"],
+
+    @classmethod
+    def decode_table(cls) -> dict:
+        """Build the opcode decode table. The functions are unbound, so one table serves every CPU
+        and is built once, as opcode_table.LOOKUP_TABLE. Entries are called as
+        function(cpu.opcodes, mode).
+
+        Returns:
+            dict: {opcode: (function, cycles, AddressingMode, mnemonic)}
+        """
+        table = {
+            0x69: [cls.ADC, 2, AddressingMode.IMMEDIATE, "ADC", ],
+            0x65: [cls.ADC, 3, AddressingMode.ZERO_PAGE, "ADC"],
+            0x75: [cls.ADC, 4, AddressingMode.ZERO_PAGE_X, "ADC"],
+            0x6D: [cls.ADC, 4, AddressingMode.ABSOLUTE, "ADC"],
+            0x7D: [cls.ADC, 4, AddressingMode.ABSOLUTE_X, "ADC"],
+            0x79: [cls.ADC, 4, AddressingMode.ABSOLUTE_Y, "ADC"],
+            0x61: [cls.ADC, 6, AddressingMode.INDIRECT_X, "ADC"],
+            0x71: [cls.ADC, 5, AddressingMode.INDIRECT_Y, "ADC"],
+            0x29: [cls.AND, 2, AddressingMode.IMMEDIATE, "AND"],
+            0x25: [cls.AND, 3, AddressingMode.ZERO_PAGE, "AND"],
+            0x35: [cls.AND, 4, AddressingMode.ZERO_PAGE_X, "AND"],
+            0x2D: [cls.AND, 4, AddressingMode.ABSOLUTE, "AND"],
+            0x3D: [cls.AND, 4, AddressingMode.ABSOLUTE_X, "AND"],
+            0x39: [cls.AND, 4, AddressingMode.ABSOLUTE_Y, "AND"],
+            0x21: [cls.AND, 6, AddressingMode.INDIRECT_X, "AND"],
+            0x31: [cls.AND, 5, AddressingMode.INDIRECT_Y, "AND"],
+            0x0A: [cls.ASL, 2, AddressingMode.ACCUMULATOR, "ASL"],
+            0x06: [cls.ASL, 5, AddressingMode.ZERO_PAGE, "ASL"],
+            0x16: [cls.ASL, 6, AddressingMode.ZERO_PAGE_X, "ASL"],
+            0x0E: [cls.ASL, 6, AddressingMode.ABSOLUTE, "ASL"],
+            0x1E: [cls.ASL, 7, AddressingMode.ABSOLUTE_X, "ASL"],
+            0x90: [cls.BCC, 2, AddressingMode.RELATIVE, "BCC"],
+            0xB0: [cls.BCS, 2, AddressingMode.RELATIVE, "BCS"],
+            0xF0: [cls.BEQ, 2, AddressingMode.RELATIVE, "BEQ"],
+            0x24: [cls.BIT, 3, AddressingMode.ZERO_PAGE, "BIT"],
+            0x2C: [cls.BIT, 4, AddressingMode.ABSOLUTE, "BIT"],
+            0x30: [cls.BMI, 2, AddressingMode.RELATIVE, "BMI"],
+            0xD0: [cls.BNE, 2, AddressingMode.RELATIVE, "BNE"],
+            0x10: [cls.BPL, 2, AddressingMode.RELATIVE, "BPL"],
+            0x00: [cls.BRK, 7, None, "BRK"],
+            0x50: [cls.BVC, 2, AddressingMode.RELATIVE, "BVC"],
+            0x70: [cls.BVS, 2, AddressingMode.RELATIVE, "BVS"],
+            0x18: [cls.CLC, 2, None, "CLC"],
+            0xD8: [cls.CLD, 2, None, "CLD"],
+            0x58: [cls.CLI, 2, None, "CLI"],
+            0xB8: [cls.CLV, 2, None, "CLV"],
+            0xC9: [cls.CMP, 2, AddressingMode.IMMEDIATE, "CMP"],
+            0xC5: [cls.CMP, 3, AddressingMode.ZERO_PAGE, "CMP"],
+            0xD5: [cls.CMP, 4, AddressingMode.ZERO_PAGE_X, "CMP"],
+            0xCD: [cls.CMP, 4, AddressingMode.ABSOLUTE, "CMP"],
+            0xDD: [cls.CMP, 4, AddressingMode.ABSOLUTE_X, "CMP"],
+            0xD9: [cls.CMP, 4, AddressingMode.ABSOLUTE_Y, "CMP"],
+            0xC1: [cls.CMP, 6, AddressingMode.INDIRECT_X, "CMP"],
+            0xD1: [cls.CMP, 5, AddressingMode.INDIRECT_Y, "CMP"],
+            0xE0: [cls.CPX, 2, AddressingMode.IMMEDIATE, "CPX"],
+            0xE4: [cls.CPX, 3, AddressingMode.ZERO_PAGE, "CPX"],
+            0xEC: [cls.CPX, 4, AddressingMode.ABSOLUTE, "CPX"],
+            0xC0: [cls.CPY, 2, AddressingMode.IMMEDIATE, "CPY"],
+            0xC4: [cls.CPY, 3, AddressingMode.ZERO_PAGE, "CPY"],
+            0xCC: [cls.CPY, 4, AddressingMode.ABSOLUTE, "CPY"],
+            0xC6: [cls.DEC, 5, AddressingMode.ZERO_PAGE, "DEC"],
+            0xD6: [cls.DEC, 6, AddressingMode.ZERO_PAGE_X, "DEC"],
+            0xCE: [cls.DEC, 6, AddressingMode.ABSOLUTE, "DEC"],
+            0xDE: [cls.DEC, 7, AddressingMode.ABSOLUTE_X, "DEC"],
+            0xCA: [cls.DEX, 2, None, "DEX"],
+            0x88: [cls.DEY, 2, None, "DEY"],
+            0x49: [cls.EOR, 2, AddressingMode.IMMEDIATE, "EOR"],
+            0x45: [cls.EOR, 3, AddressingMode.ZERO_PAGE, "EOR"],
+            0x55: [cls.EOR, 4, AddressingMode.ZERO_PAGE_X, "EOR"],
+            0x4D: [cls.EOR, 4, AddressingMode.ABSOLUTE, "EOR"],
+            0x5D: [cls.EOR, 4, AddressingMode.ABSOLUTE_X, "EOR"],
+            0x59: [cls.EOR, 4, AddressingMode.ABSOLUTE_Y, "EOR"],
+            0x41: [cls.EOR, 6, AddressingMode.INDIRECT_X, "EOR"],
+            0x51: [cls.EOR, 5, AddressingMode.INDIRECT_Y, "EOR"],
+            0xE6: [cls.INC, 5, AddressingMode.ZERO_PAGE, "INC"],
+            0xF6: [cls.INC, 6, AddressingMode.ZERO_PAGE_X, "INC"],
+            0xEE: [cls.INC, 6, AddressingMode.ABSOLUTE, "INC"],
+            0xFE: [cls.INC, 7, AddressingMode.ABSOLUTE_X, "INC"],
+            0xE8: [cls.INX, 2, None, "INX"],
+            0xC8: [cls.INY, 2, None, "INY"],
+            0x4C: [cls.JMP, 3, AddressingMode.ABSOLUTE, "JMP"],
+            0x6C: [cls.JMP, 3, AddressingMode.INDIRECT, "JMP"],
+            0x20: [cls.JSR, 6, AddressingMode.ABSOLUTE, "JSR"],
+            0xA9: [cls.LDA, 2, AddressingMode.IMMEDIATE, "LDA"],
+            0xA5: [cls.LDA, 3, AddressingMode.ZERO_PAGE, "LDA"],
+            0xB5: [cls.LDA, 4, AddressingMode.ZERO_PAGE_X, "LDA"],
+            0xAD: [cls.LDA, 4, AddressingMode.ABSOLUTE, "LDA"],
+            0xBD: [cls.LDA, 4, AddressingMode.ABSOLUTE_X, "LDA"],
+            0xB9: [cls.LDA, 4, AddressingMode.ABSOLUTE_Y, "LDA"],
+            0xA1: [cls.LDA, 6, AddressingMode.INDIRECT_X, "LDA"],
+            0xB1: [cls.LDA, 5, AddressingMode.INDIRECT_Y, "LDA"],
+            0xA2: [cls.LDX, 2, AddressingMode.IMMEDIATE, "LDX"],
+            0xA6: [cls.LDX, 3, AddressingMode.ZERO_PAGE, "LDX"],
+            0xB6: [cls.LDX, 4, AddressingMode.ZERO_PAGE_Y, "LDX"],
+            0xAE: [cls.LDX, 4, AddressingMode.ABSOLUTE, "LDX"],
+            0xBE: [cls.LDX, 4, AddressingMode.ABSOLUTE_Y, "LDX"],
+            0xA0: [cls.LDY, 2, AddressingMode.IMMEDIATE, "LDY"],
+            0xA4: [cls.LDY, 3, AddressingMode.ZERO_PAGE, "LDY"],
+            0xB4: [cls.LDY, 4, AddressingMode.ZERO_PAGE_X, "LDY"],
+            0xAC: [cls.LDY, 4, AddressingMode.ABSOLUTE, "LDY"],
+            0xBC: [cls.LDY, 4, AddressingMode.ABSOLUTE_X, "LDY"],
+            0x4A: [cls.LSR_accumulator, 2, AddressingMode.ACCUMULATOR, "LSR"],
+            0x46: [cls.LSR, 5, AddressingMode.ZERO_PAGE, "LSR"],
+            0x56: [cls.LSR, 6, AddressingMode.ZERO_PAGE_X, "LSR"],
+            0x4E: [cls.LSR, 6, AddressingMode.ABSOLUTE, "LSR"],
+            0x5E: [cls.LSR, 7, AddressingMode.ABSOLUTE_X, "LSR"],
+            0xEA: [cls.NOP, 2, None, "NOP"],
+            0x09: [cls.ORA, 2, AddressingMode.IMMEDIATE, "ORA"],
+            0x05: [cls.ORA, 3, AddressingMode.ZERO_PAGE, "ORA"],
+            0x15: [cls.ORA, 4, AddressingMode.ZERO_PAGE_X, "ORA"],
+            0x0D: [cls.ORA, 4, AddressingMode.ABSOLUTE, "ORA"],
+            0x1D: [cls.ORA, 4, AddressingMode.ABSOLUTE_X, "ORA"],
+            0x19: [cls.ORA, 4, AddressingMode.ABSOLUTE_Y, "ORA"],
+            0x01: [cls.ORA, 6, AddressingMode.INDIRECT_X, "ORA"],
+            0x11: [cls.ORA, 5, AddressingMode.INDIRECT_Y, "ORA"],
+            0x48: [cls.PHA, 3, None, "PHA"],
+            0x08: [cls.PHP, 3, None, "PHP"],
+            0x68: [cls.PLA, 4, None, "PLA"],
+            0x28: [cls.PLP, 4, None, "PLP"],
+            0x2A: [cls.ROL, 2, AddressingMode.ACCUMULATOR, "ROL"],
+            0x26: [cls.ROL, 5, AddressingMode.ZERO_PAGE, "ROL"],
+            0x36: [cls.ROL, 6, AddressingMode.ZERO_PAGE_X, "ROL"],
+            0x2E: [cls.ROL, 6, AddressingMode.ABSOLUTE, "ROL"],
+            0x3E: [cls.ROL, 7, AddressingMode.ABSOLUTE_X, "ROL"],
+            0x6A: [cls.ROR, 2, AddressingMode.ACCUMULATOR, "ROR"],
+            0x66: [cls.ROR, 5, AddressingMode.ZERO_PAGE, "ROR"],
+            0x76: [cls.ROR, 6, AddressingMode.ZERO_PAGE_X, "ROR"],
+            0x6E: [cls.ROR, 6, AddressingMode.ABSOLUTE, "ROR"],
+            0x7E: [cls.ROR, 7, AddressingMode.ABSOLUTE_X, "ROR"],
+            0x40: [cls.RTI, 6, None, "RTI"],
+            0x60: [cls.RTS, 6, None, "RTS"],
+            0xE9: [cls.SBC, 2, AddressingMode.IMMEDIATE, "SBC"],
+            0xE5: [cls.SBC, 3, AddressingMode.ZERO_PAGE, "SBC"],
+            0xF5: [cls.SBC, 4, AddressingMode.ZERO_PAGE_X, "SBC"],
+            0xED: [cls.SBC, 4, AddressingMode.ABSOLUTE, "SBC"],
+            0xFD: [cls.SBC, 4, AddressingMode.ABSOLUTE_X, "SBC"],
+            0xF9: [cls.SBC, 4, AddressingMode.ABSOLUTE_Y, "SBC"],
+            0xE1: [cls.SBC, 6, AddressingMode.INDIRECT_X, "SBC"],
+            0xF1: [cls.SBC, 5, AddressingMode.INDIRECT_Y, "SBC"],
+            0x38: [cls.SEC, 2, None, "SEC"],
+            0xF8: [cls.SED, 2, None, "SED"],
+            0x78: [cls.SEI, 2, None, "SEI"],
+            0x85: [cls.STA, 3, AddressingMode.ZERO_PAGE, "STA"],
+            0x95: [cls.STA, 4, AddressingMode.ZERO_PAGE_X, "STA"],
+            0x8D: [cls.STA, 4, AddressingMode.ABSOLUTE, "STA"],
+            0x9D: [cls.STA, 5, AddressingMode.ABSOLUTE_X, "STA"],
+            0x99: [cls.STA, 5, AddressingMode.ABSOLUTE_Y, "STA"],
+            0x81: [cls.STA, 6, AddressingMode.INDIRECT_X, "STA"],
+            0x91: [cls.STA, 6, AddressingMode.INDIRECT_Y, "STA"],
+            0x86: [cls.STX, 3, AddressingMode.ZERO_PAGE, "STX"],
+            0x96: [cls.STX, 4, AddressingMode.ZERO_PAGE_Y, "STX"],
+            0x8E: [cls.STX, 4, AddressingMode.ABSOLUTE, "STX"],
+            0x84: [cls.STY, 3, AddressingMode.ZERO_PAGE, "STY"],
+            0x94: [cls.STY, 4, AddressingMode.ZERO_PAGE_X, "STY"],
+            0x8C: [cls.STY, 4, AddressingMode.ABSOLUTE, "STY"],
+            0xAA: [cls.TAX, 2, None, "TAX"],
+            0xA8: [cls.TAY, 2, None, "TAY"],
+            0xBA: [cls.TSX, 2, None, "TSX"],
+            0x8A: [cls.TXA, 2, None, "TXA"],
+            0x9A: [cls.TXS, 2, None, "TXS"],
+            0x98: [cls.TYA, 2, None, "TYA"],
         }
+        return {opcode: tuple(entry) for opcode, entry in table.items()}
+
+    def shift_flags(self, entry: int) -> None:
+        """Set C, Z and N from an alu table entry."""
+        status = self.cpu.r_status
+        status["flag_C"] = bool(entry & alu.C)
+        status["flag_Z"] = bool(entry & alu.Z)
+        status["flag_N"] = bool(entry & alu.N)
+
+    def compare(self, register: np.uint8, value: np.uint8) -> None:
+        """Shared by CMP, CPX and CPY."""
+        self.shift_flags(alu.CMP[int(register) << 8 | int(value)])
         
     def ADC(self, mode: AddressingMode):
         addr = self.cpu.get_operand_address(mode)
         value = self.cpu.bus.read(addr)
 
-        a = np.uint16(self.cpu.r_accumulator)
-        m = np.uint16(value)
-        c = np.uint16(self.cpu.r_status["flag_C"])
-
-        result = a + m + c
-
-        self.cpu.r_accumulator = np.uint8(result)
+        status = self.cpu.r_status
+        entry = alu.ADC[status["flag_C"] << 16 | int(self.cpu.r_accumulator) << 8 | int(value)]
+        self.cpu.r_accumulator = np.uint8(entry & 0xFF)
 
         # Setting Flags
-        self.cpu.r_status["flag_C"] = True if result > 255 else False
-        self.cpu.r_status["flag_V"] = True if (~(a ^ m) & (a ^ result)) & 0x80 else False
-        self.cpu.update_zero_and_negative_flags(self.cpu.r_accumulator)
+        status["flag_C"] = bool(entry & alu.C)
+        status["flag_Z"] = bool(entry & alu.Z)
+        status["flag_V"] = bool(entry & alu.V)
+        status["flag_N"] = bool(entry & alu.N)
 
     def AND(self, mode: AddressingMode):
         addr = self.cpu.get_operand_address(mode)
@@ -198,19 +220,15 @@ class MOS6502_OpCodes():
         else:
             addr = self.cpu.get_operand_address(mode)
             value = self.cpu.bus.read(addr)
-        shifted = value << 1
-
-        self.cpu.r_status["flag_C"] = True if shifted > 255 else False
+        entry = alu.ASL[int(value)]
+        shifted = np.uint8(entry & 0xFF)
+        self.shift_flags(entry)
 
         if mode == AddressingMode.ACCUMULATOR:
-            self.cpu.r_accumulator = np.uint8(shifted)
-            self.cpu.update_zero_and_negative_flags(np.uint8(shifted))
-            if self.cpu.r_accumulator == 0:
-                self.cpu.r_status['flag_Z'] = True
+            self.cpu.r_accumulator = shifted
         else:
-            self.cpu.bus.write(addr, np.uint8(shifted))
-            self.cpu.update_zero_and_negative_flags(np.uint8(shifted))
-        
+            self.cpu.bus.write(addr, shifted)
+
 
     def BCC(self, mode: AddressingMode):
         addr = self.cpu.get_operand_address(mode)
@@ -247,7 +265,8 @@ class MOS6502_OpCodes():
         value = self.cpu.bus.read(addr)
 
         if self.cpu.r_status["flag_N"]:
-            print('flag N')
+            if self.cpu.debug:
+                print('flag N')
             self.cpu.r_program_counter += np.int8(value)
 
     def BNE(self, mode: AddressingMode):
@@ -265,9 +284,14 @@ class MOS6502_OpCodes():
             self.cpu.r_program_counter += np.int8(value)
 
     def BRK(self, mode: AddressingMode):
-        print('BREAK')
-        self.cpu.r_status['flag_B0'] = True
-        self.cpu.r_program_counter += 1
+        self.cpu.r_program_counter += 1  # BRK skips a padding byte
+        if self.cpu.bus.read_u16(0xFFFE) == 0:
+            # No IRQ/BRK handler installed: treat BRK as the end of the program
+            if self.cpu.debug:
+                print('BREAK')
+            self.cpu.r_status['flag_B0'] = True
+            return
+        self.cpu.interrupt(0xFFFE, brk=True)
 
     def BVC(self, mode: AddressingMode):
         addr = self.cpu.get_operand_address(mode)
@@ -298,32 +322,20 @@ class MOS6502_OpCodes():
     def CMP(self, mode: AddressingMode):
         addr = self.cpu.get_operand_address(mode)
         value = self.cpu.bus.read(addr)
-        result = np.uint8(self.cpu.r_accumulator) - value
-
-        #print(f'r_a: {self.cpu.r_accumulator}, value: {value}')
-        #print(f'The result is {result}')
 
-        self.cpu.r_status["flag_C"] = True if self.cpu.r_accumulator >= value else False
-        self.cpu.r_status["flag_Z"] = True if self.cpu.r_accumulator == value else False
-        self.cpu.r_status["flag_N"] = bool(result & 0b1000_0000)
+        self.compare(self.cpu.r_accumulator, value)
 
     def CPX(self, mode: AddressingMode):
         addr = self.cpu.get_operand_address(mode)
         value = self.cpu.bus.read(addr)
-        result = np.uint8(self.cpu.r_index_X) - value
 
-        self.cpu.r_status["flag_C"] = True if self.cpu.r_index_X >= value else False
-        self.cpu.r_status["flag_Z"] = True if self.cpu.r_index_X == value else False
-        self.cpu.r_status["flag_N"] = bool(result & 0b1000_0000)
+        self.compare(self.cpu.r_index_X, value)
 
     def CPY(self, mode: AddressingMode):
         addr = self.cpu.get_operand_address(mode)
         value = self.cpu.bus.read(addr)
-        result = np.uint8(self.cpu.r_index_Y) - value
 
-        self.cpu.r_status["flag_C"] = True if self.cpu.r_index_Y >= value else False
-        self.cpu.r_status["flag_Z"] = True if self.cpu.r_index_Y == value else False
-        self.cpu.r_status["flag_N"] = bool(result & 0b1000_0000)
+        self.compare(self.cpu.r_index_Y, value)
 
     def DEC(self, mode: AddressingMode):
         addr = self.cpu.get_operand_address(mode)
@@ -345,7 +357,8 @@ class MOS6502_OpCodes():
     def EOR(self, mode: AddressingMode):
         addr = self.cpu.get_operand_address(mode)
         value = self.cpu.bus.read(addr)
-        print(value)
+        if self.cpu.debug:
+            print(value)
         self.cpu.r_accumulator ^= value
 
         self.cpu.update_zero_and_negative_flags(self.cpu.r_accumulator)
@@ -368,7 +381,6 @@ class MOS6502_OpCodes():
         self.cpu.update_zero_and_negative_flags(self.cpu.r_index_Y)
 
     def JMP(self, mode: AddressingMode):
-        # TODO: There is a bug which needs implementing in this function
         addr = self.cpu.get_operand_address(mode)
         self.cpu.r_program_counter = addr
 
@@ -401,30 +413,18 @@ class MOS6502_OpCodes():
         self.cpu.update_zero_and_negative_flags(self.cpu.r_index_Y)
 
     def LSR_accumulator(self, mode: AddressingMode):
-        value = self.cpu.r_accumulator
-        # Setting Flags
-        if value & np.uint8(1) == 1:
-            self.cpu.r_status['flag_C'] = True
-        else:
-            self.cpu.r_status['flag_C'] = False
-        value = value >> 1
-
-        self.cpu.r_accumulator = value
-        self.cpu.update_zero_and_negative_flags(self.cpu.r_accumulator)
+        entry = alu.LSR[int(self.cpu.r_accumulator)]
+        self.shift_flags(entry)
+        self.cpu.r_accumulator = np.uint8(entry & 0xFF)
 
     def LSR(self, mode: AddressingMode):
         addr = self.cpu.get_operand_address(mode)
         value = self.cpu.bus.read(addr)
 
-        # Setting Flags
-        if value & np.uint8(1) == 1:
-            self.cpu.r_status['flag_C'] = True
-        else:
-            self.cpu.r_status['flag_C'] = False
-        value = value >> 1
-        self.cpu.bus.write(addr, value)
-        self.cpu.update_zero_and_negative_flags(value)
-        
+        entry = alu.LSR[int(value)]
+        self.shift_flags(entry)
+        self.cpu.bus.write(addr, np.uint8(entry & 0xFF))
+
     def NOP(self, mode: AddressingMode):
         # This is supposed to be a pass
         pass
@@ -441,7 +441,8 @@ class MOS6502_OpCodes():
         #self.cpu.update_zero_and_negative_flags(self.cpu.r_accumulator)
 
     def PHP(self, mode: AddressingMode):
-        self.cpu.stack_push(self.cpu.status_to_value())
+        # The pushed copy has both B flags set, as for BRK
+        self.cpu.stack_push(np.uint8(self.cpu.status_to_value() | 0b0011_0000))
 
     def PLA(self, mode: AddressingMode):
         self.cpu.r_accumulator = self.cpu.stack_pop()
@@ -449,27 +450,23 @@ class MOS6502_OpCodes():
 
     def PLP(self, mode: AddressingMode):
         value = self.cpu.stack_pop()
-        self.cpu.value_to_status(value)
+        self.cpu.pull_status(value)
 
     def ROL(self, mode: AddressingMode):
         # Acts different based on Accumulator or Not Addressing Mode
         if mode == AddressingMode.ACCUMULATOR:
             value = self.cpu.get_operand_address(mode)
-            print(f'value: {value}')
+            if self.cpu.debug:
+                print(f'value: {value}')
         else:
             addr = self.cpu.get_operand_address(mode)
             value = self.cpu.bus.read(addr)
         
-        old_carry = self.cpu.r_status['flag_C']
-        if value >> 7 == 1:
-            self.cpu.r_status['flag_N'] == True
-        else:
-            self.cpu.r_status['flag_N'] == False
-
-        value = np.uint8(value << 1)
-        print(f'new value: {value}')
-        if old_carry:
-            value = value | 0b0000_0001
+        entry = alu.ROL[self.cpu.r_status['flag_C'] << 8 | int(value)]
+        self.shift_flags(entry)
+        value = np.uint8(entry & 0xFF)
+        if self.cpu.debug:
+            print(f'new value: {value}')
         if mode == AddressingMode.ACCUMULATOR:
             self.cpu.r_accumulator = value
         else:
@@ -479,27 +476,24 @@ class MOS6502_OpCodes():
         # Acts different based on Accumulator or Not Addressing Mode
         if mode == AddressingMode.ACCUMULATOR:
             value = self.cpu.get_operand_address(mode)
-            print(f'value: {value}')
+            if self.cpu.debug:
+                print(f'value: {value}')
         else:
             addr = self.cpu.get_operand_address(mode)
             value = self.cpu.bus.read(addr)
         
-        old_carry = self.cpu.r_status['flag_C']
-        if value >> 7 == 1:
-            self.cpu.r_status['flag_N'] == True
-        else:
-            self.cpu.r_status['flag_N'] == False
-
-        value = np.uint8(value >> 1)
-        if old_carry:
-            value = value | 0b1000_0000
+        entry = alu.ROR[self.cpu.r_status['flag_C'] << 8 | int(value)]
+        self.shift_flags(entry)
+        value = np.uint8(entry & 0xFF)
         if mode == AddressingMode.ACCUMULATOR:
             self.cpu.r_accumulator = value
         else:
             self.cpu.bus.write(addr, value)
 
     def RTI(self, mode: AddressingMode):
-        raise NotImplementedError
+        value = self.cpu.stack_pop()
+        self.cpu.pull_status(value)
+        self.cpu.r_program_counter = self.cpu.stack_pop_u16()
 
     def RTS(self, mode: AddressingMode):
         value = self.cpu.stack_pop_u16()
@@ -510,26 +504,16 @@ class MOS6502_OpCodes():
         addr = self.cpu.get_operand_address(mode)
         value = self.cpu.bus.read(addr)
 
-        a = self.cpu.r_accumulator
-        b = np.uint8(value)
-
-        #print(result := a + (~b + self.cpu.r_status['flag_C']))
-        #print(result := a + (~b + (not self.cpu.r_status['flag_C'])) + 1)
-        #print(result := a + (b ^ 0x00FF) + self.cpu.r_status['flag_C']) # http://forum.6502.org/viewtopic.php?p=37758#p37758
-        result = a + (b ^ 0x00FF) + self.cpu.r_status['flag_C']
-
-        #print(f'{value =}')
-        #print(f'{a =}')
-        #print(f'{b =}')
-        #print(f'{result =}')
-        #print(f'{self.cpu.r_status["flag_C"] = }')
+        # A + (M ^ 0xFF) + C, see http://forum.6502.org/viewtopic.php?p=37758#p37758
+        status = self.cpu.r_status
+        entry = alu.SBC[status["flag_C"] << 16 | int(self.cpu.r_accumulator) << 8 | int(value)]
+        self.cpu.r_accumulator = np.uint8(entry & 0xFF)
 
         # Setting Flags
-        self.cpu.r_status["flag_C"] = True if result > 255 else False
-        result = np.uint8(result)
-        self.cpu.r_status["flag_V"] = True if (~(value ^ result) & (a ^ result)) & 0x80 else False
-        self.cpu.r_accumulator = result
-        self.cpu.update_zero_and_negative_flags(self.cpu.r_accumulator)
+        status["flag_C"] = bool(entry & alu.C)
+        status["flag_Z"] = bool(entry & alu.Z)
+        status["flag_V"] = bool(entry & alu.V)
+        status["flag_N"] = bool(entry & alu.N)
 
     def SEC(self, mode: AddressingMode):
         self.cpu.r_status["flag_C"] = True
@@ -0,0 +1,140 @@
+import numpy as np
+
+
+class Profiler:
+    def __init__(self, cpu: "MOS6502") -> None:
+        """Hot-spot profiler at the level of the emulated 6502 program rather than the Python
+        interpreter. Instructions and cycles are counted per program counter and per opcode into
+        preallocated NumPy arrays, and a call tree is built from JSR/RTS pairs so that inclusive and
+        exclusive cycles can be reported per subroutine.
+
+        Cycles are the base cycle counts held in the CPU lookup table.
+
+        Args:
+            cpu (MOS6502): MOS6502 class being profiled.
+        """
+        self.cpu = cpu
+        self.pc_instructions = np.zeros(0x10000, dtype=np.uint64)
+        self.pc_cycles = np.zeros(0x10000, dtype=np.uint64)
+        self.opcode_instructions = np.zeros(0x100, dtype=np.uint64)
+        self.opcode_cycles = np.zeros(0x100, dtype=np.uint64)
+        self.opcode_cost = np.zeros(0x100, dtype=np.uint64)
+        for opcode, entry in cpu.lookup_table.items():
+            self.opcode_cost[opcode] = entry[1]
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear all counters and the call stack."""
+        self.pc_instructions[:] = 0
+        self.pc_cycles[:] = 0
+        self.opcode_instructions[:] = 0
+        self.opcode_cycles[:] = 0
+        # Cycles are accumulated against the current call path and only folded into the stack
+        # table when the path changes (JSR/RTS), keeping the per instruction cost down.
+        self.call_path = ("main",)
+        self.pending_cycles = 0
+        self.stacks = {}
+
+    def record(self, pc: int, opcode: int) -> None:
+        """Record an executed instruction. Called by the CPU after the instruction has run, so the
+        program counter already points at the JSR target or the RTS return address.
+
+        Args:
+            pc (int): Address the instruction was fetched from.
+            opcode (int): Opcode that was executed.
+        """
+        cycles = self.opcode_cost[opcode]
+        self.pc_instructions[pc] += 1
+        self.pc_cycles[pc] += cycles
+        self.opcode_instructions[opcode] += 1
+        self.opcode_cycles[opcode] += cycles
+        self.pending_cycles += int(cycles)
+
+        if opcode == 0x20:  # JSR
+            self.flush()
+            self.call_path = self.call_path + (f"sub_{int(self.cpu.r_program_counter):04x}",)
+        elif opcode == 0x60 and len(self.call_path) > 1:  # RTS
+            self.flush()
+            self.call_path = self.call_path[:-1]
+
+    def flush(self) -> None:
+        """Fold the cycles accumulated since the last call or return into the stack table."""
+        if self.pending_cycles:
+            self.stacks[self.call_path] = self.stacks.get(self.call_path, 0) + self.pending_cycles
+            self.pending_cycles = 0
+
+    def subroutines(self) -> dict:
+        """Inclusive and exclusive cycles for each subroutine seen in the call tree.
+
+        Returns:
+            dict: {name: (inclusive cycles, exclusive cycles)}
+        """
+        self.flush()
+        inclusive = {}
+        exclusive = {}
+        for path, cycles in self.stacks.items():
+            exclusive[path[-1]] = exclusive.get(path[-1], 0) + cycles
+            for name in set(path):  # Count recursive frames once
+                inclusive[name] = inclusive.get(name, 0) + cycles
+
+        return {name: (inclusive[name], exclusive.get(name, 0)) for name in inclusive}
+
+    def folded(self) -> str:
+        """Call stacks in the folded format consumed by flame graph tools, one
+        `frame;frame;frame cycles` line per unique stack.
+
+        Returns:
+            str: folded stacks.
+        """
+        self.flush()
+        return "\n".join(f"{';'.join(path)} {cycles}" for path, cycles in sorted(self.stacks.items()))
+
+    def write_folded(self, filename: str) -> None:
+        with open(filename, "w") as f:
+            f.write(self.folded() + "\n")
+
+    def report(self, top: int = 20) -> str:
+        """Build a text report of the hottest addresses, opcodes and subroutines.
+
+        Args:
+            top (int, optional): Number of rows per table. Defaults to 20.
+
+        Returns:
+            str: report.
+        """
+        total_cycles = int(self.pc_cycles.sum())
+        total_instructions = int(self.pc_instructions.sum())
+        share = lambda x: 100 * x / total_cycles if total_cycles else 0.0
+
+        lines = [f"Instructions: {total_instructions}, Cycles: {total_cycles}", ""]
+
+        lines.append(f"{'PC':>6} {'Op':>4} {'Count':>10} {'Cycles':>10} {'%':>6}")
+        for pc in np.argsort(self.pc_cycles, kind="stable")[::-1][:top]:
+            if self.pc_cycles[pc] == 0:
+                break
+            opcode = int(self.cpu.bus.read(pc))
+            mnemonic = self.cpu.lookup_table[opcode][3] if opcode in self.cpu.lookup_table else "???"
+            lines.append(
+                f"0x{pc:04x} {mnemonic:>4} {int(self.pc_instructions[pc]):>10} "
+                f"{int(self.pc_cycles[pc]):>10} {share(int(self.pc_cycles[pc])):>6.2f}"
+            )
+        lines.append("")
+
+        lines.append(f"{'Op':>4} {'Mnemonic':>8} {'Mode':>12} {'Count':>10} {'Cycles':>10} {'%':>6}")
+        for opcode in np.argsort(self.opcode_cycles, kind="stable")[::-1][:top]:
+            if self.opcode_cycles[opcode] == 0:
+                break
+            entry = self.cpu.lookup_table[int(opcode)]
+            mode = entry[2].name if entry[2] is not None else "IMPLICIT"
+            lines.append(
+                f"0x{opcode:02x} {entry[3]:>8} {mode:>12} {int(self.opcode_instructions[opcode]):>10} "
+                f"{int(self.opcode_cycles[opcode]):>10} {share(int(self.opcode_cycles[opcode])):>6.2f}"
+            )
+        lines.append("")
+
+        lines.append(f"{'Subroutine':>12} {'Inclusive':>10} {'%':>6} {'Exclusive':>10} {'%':>6}")
+        subroutines = sorted(self.subroutines().items(), key=lambda x: x[1][0], reverse=True)
+        for name, (inc, exc) in subroutines[:top]:
+            lines.append(f"{name:>12} {inc:>10} {share(inc):>6.2f} {exc:>10} {share(exc):>6.2f}")
+
+        return "\n".join(lines)
@@ -0,0 +1,115 @@
+import heapq
+import itertools
+import types
+
+
+NEVER = 1 << 62  # Deadline used while nothing is scheduled
+
+
+class Scheduler:
+    def __init__(self, cpu: "MOS6502") -> None:
+        """Cycle timestamped event queue. Events are held in a heap ordered by the CPU cycle at
+        which they fall due, and the earliest deadline is cached in `next_event` so that the CPU
+        only has to compare its cycle counter against a single integer per instruction, rather
+        than polling every device.
+
+        Events are plain callables taking the current cycle count. NMI and IRQ delivery is built
+        on top of this.
+
+        Args:
+            cpu (MOS6502): MOS6502 class the interrupts are delivered to.
+        """
+        self.cpu = cpu
+        self.queue = []
+        self.counter = itertools.count()  # Tie breaker keeps same cycle events in FIFO order
+        self.next_event = NEVER
+        self.irq_line = False
+
+    def schedule(self, cycle: int, callback, name: str = "") -> None:
+        """Schedule a callback to run once the CPU cycle count reaches `cycle`.
+
+        Args:
+            cycle (int): Absolute CPU cycle the event falls due at.
+            callback (callable): Called as callback(cycle) with the current cycle count.
+            name (str, optional): Label for the event, useful when inspecting the queue.
+        """
+        heapq.heappush(self.queue, (cycle, next(self.counter), name, callback))
+        if cycle < self.next_event:
+            self.next_event = cycle
+
+    def schedule_in(self, cycles: int, callback, name: str = "") -> None:
+        """Schedule a callback `cycles` CPU cycles from now."""
+        self.schedule(self.cpu.cycles + cycles, callback, name)
+
+    def cancel(self, name: str) -> None:
+        """Remove all pending events with the given name."""
+        self.queue = [event for event in self.queue if event[2] != name]
+        heapq.heapify(self.queue)
+        self.update_deadline()
+
+    def update_deadline(self) -> None:
+        if self.irq_line and not self.cpu.r_status["flag_I"]:
+            self.next_event = self.cpu.cycles
+        elif self.irq_line:
+            # A masked IRQ stays asserted (level triggered), so keep checking each instruction
+            # until CLI, PLP or RTI clears the I flag.
+            self.next_event = self.cpu.cycles + 1
+        else:
+            self.next_event = self.queue[0][0] if self.queue else NEVER
+
+    def schedule_nmi(self, cycle: int) -> None:
+        self.schedule(cycle, self.deliver_nmi, "nmi")
+
+    def schedule_irq(self, cycle: int) -> None:
+        self.schedule(cycle, self.deliver_irq, "irq")
+
+    def deliver_nmi(self, now: int) -> None:
+        self.cpu.nmi()
+
+    def deliver_irq(self, now: int) -> None:
+        self.assert_irq()
+
+    def assert_irq(self) -> None:
+        """Hold the IRQ line low until the interrupt is serviced by the CPU."""
+        self.irq_line = True
+        self.next_event = self.cpu.cycles
+
+    def clone(self, cpu: "MOS6502", memo: dict) -> "Scheduler":
+        """Copy of the pending events for a cloned CPU (see MOS6502.clone). Event callbacks must
+        be methods of this scheduler or of objects already copied into `memo`, so that they can
+        be rebound to their copies.
+
+        Args:
+            cpu (MOS6502): The cloned CPU.
+            memo (dict): {id(original): copy}, as used by copy.deepcopy.
+
+        Returns:
+            Scheduler: Scheduler for the clone.
+        """
+        scheduler = Scheduler(cpu)
+        memo[id(self)] = scheduler
+        for cycle, counter, name, callback in self.queue:
+            owner = getattr(callback, "__self__", None)
+            if id(owner) not in memo:
+                raise ValueError(f"Event {name!r} cannot be rebound to the clone")
+            callback = types.MethodType(callback.__func__, memo[id(owner)])
+            scheduler.queue.append((cycle, counter, name, callback))  # Same order, still a heap
+        scheduler.counter = itertools.count(next(self.counter))
+        scheduler.next_event = self.next_event
+        scheduler.irq_line = self.irq_line
+        return scheduler
+
+    def run(self) -> None:
+        """Run every event which has fallen due, then service a pending IRQ. Called by the CPU when
+        its cycle count reaches `next_event`.
+        """
+        now = self.cpu.cycles
+        while self.queue and self.queue[0][0] <= now:
+            _, _, _, callback = heapq.heappop(self.queue)
+            callback(now)
+
+        if self.irq_line and not self.cpu.r_status["flag_I"]:
+            self.irq_line = False
+            self.cpu.irq()
+
+        self.update_deadline()
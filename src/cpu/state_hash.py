@@ -0,0 +1,101 @@
+import hashlib
+
+import numpy as np
+
+INSTRUMENTED = ("write", "write_u16", "write_block")
+
+
+def page_digest(memory: memoryview, page: int) -> int:
+    """64 bit hash of one 256 byte page, personalised with the page number so that equal pages at
+    different addresses do not cancel out when combined.
+    """
+    h = hashlib.blake2b(memory[page << 8 : (page + 1) << 8], digest_size=8, person=page.to_bytes(2, "little"))
+    return int.from_bytes(h.digest(), "little")
+
+
+class StateHash:
+    def __init__(self, bus: "Bus") -> None:
+        """Hash of WRAM kept per 256 byte page. Installed on a Bus by Bus.enable_state_hash, which
+        hooks the bus writes through this class.
+
+        A write only flags its page as dirty. update() rehashes the dirty pages and folds each
+        change into the combined memory hash (the XOR of the page hashes), so keeping the hash
+        current costs O(pages written), about 1.5 microseconds a page, and reading it O(1);
+        MOS6502.fingerprint adds the registers. The numba backend flags the pages it writes in
+        the same `dirty` array.
+
+        Only WRAM is covered, not device registers or save RAM. Code writing to
+        Bus.wram.memory directly, rather than through the bus, must call invalidate().
+
+        Args:
+            bus (Bus): Bus being hashed.
+        """
+        self.bus = bus
+        self.dirty_pages = bytearray(0x100)
+        self.dirty = np.frombuffer(self.dirty_pages, dtype=np.uint8)  # Same flags, for the compiled loop
+        self.page_hashes = [0] * 0x100
+        self.memory_hash = 0
+        self.rehashed = 0  # Pages rehashed so far, for measuring the cost
+        self.invalidate()
+        # The wrapped bus methods, bus_write, bus_write_u16 and bus_write_block, are set by
+        # Bus.add_hooks
+
+    def write(self, addr: np.uint16, value: np.uint8) -> None:
+        self.dirty_pages[addr >> 8] = 1
+        self.bus_write(addr, value)
+
+    def write_u16(self, addr: np.uint16, value: np.uint16) -> None:
+        self.dirty_pages[addr >> 8] = 1
+        self.dirty_pages[((addr + 1) >> 8) & 0xFF] = 1
+        self.bus_write_u16(addr, value)
+
+    def write_block(self, start: int, data) -> None:
+        length = np.frombuffer(data, dtype=np.uint8).size
+        if length:
+            self.dirty[start >> 8 : ((start + length - 1) >> 8) + 1] = 1
+        self.bus_write_block(start, data)
+
+    def invalidate(self) -> None:
+        """Flag every page as dirty, after WRAM has been changed behind the bus's back."""
+        self.dirty[:] = 1
+
+    def update(self) -> int:
+        """Rehash the dirty pages.
+
+        Returns:
+            int: The 64 bit combined memory hash.
+        """
+        dirty = self.dirty_pages
+        page = dirty.find(1)
+        if page < 0:
+            return self.memory_hash
+        memory = memoryview(self.bus.wram.memory)
+        while page >= 0:
+            dirty[page] = 0
+            digest = page_digest(memory, page)
+            self.memory_hash ^= self.page_hashes[page] ^ digest
+            self.page_hashes[page] = digest
+            self.rehashed += 1
+            page = dirty.find(1, page + 1)
+        return self.memory_hash
+
+    def diff(self, other: "StateHash") -> list:
+        """Pages whose contents differ from another machine's, e.g. to locate a desync.
+
+        Returns:
+            list: Page numbers.
+        """
+        self.update()
+        other.update()
+        return [page for page in range(0x100) if self.page_hashes[page] != other.page_hashes[page]]
+
+    def clone(self, bus: "Bus") -> "StateHash":
+        """Copy of the hashes for a cloned bus, which must have the same memory contents."""
+        state_hash = StateHash.__new__(StateHash)
+        state_hash.bus = bus
+        state_hash.dirty_pages = bytearray(self.dirty_pages)
+        state_hash.dirty = np.frombuffer(state_hash.dirty_pages, dtype=np.uint8)
+        state_hash.page_hashes = self.page_hashes.copy()
+        state_hash.memory_hash = self.memory_hash
+        state_hash.rehashed = 0
+        return state_hash
@@ -0,0 +1,257 @@
+"""Command line entry point, run from the src directory with `python -m davenes <command>`."""
+import argparse
+
+
+def farm_command(args: argparse.Namespace) -> None:
+    from farm import farm, make_sessions
+
+    sessions = make_sessions(args.programs, args.seeds, args.movies, args.max_instructions)
+    results = farm(sessions, args.out, args.workers, args.retries)
+    print(f"{len(results)} sessions written to {args.out}")
+
+
+def trace_command(args: argparse.Namespace) -> None:
+    import cpu
+    import tracecheck
+    from program import Program
+
+    daveNES = cpu.MOS6502(debug=False)
+    daveNES.seed(args.seed)  # Drives the $FE random byte used by the snake program
+    daveNES.connect_to_bus()
+    daveNES.load_program(Program.from_file(args.program))
+
+    if args.record:
+        n = tracecheck.record(daveNES, args.record, args.max_instructions)
+        print(f"{n} instructions written to {args.record}")
+        return
+
+    divergence = tracecheck.check(daveNES, args.check, args.context, tuple(args.ignore))
+    if divergence is None:
+        print("Trace matched")
+        return
+    print(divergence)
+    raise SystemExit(1)
+
+
+def serve_command(args: argparse.Namespace) -> None:
+    import cpu
+    from disassembler import CodeMap
+    from pacing import FramePacer
+    from program import Program
+    from saveram import SaveRAM
+    from streaming import FrameServer
+
+    daveNES = cpu.MOS6502(debug=False, backend=args.backend)
+    daveNES.seed(args.seed)
+    daveNES.connect_to_bus()
+    daveNES.load_program(Program.from_file(args.program))
+    if args.code_map:
+        daveNES.enable_block_cache(CodeMap.load(args.code_map))
+    save_ram = None
+    if args.save:
+        save_ram = SaveRAM(daveNES, args.save)
+        save_ram.connect_to_bus()
+    server = FrameServer(args.unix, port=args.port, keyframe_interval=args.keyframe_interval).start()
+    print(f"Serving on {args.unix or f'{server.host}:{server.port}'}")
+    metrics = daveNES.enable_metrics()
+    metrics.counter("stream_dropped_frames_total", "Frames skipped for slow stream clients", lambda: server.dropped)
+    pacer = FramePacer(args.fps, args.turbo)
+
+    try:
+        while not daveNES.r_status["flag_B0"]:
+            daveNES.run_until(daveNES.cycles + args.cycles_per_frame)
+            render = pacer.end_frame()
+            if render:
+                server.publish(daveNES.bus.wram.screen())
+            metrics.sample(dropped=0 if render else 1)
+            if args.metrics and metrics.counters["frames_total"] % args.fps < 1:
+                metrics.write_prometheus(args.metrics)  # About once a second
+    finally:
+        server.close()
+        if save_ram is not None:
+            save_ram.close()
+
+
+def view_command(args: argparse.Namespace) -> None:
+    from streaming import FrameClient, view
+
+    client = FrameClient(args.unix, port=args.port)
+    try:
+        view(client)
+    finally:
+        client.close()
+
+
+def record_command(args: argparse.Namespace) -> None:
+    import cpu
+    from farm import load_movie
+    from program import Program
+    from recorder import Recorder
+
+    movie = load_movie(args.movie) if args.movie else {}
+    daveNES = cpu.MOS6502(debug=False)
+    daveNES.seed(args.seed)
+    daveNES.connect_to_bus()
+    daveNES.load_program(Program.from_file(args.program))
+    recorder = Recorder(args.out, args.chunk_frames)
+
+    instructions = 0
+    try:
+        for _ in range(args.frames):
+            end = daveNES.cycles + args.cycles_per_frame
+            while daveNES.cycles < end and not daveNES.r_status["flag_B0"]:
+                if instructions in movie:
+                    daveNES.bus.write(0xFF, movie[instructions])
+                    recorder.record_input(movie[instructions])
+                daveNES.step_program()
+                instructions += 1
+            recorder.record_frame(daveNES.bus.wram.screen())
+            if daveNES.r_status["flag_B0"]:
+                break
+    finally:
+        recorder.close()
+    print(f"{recorder.frames} frames written to {args.out}")
+
+
+def export_command(args: argparse.Namespace) -> None:
+    from recorder import export_png
+
+    n = export_png(args.recording, args.directory, args.scale)
+    print(f"{n} frames written to {args.directory}")
+
+
+def disasm_command(args: argparse.Namespace) -> None:
+    from disassembler import analyse_program
+    from program import Program
+
+    code_map = analyse_program(Program.from_file(args.program))
+    if args.map:
+        code_map.save(args.map)
+    if args.dot:
+        with open(args.dot, "w") as f:
+            f.write(code_map.to_dot())
+    if args.listing:
+        with open(args.listing, "w") as f:
+            f.write(code_map.listing())
+    elif not (args.map or args.dot):
+        print(code_map.listing(), end="")
+
+
+def netplay_command(args: argparse.Namespace) -> None:
+    import socket
+
+    import cpu
+    from program import Program
+    from rollback import RollbackSession, play
+
+    daveNES = cpu.MOS6502(debug=False, backend=args.backend)
+    daveNES.connect_to_bus()
+    daveNES.load_program(Program.from_file(args.program))
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", args.port))
+    sock.connect(("127.0.0.1", args.peer_port))
+    session = RollbackSession(
+        daveNES,
+        args.player,
+        sock,
+        seed=args.seed,
+        cycles_per_frame=args.cycles_per_frame,
+        max_rollback=args.max_rollback,
+        fps=args.fps,
+    )
+    try:
+        play(session, args.fps)
+    finally:
+        sock.close()
+
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(prog="davenes", description="daveNES Python Emulator")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    farm_parser = commands.add_parser("farm", help="run headless sessions over a process pool")
+    farm_parser.add_argument("programs", nargs="+", help="program files to run")
+    farm_parser.add_argument("--seeds", nargs="+", type=int, default=[0], help="random seeds")
+    farm_parser.add_argument("--movies", nargs="+", default=None, help="input movie files")
+    farm_parser.add_argument("--max-instructions", type=int, default=1_000_000)
+    farm_parser.add_argument("--workers", type=int, default=None, help="defaults to the number of cores")
+    farm_parser.add_argument("--retries", type=int, default=2, help="resubmissions after a worker crash")
+    farm_parser.add_argument("--out", default="farm_results.jsonl", help="JSON Lines results file")
+    farm_parser.set_defaults(func=farm_command)
+
+    trace_parser = commands.add_parser("trace", help="record a trace, or check execution against one")
+    trace_parser.add_argument("program", help="program file to run")
+    mode = trace_parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--record", help="trace file to write (.gz to compress)")
+    mode.add_argument("--check", help="reference trace to compare against")
+    trace_parser.add_argument("--seed", type=int, default=0, help="random seed")
+    trace_parser.add_argument("--max-instructions", type=int, default=1_000_000)
+    trace_parser.add_argument("--context", type=int, default=5, help="lines shown around a divergence")
+    trace_parser.add_argument("--ignore", nargs="+", default=[], help="fields not compared, e.g. CYC")
+    trace_parser.set_defaults(func=trace_command)
+
+    serve_parser = commands.add_parser("serve", help="run a program headlessly, streaming its screen")
+    serve_parser.add_argument("program", help="program file to run")
+    serve_parser.add_argument("--unix", default=None, help="Unix socket path (default: TCP on localhost)")
+    serve_parser.add_argument("--port", type=int, default=6502, help="TCP port")
+    serve_parser.add_argument("--seed", type=int, default=0, help="random seed")
+    serve_parser.add_argument("--backend", default="python", choices=["python", "numba"])
+    serve_parser.add_argument("--fps", type=float, default=60.0988, help="target frame rate (default: NTSC)")
+    serve_parser.add_argument("--turbo", action="store_true", help="run unthrottled, streaming at --fps")
+    serve_parser.add_argument("--cycles-per-frame", type=int, default=29781)
+    serve_parser.add_argument("--keyframe-interval", type=int, default=60)
+    serve_parser.add_argument("--code-map", default=None, help="predecode the blocks of a 'disasm --map' file")
+    serve_parser.add_argument("--save", default=None, help="battery backed $6000-$7FFF save file")
+    serve_parser.add_argument("--metrics", default=None, help="Prometheus text file, rewritten every second")
+    serve_parser.set_defaults(func=serve_command)
+
+    view_parser = commands.add_parser("view", help="watch a stream from 'davenes serve'")
+    view_parser.add_argument("--unix", default=None, help="Unix socket path (default: TCP on localhost)")
+    view_parser.add_argument("--port", type=int, default=6502, help="TCP port")
+    view_parser.set_defaults(func=view_command)
+
+    record_parser = commands.add_parser("record", help="run a program headlessly, recording its screen")
+    record_parser.add_argument("program", help="program file to run")
+    record_parser.add_argument("--out", default="recording.zip", help="recording archive")
+    record_parser.add_argument("--movie", default=None, help="input movie file")
+    record_parser.add_argument("--seed", type=int, default=0, help="random seed")
+    record_parser.add_argument("--frames", type=int, default=3600, help="maximum frames to record")
+    record_parser.add_argument("--cycles-per-frame", type=int, default=29781)
+    record_parser.add_argument("--chunk-frames", type=int, default=256, help="frames per archive chunk")
+    record_parser.set_defaults(func=record_command)
+
+    export_parser = commands.add_parser("export", help="export a recording as a PNG sequence")
+    export_parser.add_argument("recording", help="recording archive")
+    export_parser.add_argument("directory", help="output directory")
+    export_parser.add_argument("--scale", type=int, default=10, help="pixels per screen pixel")
+    export_parser.set_defaults(func=export_command)
+
+    disasm_parser = commands.add_parser("disasm", help="disassemble a program and map its basic blocks")
+    disasm_parser.add_argument("program", help="program file to analyse")
+    disasm_parser.add_argument("--listing", default=None, help="listing file (default: print unless --map/--dot)")
+    disasm_parser.add_argument("--dot", default=None, help="Graphviz file of the basic block graph")
+    disasm_parser.add_argument("--map", default=None, help="JSON code map, for 'serve --code-map'")
+    disasm_parser.set_defaults(func=disasm_command)
+
+    netplay_parser = commands.add_parser("netplay", help="play a program with a second player over UDP")
+    netplay_parser.add_argument("program", help="program file to run")
+    netplay_parser.add_argument(
+        "--player", type=int, default=0, choices=[0, 1], help="player 1's input is applied after player 0's"
+    )
+    netplay_parser.add_argument("--port", type=int, default=6510, help="local UDP port")
+    netplay_parser.add_argument("--peer-port", type=int, default=6511, help="the other player's UDP port")
+    netplay_parser.add_argument("--seed", type=int, default=0, help="random seed, the same for both players")
+    netplay_parser.add_argument("--backend", default="numba", choices=["python", "numba"])
+    netplay_parser.add_argument("--fps", type=float, default=60.0988, help="target frame rate (default: NTSC)")
+    netplay_parser.add_argument("--cycles-per-frame", type=int, default=29781)
+    netplay_parser.add_argument("--max-rollback", type=int, default=8, help="frames run ahead of the peer")
+    netplay_parser.set_defaults(func=netplay_command)
+
+    args = parser.parse_args(argv)
+    if args.command == "serve" and args.code_map and args.backend != "python":
+        parser.error("--code-map predecodes blocks for the python backend, not numba")
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import numpy as np
+
+
+class Device:
+    def __init__(self, cpu: "MOS6502", lazy: bool = True) -> None:
+        """Base class for components clocked alongside the CPU (video, audio, timers).
+
+        Devices are run lazily: they sit idle until the CPU touches one of their registers, or
+        until a deadline they have asked for (e.g. the start of vblank) falls due on the CPU's
+        scheduler. At that point they catch up on all elapsed CPU cycles in one batched `run`
+        call. Subclasses must make `run(n)` equivalent to n single cycle steps, so that the output
+        is identical to stepping the device in lockstep with every instruction.
+
+        Args:
+            cpu (MOS6502): MOS6502 class the device is clocked against.
+            lazy (bool, optional): Catch up lazily. When False the device is synchronised before
+                every instruction (lockstep), which is useful for checking a device. Defaults to True.
+        """
+        self.cpu = cpu
+        self.lazy = lazy
+        self.last_sync = cpu.cycles
+        self.catch_ups = 0
+        self.name = f"{type(self).__name__}_{id(self):x}"
+
+    def connect_to_bus(self, start: int, end: int) -> None:
+        """Map the device registers into the CPU address space and start its deadlines.
+
+        Args:
+            start (int): First register address.
+            end (int): Last register address (inclusive).
+        """
+        self.cpu.bus.attach(self, start, end)
+        self.schedule()
+
+    def sync(self) -> None:
+        """Catch up on every CPU cycle elapsed since the last synchronisation."""
+        elapsed = self.cpu.cycles - self.last_sync
+        if elapsed > 0:
+            self.last_sync = self.cpu.cycles
+            self.catch_ups += 1
+            self.run(elapsed)
+
+    def schedule(self) -> None:
+        """Ask the CPU scheduler to wake the device at its next deadline."""
+        self.cpu.scheduler.cancel(self.name)
+        deadline = self.next_deadline() if self.lazy else self.cpu.cycles + 1
+        if deadline is not None:
+            self.cpu.scheduler.schedule(deadline, self.on_deadline, self.name)
+
+    def on_deadline(self, now: int) -> None:
+        self.sync()
+        self.schedule()
+
+    def read(self, addr: np.uint16) -> np.uint8:
+        self.sync()
+        return self.read_register(addr)
+
+    def write(self, addr: np.uint16, value: np.uint8) -> None:
+        self.sync()
+        self.write_register(addr, value)
+        self.schedule()  # A register write may move the next deadline
+
+    def run(self, cycles: int) -> None:
+        """Advance the device by a number of CPU cycles in one batch."""
+        raise NotImplementedError
+
+    def next_deadline(self):
+        """Absolute CPU cycle at which the device must next be run regardless of register
+        accesses, or None if it can wait indefinitely.
+        """
+        return None
+
+    def read_register(self, addr: np.uint16) -> np.uint8:
+        raise NotImplementedError
+
+    def write_register(self, addr: np.uint16, value: np.uint8) -> None:
+        raise NotImplementedError
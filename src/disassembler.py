@@ -0,0 +1,305 @@
+import json
+
+import numpy as np
+
+import cpu
+from cpu.cpu import AddressingMode
+from cpu.opcode_table import INSTRUCTION_SIZES, LOOKUP_TABLE
+from program import Program
+
+# Vectors followed when they are set, with the label given to their handler
+VECTORS = ((0xFFFC, "reset"), (0xFFFA, "nmi"), (0xFFFE, "irq"))
+# Instructions after which execution does not fall through to the next one
+NO_FALLTHROUGH = {"JMP", "RTS", "RTI", "BRK"}
+
+
+def decode(memory: np.ndarray, addr: int) -> tuple:
+    """Decode the instruction at `addr`.
+
+    Returns:
+        tuple: (address, opcode, size, mnemonic, mode, operand), with operand None for implied
+            and accumulator instructions, or None if the byte is not a known opcode or the
+            instruction runs past the end of the address space.
+    """
+    opcode = int(memory[addr])
+    entry = LOOKUP_TABLE.get(opcode)
+    if entry is None:
+        return None
+    mode, mnemonic = entry[2], entry[3]
+    size = INSTRUCTION_SIZES[mode]
+    if addr + size > 0x10000:
+        return None
+    operand = None
+    if size == 2:
+        operand = int(memory[addr + 1])
+    elif size == 3:
+        operand = int(memory[addr + 1]) | int(memory[addr + 2]) << 8
+    return addr, opcode, size, mnemonic, mode, operand
+
+
+def branch_target(instruction: tuple) -> int:
+    """Destination of a branch, JMP or JSR, or None if it is not known statically."""
+    addr, _, size, mnemonic, mode, operand = instruction
+    if mode is AddressingMode.RELATIVE:
+        return (addr + size + (operand - 0x100 if operand & 0x80 else operand)) & 0xFFFF
+    if mnemonic in ("JMP", "JSR") and mode is AddressingMode.ABSOLUTE:
+        return operand
+    return None
+
+
+class BasicBlock:
+    def __init__(self, start: int, end: int, instructions: list = None, successors: dict = None) -> None:
+        """Straight line code entered only at `start` and left only after its last instruction.
+
+        Args:
+            start (int): Address of the first instruction.
+            end (int): Address after the last instruction.
+            instructions (list, optional): Decoded instructions, see decode. Defaults to [].
+            successors (dict, optional): {address: kind}, kind being "fall", "branch", "jump",
+                "call" or "return" (the instruction after a JSR). Defaults to {}.
+        """
+        self.start = start
+        self.end = end
+        self.instructions = instructions or []
+        self.successors = successors or {}
+        self.predecessors = {}  # {address of the instruction leading here: kind}
+
+    def __repr__(self) -> str:
+        return f"BasicBlock(${self.start:04X}-${self.end - 1:04X}, {len(self.instructions)} instructions)"
+
+
+class CodeMap:
+    def __init__(self, memory: np.ndarray, start: int, end: int, entries: dict) -> None:
+        """Result of the static analysis of a memory image, built by analyse.
+
+        Args:
+            memory (np.ndarray): The 64 KiB image analysed. None for a map loaded from a file.
+            start (int): First address of the program image, for separating code from data.
+            end (int): Address after the program image.
+            entries (dict): {address: label} of the entry points.
+        """
+        self.memory = memory
+        self.start = start
+        self.end = end
+        self.entries = entries
+        self.instructions = {}  # {address: decoded instruction}
+        self.blocks = {}  # {start: BasicBlock}
+        self.calls = set()  # JSR targets
+        self.unresolved = []  # Addresses of indirect jumps
+        self.invalid = []  # Addresses reached by the analysis which do not decode
+
+    def label(self, addr: int) -> str:
+        if addr in self.entries:
+            return self.entries[addr]
+        if addr in self.calls:
+            return f"sub_{addr:04X}"
+        return f"L_{addr:04X}"
+
+    def data(self) -> list:
+        """Runs of bytes in the program image which no reachable instruction covers.
+
+        Returns:
+            list: (start, stop) pairs, stop exclusive.
+        """
+        code = np.zeros(0x10000, dtype=bool)
+        for addr, _, size, *_ in self.instructions.values():
+            code[addr : addr + size] = True
+        data = ~code[self.start : self.end]
+        edges = np.flatnonzero(np.diff(np.concatenate(([False], data, [False])).astype(np.int8)))
+        return [(self.start + a, self.start + b) for a, b in zip(edges[::2], edges[1::2])]
+
+    def format_operand(self, instruction: tuple) -> str:
+        _, _, _, mnemonic, mode, operand = instruction
+        target = branch_target(instruction)
+        if target is not None:
+            return self.label(target) if target in self.blocks else f"${target:04X}"
+        match mode:
+            case None:
+                return ""
+            case AddressingMode.ACCUMULATOR:
+                return "A"
+            case AddressingMode.IMMEDIATE:
+                return f"#${operand:02X}"
+            case AddressingMode.ZERO_PAGE:
+                return f"${operand:02X}"
+            case AddressingMode.ZERO_PAGE_X:
+                return f"${operand:02X},X"
+            case AddressingMode.ZERO_PAGE_Y:
+                return f"${operand:02X},Y"
+            case AddressingMode.ABSOLUTE:
+                return f"${operand:04X}"
+            case AddressingMode.ABSOLUTE_X:
+                return f"${operand:04X},X"
+            case AddressingMode.ABSOLUTE_Y:
+                return f"${operand:04X},Y"
+            case AddressingMode.INDIRECT:
+                return f"(${operand:04X})"
+            case AddressingMode.INDIRECT_X:
+                return f"(${operand:02X},X)"
+            case AddressingMode.INDIRECT_Y:
+                return f"(${operand:02X}),Y"
+
+    def listing(self) -> str:
+        """Annotated assembly listing of the program image: each block under its label with the
+        blocks it is reached from, each instruction with its address and bytes, and the data
+        between them as .byte lines.
+        """
+        lines = [
+            f"; ${self.start:04X}-${self.end - 1:04X}: {len(self.blocks)} blocks, "
+            f"{len(self.instructions)} instructions, {sum(b - a for a, b in self.data())} data bytes",
+        ]
+        items = [(start, "block", block) for start, block in self.blocks.items()]
+        items += [(a, "data", b) for a, b in self.data()]
+        for addr, kind, item in sorted(items, key=lambda x: x[0]):
+            lines.append("")
+            if kind == "data":
+                for row in range(addr, item, 8):
+                    values = ", ".join(f"${int(v):02X}" for v in self.memory[row : min(row + 8, item)])
+                    lines.append(f"${row:04X}  .byte {values}")
+                continue
+            sources = ", ".join(f"${source:04X} ({how})" for source, how in sorted(item.predecessors.items()))
+            lines.append(f"{self.label(addr)}:" + (f"  ; from {sources}" if sources else ""))
+            for instruction in item.instructions:
+                pc, _, size, mnemonic, *_ = instruction
+                code = " ".join(f"{int(v):02X}" for v in self.memory[pc : pc + size])
+                text = f"${pc:04X}  {code:<8}  {mnemonic} {self.format_operand(instruction)}".rstrip()
+                if pc in self.unresolved:
+                    text += "  ; target unknown"
+                lines.append(text)
+        return "\n".join(lines) + "\n"
+
+    def to_dot(self) -> str:
+        """The basic block graph in Graphviz DOT format."""
+        lines = ["digraph code {", '    node [shape=box, fontname="monospace"];']
+        for start, block in self.blocks.items():
+            body = "".join(
+                f"${i[0]:04X} {i[3]} {self.format_operand(i)}".rstrip() + "\\l" for i in block.instructions
+            )
+            lines.append(f'    "{start:04X}" [label="{self.label(start)}:\\l{body}"];')
+        for start, block in self.blocks.items():
+            for target, kind in block.successors.items():
+                style = ", style=dashed" if kind in ("call", "return") else ""
+                lines.append(f'    "{start:04X}" -> "{target:04X}" [label="{kind}"{style}];')
+        lines.append("}")
+        return "\n".join(lines) + "\n"
+
+    def save(self, filename: str) -> None:
+        """Write the entry points and block graph as JSON, for MOS6502.enable_block_cache."""
+        data = {
+            "start": self.start,
+            "end": self.end,
+            "entries": {str(addr): name for addr, name in self.entries.items()},
+            "calls": sorted(self.calls),
+            "blocks": [
+                {"start": b.start, "end": b.end, "successors": {str(a): kind for a, kind in b.successors.items()}}
+                for b in self.blocks.values()
+            ],
+        }
+        with open(filename, "w") as f:
+            json.dump(data, f, indent=1)
+
+    @classmethod
+    def load(cls, filename: str) -> "CodeMap":
+        """Read a map written by save. The blocks have no decoded instructions."""
+        with open(filename) as f:
+            data = json.load(f)
+        code_map = cls(None, data["start"], data["end"], {int(a): name for a, name in data["entries"].items()})
+        code_map.calls = set(data["calls"])
+        for b in data["blocks"]:
+            successors = {int(a): kind for a, kind in b["successors"].items()}
+            code_map.blocks[b["start"]] = BasicBlock(b["start"], b["end"], successors=successors)
+        return code_map
+
+
+def analyse(memory: np.ndarray, start: int = 0x0600, end: int = None, entries: dict = None) -> CodeMap:
+    """Find the reachable code of a memory image by following control flow from the entry points:
+    both ways at each branch, into JSR targets and back after them, and to JMP targets. Indirect
+    jumps are recorded as unresolved rather than followed, as their pointer may be in RAM.
+
+    Args:
+        memory (np.ndarray): 64 KiB memory image, e.g. MOS6502.bus.wram.memory.
+        start (int, optional): First address of the program image. Defaults to 0x0600.
+        end (int, optional): Address after the program image. Defaults to the last reached
+            instruction.
+        entries (dict, optional): {address: label} to start from. Defaults to the reset, NMI and
+            IRQ vectors which are set.
+
+    Returns:
+        CodeMap: Instructions, basic blocks and the control flow between them.
+    """
+    if entries is None:
+        entries = {}
+        for vector, name in VECTORS:
+            addr = int(memory[vector]) | int(memory[vector + 1]) << 8
+            if addr:
+                entries.setdefault(addr, name)
+    code_map = CodeMap(memory, start, end, entries)
+    instructions = code_map.instructions
+    leaders = set(entries)
+
+    pending = list(entries)
+    while pending:
+        addr = pending.pop()
+        while addr not in instructions:
+            instruction = decode(memory, addr)
+            if instruction is None:
+                code_map.invalid.append(addr)
+                break
+            instructions[addr] = instruction
+            mnemonic, mode, size = instruction[3], instruction[4], instruction[2]
+            target = branch_target(instruction)
+            if target is not None:
+                leaders.add(target)
+                pending.append(target)
+                if mnemonic == "JSR":
+                    code_map.calls.add(target)
+            elif mnemonic == "JMP":
+                code_map.unresolved.append(addr)
+            if mnemonic in NO_FALLTHROUGH:
+                break
+            addr += size
+            if target is not None:
+                leaders.add(addr)  # Fall through of a branch, or return from a JSR
+
+    if code_map.end is None:
+        code_map.end = max((a + i[2] for a, i in instructions.items()), default=start)
+
+    # Split the instructions into blocks at the leaders and after control flow
+    block = None
+    for addr in sorted(instructions):
+        instruction = instructions[addr]
+        if block is None or addr in leaders or addr != block.end:
+            block = BasicBlock(addr, addr)
+            code_map.blocks[addr] = block
+        block.instructions.append(instruction)
+        block.end = addr + instruction[2]
+        mnemonic, mode = instruction[3], instruction[4]
+        if mode is AddressingMode.RELATIVE or mnemonic in NO_FALLTHROUGH or mnemonic == "JSR":
+            block = None
+
+    for block in code_map.blocks.values():
+        last = block.instructions[-1]
+        mnemonic, mode = last[3], last[4]
+        target = branch_target(last)
+        if mode is AddressingMode.RELATIVE:
+            block.successors = {target: "branch", block.end: "fall"}
+        elif mnemonic == "JSR":
+            block.successors = {target: "call", block.end: "return"}
+        elif mnemonic == "JMP":
+            block.successors = {target: "jump"} if target is not None else {}
+        elif mnemonic not in NO_FALLTHROUGH and block.end in code_map.blocks:
+            block.successors = {block.end: "fall"}
+        for successor, kind in block.successors.items():
+            if successor in code_map.blocks:
+                code_map.blocks[successor].predecessors[block.instructions[-1][0]] = kind
+    return code_map
+
+
+def analyse_program(program: Program) -> CodeMap:
+    """Analyse a program as MOS6502.load_program would lay it out: at $0600, with the reset
+    vector pointing at it.
+    """
+    daveNES = cpu.MOS6502(debug=False)
+    daveNES.connect_to_bus()
+    daveNES.load_program(program)
+    return analyse(daveNES.bus.wram.memory, 0x0600, 0x0600 + len(program.program))
@@ -0,0 +1,180 @@
+import multiprocessing
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import cpu
+from program import Program
+
+SNAKE_PROGRAM = os.path.join(os.path.dirname(__file__), "..", "programs", "snake_game.txt")
+
+# Input bytes written to $FF, in the same key mapping as run_program: up, right, down, left
+ACTIONS = (0x77, 0x61, 0x73, 0x64)
+
+
+class SnakeEnv:
+    def __init__(
+        self, frame_skip: int = 4, cycles_per_frame: int = 29781, program: str = SNAKE_PROGRAM, recorder: "Recorder" = None
+    ) -> None:
+        """Gym style environment around the snake program. Each step writes the action's input
+        byte to $FF and runs `frame_skip` frames headlessly. The observation is a view of the
+        32x32 screen at $0200-$05FF, so it is only valid until the next step.
+
+        The reward is the growth of the snake (its length is held at $03), and -1 when the game
+        ends.
+
+        Args:
+            frame_skip (int, optional): Frames emulated per step. Defaults to 4.
+            cycles_per_frame (int, optional): CPU cycles in a frame. Defaults to 29781 (NTSC).
+            program (str, optional): Program file. Defaults to the snake game.
+            recorder (Recorder, optional): Records the input byte and the screen every step.
+                Defaults to None.
+        """
+        self.frame_skip = frame_skip
+        self.cycles_per_frame = cycles_per_frame
+        self.program = Program.from_file(program)
+        self.action_space = len(ACTIONS)
+        self.observation_shape = (32, 32)
+        self.recorder = recorder
+
+        self.cpu = cpu.MOS6502(debug=False)
+        self.cpu.connect_to_bus()
+
+    def reset(self, seed: int = None) -> np.ndarray:
+        """Reload the program and clear memory.
+
+        Args:
+            seed (int, optional): Seed for the random byte the program reads from $FE.
+
+        Returns:
+            np.ndarray: Observation view of the screen.
+        """
+        if seed is not None:
+            self.cpu.seed(seed)
+        self.cpu.bus.write_block(0x0000, bytes(0x10000))  # Through the bus, so its hooks and devices see it
+        self.cpu.load_program(self.program)
+        self.length = 0
+        return self.cpu.bus.wram.screen()
+
+    def step(self, action: int) -> tuple:
+        """Apply an action and emulate `frame_skip` frames.
+
+        Args:
+            action (int): Index into ACTIONS.
+
+        Returns:
+            tuple: (observation, reward, done, info)
+        """
+        self.cpu.bus.write(0xFF, ACTIONS[action])
+        self.cpu.run_until(self.cpu.cycles + self.frame_skip * self.cycles_per_frame)
+        if self.recorder is not None:
+            self.recorder.record_input(ACTIONS[action])
+            self.recorder.record_frame(self.cpu.bus.wram.screen())
+        if self.cpu.metrics is not None:
+            self.cpu.metrics.sample(self.frame_skip)
+
+        done = bool(self.cpu.r_status["flag_B0"])
+        length = int(self.cpu.bus.read(0x03))
+        if done:
+            reward = -1.0
+        elif self.length:
+            reward = float(max(length - self.length, 0))
+        else:
+            reward = 0.0  # First step, the program has only just set the snake up
+        self.length = length
+        return self.cpu.bus.wram.screen(), reward, done, {"length": length, "cycles": self.cpu.cycles}
+
+
+def worker(remote, name: str, index: int, n: int, kwargs: dict) -> None:
+    """Run a SnakeEnv in a worker process, writing observations into slot `index` of the shared
+    observation array and answering reset/step/close commands over a pipe.
+    """
+    shm = shared_memory.SharedMemory(name=name)
+    observations = np.ndarray((n, 32, 32), dtype=np.uint8, buffer=shm.buf)
+    env = SnakeEnv(**kwargs)
+    try:
+        while True:
+            command, data = remote.recv()
+            if command == "reset":
+                observations[index] = env.reset(data)
+                remote.send(None)
+            elif command == "step":
+                observation, reward, done, info = env.step(data)
+                if done:
+                    observation = env.reset()  # Auto reset, as the batch keeps stepping
+                observations[index] = observation
+                remote.send((reward, done, info))
+            elif command == "close":
+                break
+    finally:
+        del observations
+        shm.close()
+        remote.close()
+
+
+class SubprocessVecEnv:
+    def __init__(self, n: int, **kwargs) -> None:
+        """Step n SnakeEnv instances in parallel, one per worker process. Observations are written
+        by the workers straight into a shared (n, 32, 32) array, so only actions, rewards and done
+        flags travel over the pipes. Environments which finish are reset automatically.
+
+        Args:
+            n (int): Number of environments.
+            **kwargs: Passed to every SnakeEnv.
+        """
+        self.n = n
+        self.shm = shared_memory.SharedMemory(create=True, size=n * 32 * 32)
+        self.observations = np.ndarray((n, 32, 32), dtype=np.uint8, buffer=self.shm.buf)
+        self.remotes = []
+        self.processes = []
+        for i in range(n):
+            remote, worker_remote = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=worker, args=(worker_remote, self.shm.name, i, n, kwargs), daemon=True
+            )
+            process.start()
+            worker_remote.close()
+            self.remotes.append(remote)
+            self.processes.append(process)
+
+    def reset(self, seeds: list = None) -> np.ndarray:
+        """Reset every environment.
+
+        Args:
+            seeds (list, optional): One seed per environment.
+
+        Returns:
+            np.ndarray: (n, 32, 32) observation array, shared with the workers.
+        """
+        seeds = seeds if seeds is not None else [None] * self.n
+        for remote, seed in zip(self.remotes, seeds):
+            remote.send(("reset", seed))
+        for remote in self.remotes:
+            remote.recv()
+        return self.observations
+
+    def step(self, actions) -> tuple:
+        """Step every environment with its action.
+
+        Args:
+            actions: One action per environment.
+
+        Returns:
+            tuple: (observations, rewards, dones, infos)
+        """
+        for remote, action in zip(self.remotes, actions):
+            remote.send(("step", int(action)))
+        results = [remote.recv() for remote in self.remotes]
+        rewards = np.array([r[0] for r in results], dtype=np.float32)
+        dones = np.array([r[1] for r in results], dtype=bool)
+        return self.observations, rewards, dones, [r[2] for r in results]
+
+    def close(self) -> None:
+        for remote in self.remotes:
+            remote.send(("close", None))
+        for process in self.processes:
+            process.join()
+        del self.observations
+        self.shm.close()
+        self.shm.unlink()
@@ -0,0 +1,155 @@
+import itertools
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import cpu
+from program import Program
+
+
+def load_movie(filename: str) -> dict:
+    """Load an input movie. Each non blank line holds an instruction count and the hex byte to
+    write to the $FF input address before that instruction runs, e.g. `1500 77`. Lines starting
+    with # are ignored.
+
+    Args:
+        filename (str): movie file.
+
+    Returns:
+        dict: {instruction: input byte}
+    """
+    movie = {}
+    with open(filename) as f:
+        for line in f:
+            line = line.split("#")[0].split()
+            if line:
+                movie[int(line[0])] = int(line[1], base=16)
+    return movie
+
+
+def state_hash(daveNES: "cpu.MOS6502") -> str:
+    """Hex fingerprint of the registers, status and WRAM, see MOS6502.fingerprint."""
+    return f"{daveNES.fingerprint():016x}"
+
+
+def run_session(session: dict) -> dict:
+    """Run one headless session until the program halts (BRK) or the instruction limit is hit.
+
+    Args:
+        session (dict): program, seed, movie (filename or None) and max_instructions.
+
+    Returns:
+        dict: the session merged with its status, state hash, instruction and cycle counts and
+            wall time.
+    """
+    start = time.perf_counter()
+    movie = load_movie(session["movie"]) if session["movie"] else {}
+
+    daveNES = cpu.MOS6502(debug=False)
+    daveNES.seed(session["seed"])  # Drives the $FE random byte used by the snake program
+    daveNES.connect_to_bus()
+    daveNES.load_program(Program.from_file(session["program"]))
+
+    instructions = 0
+    status = "limit"
+    while instructions < session["max_instructions"]:
+        if instructions in movie:
+            daveNES.bus.write(0xFF, movie[instructions])
+        daveNES.step_program()
+        instructions += 1
+        if daveNES.r_status["flag_B0"]:
+            status = "halted"
+            break
+
+    return {
+        **session,
+        "status": status,
+        "state_hash": state_hash(daveNES),
+        "instructions": instructions,
+        "cycles": daveNES.cycles,
+        "wall_time": time.perf_counter() - start,
+    }
+
+
+def make_sessions(programs: list, seeds: list, movies: list, max_instructions: int) -> list:
+    """Every combination of program, seed and movie."""
+    return [
+        {"program": p, "seed": s, "movie": m, "max_instructions": max_instructions}
+        for p, s, m in itertools.product(programs, seeds, movies or [None])
+    ]
+
+
+def farm(sessions: list, out: str, workers: int = None, retries: int = 2) -> list:
+    """Spread sessions over a pool of worker processes and stream each result as a JSON line to
+    `out` as soon as it completes. If a worker process dies the pool is rebuilt. The sessions
+    which were running are rerun one at a time, each alone in its pool, so that only a session
+    which crashes a worker by itself uses up one of its `retries`; sessions which had not started
+    are resubmitted as before.
+
+    Args:
+        sessions (list): sessions as built by make_sessions.
+        out (str): JSON Lines output file.
+        workers (int, optional): pool size. Defaults to the number of cores.
+        retries (int, optional): resubmissions allowed per session after a worker crash. Defaults to 2.
+
+    Returns:
+        list: the results, in completion order.
+    """
+    workers = workers or os.cpu_count()
+    pending = dict(enumerate(sessions))
+    attempts = dict.fromkeys(pending, 0)
+    suspects = []  # Sessions running when a pool broke, to be rerun alone
+    results = []
+
+    with open(out, "w") as f:
+
+        def emit(result: dict) -> None:
+            results.append(result)
+            f.write(json.dumps(result) + "\n")
+            f.flush()
+
+        while pending:
+            if suspects:
+                size = 1
+                waiting = [suspects.pop(0)]  # Alone, so a crash can only be its own
+            else:
+                size = min(workers, len(pending))
+                waiting = list(pending)  # Not yet submitted to this pool
+            with ProcessPoolExecutor(max_workers=size) as pool:
+                futures = {}
+                try:
+                    while waiting or futures:
+                        # Submit no more than the pool can run at once, so a crash only takes down
+                        # sessions which had actually started
+                        while waiting and len(futures) < size:
+                            i = waiting.pop(0)
+                            futures[pool.submit(run_session, pending[i])] = i
+                        done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            i = futures[future]
+                            try:
+                                emit(future.result())
+                            except BrokenProcessPool:
+                                raise
+                            except Exception as e:
+                                emit({**pending[i], "status": "error", "error": repr(e)})
+                            del futures[future]
+                            del pending[i]
+                except BrokenProcessPool:
+                    # The running sessions were lost with the pool. A session running alone
+                    # crashed it and is charged an attempt; otherwise any of them may have, so
+                    # each is rerun alone first. The waiting ones go to a fresh pool uncharged.
+                    running = list(futures.values())
+                    if len(running) > 1:
+                        suspects.extend(running)
+                    else:
+                        i = running[0]
+                        attempts[i] += 1
+                        if attempts[i] > retries:
+                            emit({**pending.pop(i), "status": "crashed"})
+                        else:
+                            suspects.append(i)
+
+    return results
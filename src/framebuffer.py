@@ -0,0 +1,96 @@
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+HEADER_SIZE = 64  # uint64 sequence counter, then the frame height and width
+
+
+class FramePublisher:
+    def __init__(self, name: str = None, shape: tuple = (32, 32)) -> None:
+        """Publish frames into a shared memory double buffer, so other processes (recorders,
+        viewers, analysis scripts) can map the latest frame as a NumPy view without copying or
+        pickling.
+
+        Frame n is written into buffer n % 2 and only then is the sequence counter bumped to n, so
+        a reader always sees a complete frame. The producer never waits on readers; a reader which
+        holds on to a view for longer than a frame can detect that it has been overwritten with
+        FrameSubscriber.is_current.
+
+        Args:
+            name (str, optional): Shared memory block name. Defaults to a generated name.
+            shape (tuple, optional): Frame shape. Defaults to the (32, 32) snake screen.
+        """
+        self.shape = shape
+        self.frame_size = int(np.prod(shape))
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=HEADER_SIZE + 2 * self.frame_size)
+        self.name = self.shm.name
+        self.header = np.ndarray((3,), dtype=np.uint64, buffer=self.shm.buf)
+        self.header[:] = (0, shape[0], shape[1])
+        self.buffers = np.ndarray((2, *shape), dtype=np.uint8, buffer=self.shm.buf, offset=HEADER_SIZE)
+        self.sequence = 0
+
+    def publish(self, frame: np.ndarray) -> int:
+        """Copy a frame into the back buffer and make it the latest frame.
+
+        Args:
+            frame (np.ndarray): Frame data, reshaped to the publisher's frame shape.
+
+        Returns:
+            int: Sequence number of the published frame.
+        """
+        sequence = self.sequence + 1
+        self.buffers[sequence % 2] = np.reshape(frame, self.shape)
+        self.header[0] = sequence
+        self.sequence = sequence
+        return sequence
+
+    def close(self) -> None:
+        """Release and remove the shared memory block."""
+        del self.header, self.buffers
+        self.shm.close()
+        self.shm.unlink()
+
+
+class FrameSubscriber:
+    def __init__(self, name: str) -> None:
+        """Map the frames published by a FramePublisher in another process.
+
+        Args:
+            name (str): Shared memory block name (FramePublisher.name).
+        """
+        # Only the publisher owns the block, so the subscriber must not leave it registered with a
+        # resource tracker of its own, which would unlink it when the subscriber exits. A tracker
+        # which is already running is shared with the publisher (same process or a child of it)
+        # and the registration belongs to the publisher.
+        private_tracker = resource_tracker._resource_tracker._fd is None
+        self.shm = shared_memory.SharedMemory(name=name)
+        if private_tracker:
+            resource_tracker.unregister(self.shm._name, "shared_memory")
+        self.header = np.ndarray((3,), dtype=np.uint64, buffer=self.shm.buf)
+        self.shape = (int(self.header[1]), int(self.header[2]))
+        self.buffers = np.ndarray((2, *self.shape), dtype=np.uint8, buffer=self.shm.buf, offset=HEADER_SIZE)
+        self.buffers.flags.writeable = False
+
+    @property
+    def sequence(self) -> int:
+        return int(self.header[0])
+
+    def latest(self) -> tuple:
+        """Latest complete frame, as a read only view into shared memory.
+
+        Returns:
+            tuple: (sequence number, frame view). Sequence 0 means nothing has been published yet.
+        """
+        sequence = self.sequence
+        return sequence, self.buffers[sequence % 2]
+
+    def is_current(self, sequence: int) -> bool:
+        """Whether the view returned alongside `sequence` is still safe. Once a newer frame has
+        been published the producer may already be writing the frame after it into the same
+        buffer, so check this after reading a view if the data must be consistent.
+        """
+        return self.sequence == sequence
+
+    def close(self) -> None:
+        del self.header, self.buffers
+        self.shm.close()
@@ -1,18 +1,20 @@
-import matplotlib.pyplot as plt
 import numpy as np
 
 from program import Program
 
-import pygame
-import time
-
 class Memory:
     def __init__(self):
         """Memory class for imitating the Working Random Access Memory (WRAM) of the
         NES.
         """
         #self.memory = np.zeros(0x0800, dtype=np.uint8)
-        self.memory = np.zeros(0xFFFF, dtype=np.uint8)
+        self.memory = np.zeros(0x10000, dtype=np.uint8)
+
+    def clone(self) -> "Memory":
+        """Independent copy of the memory. Copying the whole 64 KiB takes a few microseconds."""
+        memory = Memory.__new__(Memory)
+        memory.memory = self.memory.copy()
+        return memory
 
     def read(self, addr: np.uint16) -> np.uint8:
         return self.memory[addr]
@@ -45,14 +47,34 @@ class Memory:
 
         return 0x0600
 
-    def visualise_memory(self):
-        display = np.zeros((32, 32))
-        xx, yy = np.meshgrid(range(32), range(32))
-        for i in range(0x0200, 0x05FF + 1):
-            ind = i - 0x0200
-            x, y = xx.ravel()[ind], yy.ravel()[ind]
-            display[y, x] = self.memory[i]
-        plt.figure()
-        plt.imshow(display)
-        plt.axis(False)
-        plt.show()
\ No newline at end of file
+    def screen(self) -> np.ndarray:
+        """View of the 32x32 screen the snake program draws into at $0200-$05FF."""
+        return self.memory[0x0200 : 0x05FF + 1].reshape(32, 32)
+
+    def visualise_memory(self, access_counter: "AccessCounter" = None, start: int = 0x0000, end: int = 0xFFFF, width: int = 256):
+        """Show the 32x32 screen region and, given an access counter, heatmaps of the reads, writes
+        and executes per address for a region of memory (log scale).
+
+        Args:
+            access_counter (AccessCounter, optional): Counts from Bus.enable_access_counter.
+            start (int, optional): First address of the heatmaps. Defaults to 0x0000.
+            end (int, optional): Last address of the heatmaps. Defaults to 0xFFFF.
+            width (int, optional): Addresses per heatmap row, the last row padded with zeros.
+                Defaults to 256 (one page per row).
+        """
+        import matplotlib.pyplot as plt  # Only needed for visualisation
+
+        images = {"values": self.screen()}
+        if access_counter is not None:
+            length = end + 1 - start
+            padding = -length % width
+            for kind, counts in access_counter.counts().items():
+                region = np.pad(counts[start : end + 1], (0, padding))
+                images[kind] = np.log1p(region.reshape(-1, width))
+
+        fig, axes = plt.subplots(1, len(images), squeeze=False, figsize=(4 * len(images), 4))
+        for ax, (title, image) in zip(axes[0], images.items()):
+            ax.imshow(image, aspect="auto" if title != "values" else "equal")
+            ax.set_title(title)
+            ax.axis(False)
+        plt.show()
@@ -0,0 +1,80 @@
+import time
+
+NTSC_FPS = 60.0988  # 1789773 CPU cycles per second / 29780.5 cycles per frame
+CYCLES_PER_FRAME = 29781
+
+
+class FramePacer:
+    def __init__(self, fps: float = NTSC_FPS, turbo: bool = False, max_skip: int = 4, clock=time.monotonic, sleep=time.sleep) -> None:
+        """Pace emulated frames against a monotonic clock. Call end_frame() after emulating each
+        frame; it sleeps until the frame's deadline and says whether the frame should be rendered.
+        Emulation itself is never skipped, only rendering.
+
+        When the host falls behind, up to `max_skip` consecutive frames go unrendered so that
+        emulation can catch up; after that a frame is rendered regardless, so the display never
+        freezes. A host more than `max_skip` frames behind moves the schedule to the present
+        rather than trying to win the time back, and then renders one frame in max_skip + 1.
+
+        In turbo mode nothing sleeps and frames are only rendered at `fps` of wall clock time,
+        for batch runs at the host's full speed.
+
+        Args:
+            fps (float, optional): Target emulated frame rate. Defaults to NTSC_FPS.
+            turbo (bool, optional): Run unthrottled. Defaults to False.
+            max_skip (int, optional): Most consecutive unrendered frames. Defaults to 4.
+            clock (callable, optional): Monotonic clock in seconds. Defaults to time.monotonic.
+            sleep (callable, optional): Sleep function. Defaults to time.sleep.
+        """
+        self.period = 1 / fps
+        self.turbo = turbo
+        self.max_skip = max_skip
+        self.clock = clock
+        self.sleep = sleep
+
+        self.frames = 0
+        self.rendered = 0
+        self.skipped = 0  # Consecutive unrendered frames
+        self.deadline = None
+        self.last_render = None
+
+    def start(self) -> None:
+        """Start the schedule now. Called by the first end_frame otherwise."""
+        now = self.clock()
+        self.deadline = now + self.period
+        self.last_render = now
+
+    def end_frame(self) -> bool:
+        """Wait for the end of the current frame.
+
+        Returns:
+            bool: Whether to render the frame.
+        """
+        if self.deadline is None:
+            self.start()
+        self.frames += 1
+        now = self.clock()
+
+        if self.turbo:
+            render = now - self.last_render >= self.period
+        elif now <= self.deadline:
+            self.sleep(self.deadline - now)
+            now = self.deadline
+            render = True
+        else:
+            render = self.skipped >= self.max_skip
+            if now - self.deadline > self.max_skip * self.period:
+                self.deadline = now  # Too far behind to catch up, continue from here
+
+        self.deadline += self.period
+        if render:
+            self.rendered += 1
+            self.skipped = 0
+            self.last_render = now
+        else:
+            self.skipped += 1
+        return render
+
+    @property
+    def dropped(self) -> int:
+        """Frames emulated but not rendered."""
+        return self.frames - self.rendered
@@ -0,0 +1,119 @@
+import numpy as np
+
+from device import Device
+
+
+class PPU(Device):
+    # NTSC timing: 3 dots per CPU cycle, 341 dots per scanline, 262 scanlines per frame
+    DOTS_PER_CYCLE = 3
+    DOTS_PER_LINE = 341
+    DOTS_PER_FRAME = 341 * 262
+    VBLANK_START = 241 * 341 + 1  # Dot 1 of scanline 241
+    VBLANK_END = 261 * 341 + 1  # Dot 1 of the pre-render scanline
+
+    def __init__(self, cpu: "MOS6502", lazy: bool = True) -> None:
+        """Picture Processing Unit. Only the frame timing and the registers needed for it are
+        implemented so far: the vblank flag in PPUSTATUS ($2002), the NMI enable bit in PPUCTRL
+        ($2000) and the frame counter. Rendering is still unimplemented.
+
+        Args:
+            cpu (MOS6502): MOS6502 class the PPU is clocked against.
+            lazy (bool, optional): See Device. Defaults to True.
+        """
+        super().__init__(cpu, lazy)
+        self.dots = 0  # Dots elapsed since power on
+        self.frame = 0
+        self.vblank = False
+        self.registers = np.zeros(8, dtype=np.uint8)
+        self.oam = np.zeros(0x100, dtype=np.uint8)
+
+    def connect_to_bus(self) -> None:
+        # Eight registers mirrored through $2000-$3FFF
+        super().connect_to_bus(0x2000, 0x3FFF)
+
+    @staticmethod
+    def crossings(old: int, new: int, boundary: int) -> int:
+        """Number of times the dot counter passed a per frame boundary going from old to new."""
+        return (new - boundary) // PPU.DOTS_PER_FRAME - (old - boundary) // PPU.DOTS_PER_FRAME
+
+    def run(self, cycles: int) -> None:
+        old = self.dots
+        self.dots += cycles * self.DOTS_PER_CYCLE
+        self.frame = self.dots // self.DOTS_PER_FRAME
+
+        started = self.crossings(old, self.dots, self.VBLANK_START)
+        ended = self.crossings(old, self.dots, self.VBLANK_END)
+        if started or ended:
+            # The last boundary crossed decides the flag
+            position = self.dots % self.DOTS_PER_FRAME
+            self.vblank = self.VBLANK_START <= position < self.VBLANK_END
+        if started and self.registers[0] & 0b1000_0000:
+            self.cpu.nmi()
+
+    def next_deadline(self) -> int:
+        # The next vblank start is the only event visible without a register access
+        position = self.dots % self.DOTS_PER_FRAME
+        dots = (self.VBLANK_START - position) % self.DOTS_PER_FRAME or self.DOTS_PER_FRAME
+        return self.last_sync + -(-dots // self.DOTS_PER_CYCLE)
+
+    def read_register(self, addr: np.uint16) -> np.uint8:
+        reg = addr & 0x07
+        if reg == 2:
+            value = np.uint8(self.registers[2] & 0x1F | (self.vblank << 7))
+            self.vblank = False  # Reading PPUSTATUS clears the vblank flag
+            return value
+        return self.registers[reg]
+
+    def write_register(self, addr: np.uint16, value: np.uint8) -> None:
+        self.registers[addr & 0x07] = value
+
+
+class OAMDMA(Device):
+    OAMDMA = 0x4014
+    CYCLES = 513  # Plus one when the $4014 write falls on an odd CPU cycle
+
+    def __init__(self, cpu: "MOS6502", ppu: PPU) -> None:
+        """Sprite DMA. Writing a page number N to $4014 copies $N00-$NFF into the PPU's OAM,
+        starting at OAMADDR ($2003), and halts the CPU for 513 or 514 cycles. The copy is a single
+        block transfer rather than 256 byte writes.
+
+        The rest of the $4000 page (APU and controllers) is unimplemented, reading as 0.
+
+        Args:
+            cpu (MOS6502): MOS6502 class performing the DMA.
+            ppu (PPU): PPU receiving the sprite data.
+        """
+        super().__init__(cpu)
+        self.ppu = ppu
+        self.transfers = 0
+        self.written_at = 0  # CPU cycle count when the last transfer was started
+
+    def connect_to_bus(self) -> None:
+        super().connect_to_bus(0x4000, 0x40FF)
+
+    def run(self, cycles: int) -> None:
+        pass  # No internal timing; the CPU stall is charged once the DMA has started
+
+    def read_register(self, addr: np.uint16) -> np.uint8:
+        return np.uint8(0)
+
+    def write_register(self, addr: np.uint16, value: np.uint8) -> None:
+        if addr != self.OAMDMA:
+            return
+        block = np.frombuffer(self.cpu.bus.read_block(int(value) << 8, 0x100), dtype=np.uint8)
+        start = int(self.ppu.registers[3])  # OAMADDR, the copy wraps around within OAM
+        self.ppu.oam[start:] = block[: 0x100 - start]
+        self.ppu.oam[:start] = block[0x100 - start :]
+
+        self.transfers += 1
+        # The CPU cycles are counted after the store has run, so the stall is charged just after
+        self.written_at = self.cpu.cycles
+        self.cpu.scheduler.schedule(self.cpu.cycles, self.stall, f"{self.name}_stall")
+
+    def stall(self, now: int) -> None:
+        """Halt the CPU for the transfer. Stores write on their last cycle, the one before `now`
+        (the count at the start of the next instruction), or on `now` itself for a write made
+        outside an instruction.
+        """
+        write_cycle = max(self.written_at, now - 1)
+        self.cpu.cycles += self.CYCLES + (write_cycle & 1)
@@ -0,0 +1,170 @@
+import io
+import json
+import os
+import queue
+import struct
+import threading
+import zipfile
+import zlib
+
+import numpy as np
+
+# Input events: the frame they were applied before, and the byte written to $FF
+INPUT = np.dtype([("frame", "<u8"), ("value", "u1")])
+
+
+class Recorder:
+    def __init__(self, filename: str, chunk_frames: int = 256, compresslevel: int = 6) -> None:
+        """Record framebuffers and input events to a compressed archive.
+
+        The emulation thread only copies the frame and puts it on a queue; a background thread
+        stacks the frames into chunks of `chunk_frames` and writes each chunk, with the input
+        events which fell in it, as .npy members of a deflated zip archive. Any framebuffer shape
+        can be recorded (the 32x32 snake screen, or full PPU frames), but it must stay the same
+        for the whole recording.
+
+        Args:
+            filename (str): Archive to write.
+            chunk_frames (int, optional): Frames per archive member. Defaults to 256.
+            compresslevel (int, optional): zlib level, 1 (fastest) to 9. Defaults to 6.
+        """
+        self.filename = filename
+        self.chunk_frames = chunk_frames
+        self.archive = zipfile.ZipFile(filename, "w", zipfile.ZIP_DEFLATED, compresslevel=compresslevel)
+        self.queue = queue.SimpleQueue()
+        self.frames = 0  # Frames queued by the emulation thread
+        self.chunks = 0
+        self.shape = None
+        self.error = None
+        self.thread = threading.Thread(target=self.write_chunks, name="Recorder", daemon=True)
+        self.thread.start()
+
+    def record_frame(self, frame: np.ndarray) -> int:
+        """Queue a copy of a frame.
+
+        Returns:
+            int: Index of the frame in the recording.
+        """
+        self.queue.put(("frame", np.array(frame, dtype=np.uint8, copy=True)))
+        self.frames += 1
+        return self.frames - 1
+
+    # Same interface as framebuffer.FramePublisher, to use a Recorder as MOS6502.frame_publisher
+    publish = record_frame
+
+    def record_input(self, value: int) -> None:
+        """Queue an input event, applied before the next recorded frame."""
+        self.queue.put(("input", (self.frames, value)))
+
+    def write_chunks(self) -> None:
+        frames, inputs = [], []
+        try:
+            while True:
+                kind, data = self.queue.get()
+                if kind == "frame":
+                    frames.append(data)
+                    if len(frames) == self.chunk_frames:
+                        self.write_chunk(frames, inputs)
+                        frames, inputs = [], []
+                elif kind == "input":
+                    inputs.append(data)
+                else:
+                    break
+            if frames or inputs:
+                self.write_chunk(frames, inputs)
+        except Exception as e:
+            self.error = e
+
+    def write_chunk(self, frames: list, inputs: list) -> None:
+        if frames:
+            self.shape = frames[0].shape
+            stacked = np.stack(frames)
+        else:
+            stacked = np.zeros((0, *(self.shape or (0, 0))), dtype=np.uint8)
+        for name, array in (
+            (f"frames_{self.chunks:05d}.npy", stacked),
+            (f"inputs_{self.chunks:05d}.npy", np.array(inputs, dtype=INPUT)),
+        ):
+            with self.archive.open(name, "w") as f:
+                np.save(f, array)
+        self.chunks += 1
+
+    def close(self) -> None:
+        """Flush the remaining frames and finish the archive."""
+        self.queue.put(("close", None))
+        self.thread.join()
+        metadata = {"frames": self.frames, "chunks": self.chunks, "shape": list(self.shape or ())}
+        self.archive.writestr("metadata.json", json.dumps(metadata))
+        self.archive.close()
+        if self.error is not None:
+            raise self.error
+
+
+def read_chunks(filename: str):
+    """Read a recording one chunk at a time.
+
+    Yields:
+        tuple: (frames, inputs), with frames a (n, height, width) uint8 array and inputs an INPUT
+            array whose frame indices count from the start of the recording.
+    """
+    with zipfile.ZipFile(filename) as archive:
+        chunks = json.loads(archive.read("metadata.json"))["chunks"]
+        for i in range(chunks):
+            frames = np.load(io.BytesIO(archive.read(f"frames_{i:05d}.npy")))
+            inputs = np.load(io.BytesIO(archive.read(f"inputs_{i:05d}.npy")))
+            yield frames, inputs
+
+
+def load_recording(filename: str) -> tuple:
+    """Read a whole recording into memory.
+
+    Returns:
+        tuple: (frames, inputs), see read_chunks.
+    """
+    chunks = list(read_chunks(filename))
+    if not chunks:
+        return np.zeros((0, 0, 0), dtype=np.uint8), np.zeros(0, dtype=INPUT)
+    frames, inputs = zip(*chunks)
+    return np.concatenate(frames), np.concatenate(inputs)
+
+
+def write_png(filename: str, image: np.ndarray) -> None:
+    """Write a greyscale (h, w) or RGB (h, w, 3) uint8 image as a PNG."""
+    image = np.ascontiguousarray(image, dtype=np.uint8)
+    height, width = image.shape[:2]
+    colour_type = 2 if image.ndim == 3 else 0
+    # Each scanline is prefixed with filter type 0 (none)
+    rows = np.hstack([np.zeros((height, 1), np.uint8), image.reshape(height, -1)])
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+    with open(filename, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, colour_type, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(rows.tobytes())))
+        f.write(chunk(b"IEND", b""))
+
+
+def export_png(filename: str, directory: str, scale: int = 10, palette: np.ndarray = None) -> int:
+    """Export every frame of a recording as a numbered PNG.
+
+    Args:
+        filename (str): Recording archive.
+        directory (str): Output directory, created if needed.
+        scale (int, optional): Pixels per frame pixel. Defaults to 10.
+        palette (np.ndarray, optional): (n, 3) uint8 RGB colour per frame value. Defaults to
+            greyscale, with the 16 snake colours spread over 0-255.
+
+    Returns:
+        int: Number of frames written.
+    """
+    os.makedirs(directory, exist_ok=True)
+    n = 0
+    for frames, _ in read_chunks(filename):
+        for frame in frames:
+            image = palette[frame] if palette is not None else np.minimum(frame.astype(np.uint16) * 17, 255)
+            image = np.repeat(np.repeat(image, scale, axis=0), scale, axis=1)
+            write_png(os.path.join(directory, f"frame_{n:06d}.png"), image)
+            n += 1
+    return n
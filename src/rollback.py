@@ -0,0 +1,385 @@
+import hashlib
+import select
+import socket
+import struct
+import time
+
+import numpy as np
+
+from pacing import CYCLES_PER_FRAME, NTSC_FPS, FramePacer
+
+INPUT_ADDRESS = 0xFF
+# Datagram header: first frame of the inputs carried, frames of the receiver's input confirmed by
+# the sender, first frame of the receiver's checksums the sender has not received, the number of
+# input bytes and the number of checksums following them
+HEADER = struct.Struct("<IIIHH")
+# Checksum: frame and digest of its start state
+CHECKSUM = struct.Struct("<IQ")
+MAX_INPUTS = 0x4000
+MAX_CHECKSUMS = 64
+MAX_DATAGRAM = HEADER.size + MAX_INPUTS + MAX_CHECKSUMS * CHECKSUM.size
+
+
+def run_frame(
+    cpu: "MOS6502", frame: int, inputs: tuple, seed: int = 0, cycles_per_frame: int = CYCLES_PER_FRAME
+) -> None:
+    """Emulate one frame of a shared session. The generator behind the $FE byte is seeded from
+    the frame number (MOS6502.seed), so a frame can be run again with identical results, and each
+    player's input, in player order, is written to $FF if non zero (a key press).
+
+    Args:
+        cpu (MOS6502): Machine to run.
+        frame (int): Frame number.
+        inputs (tuple): Input byte of each player, 0 for no key press.
+        seed (int, optional): Session seed. Defaults to 0.
+        cycles_per_frame (int, optional): CPU cycles per frame. Defaults to CYCLES_PER_FRAME.
+    """
+    cpu.seed((seed * 1_000_003 + frame) & 0xFFFFFFFF)
+    for value in inputs:
+        if value:
+            cpu.bus.write(INPUT_ADDRESS, value)
+    cpu.run_until(cpu.cycles + cycles_per_frame)
+
+
+class Snapshot:
+    def __init__(self, cpu: "MOS6502") -> None:
+        """Registers, counters and WRAM of a machine, taken in a few microseconds: the registers
+        as a tuple of ints and WRAM as one flat copy. Devices and scheduled events are not
+        captured.
+
+        Args:
+            cpu (MOS6502): Machine to capture.
+        """
+        self.registers = (
+            int(cpu.r_program_counter),
+            int(cpu.r_stack_pointer),
+            int(cpu.r_accumulator),
+            int(cpu.r_index_X),
+            int(cpu.r_index_Y),
+            int(cpu.status_to_value()),
+        )
+        self.cycles = cpu.cycles
+        self.instructions = cpu.instructions
+        self.memory = cpu.bus.wram.memory.copy()
+
+    def digest(self) -> int:
+        """64 bit hash of the captured state, for comparing machines across processes."""
+        h = hashlib.blake2b(struct.pack("<6HQ", *self.registers, self.cycles), digest_size=8)
+        h.update(self.memory)
+        return int.from_bytes(h.digest(), "little")
+
+    @property
+    def nbytes(self) -> int:
+        return self.memory.nbytes + 8 * (len(self.registers) + 2)
+
+    def restore(self, cpu: "MOS6502") -> None:
+        """Put the machine back in the captured state. WRAM is overwritten in place, so views of it
+        (the compiled loop's, the block cache's) stay valid, and pages which change are flagged
+        for the bus's StateHash.
+        """
+        pc, sp, a, x, y, p = self.registers
+        cpu.r_program_counter = np.uint16(pc)
+        cpu.r_stack_pointer = np.uint8(sp)
+        cpu.r_accumulator = np.uint8(a)
+        cpu.r_index_X = np.uint8(x)
+        cpu.r_index_Y = np.uint8(y)
+        cpu.value_to_status(p)
+        cpu.cycles = self.cycles
+        cpu.instructions = self.instructions
+        memory = cpu.bus.wram.memory
+        if cpu.bus.state_hash is not None:
+            changed = np.any(memory.reshape(0x100, 0x100) != self.memory.reshape(0x100, 0x100), axis=1)
+            cpu.bus.state_hash.dirty[changed] = 1
+        memory[:] = self.memory
+
+
+class RollbackSession:
+    def __init__(
+        self,
+        cpu: "MOS6502",
+        player: int,
+        sock: socket.socket,
+        peer=None,
+        seed: int = 0,
+        cycles_per_frame: int = CYCLES_PER_FRAME,
+        max_rollback: int = 8,
+        check_interval: int = 30,
+        fps: float = NTSC_FPS,
+        timeout: float = 5.0,
+    ) -> None:
+        """Two player session over a datagram socket which never waits for the other player while
+        the prediction window lasts.
+
+        Each frame the local input is sent to the peer (along with every input the peer has not
+        acknowledged, so lost datagrams are covered by the next one) and the frame runs straight
+        away with a predicted remote input: no key press. A snapshot is taken at the start of
+        every unconfirmed frame. When the real remote input arrives and differs from the
+        prediction, the machine is restored to the snapshot of that frame and the frames since
+        are simulated again, headlessly, with the corrected inputs. Only when the remote input of
+        the last `max_rollback` frames is still unconfirmed does advance() wait for the peer.
+
+        Every `check_interval` frames, once all inputs before a frame are confirmed, a digest of the
+        snapshot of that frame is exchanged with the peer to detect desyncs.
+
+        The costs (snapshot, restore, resimulation against the frame budget) are collected in
+        report(), and exported as metrics if the CPU has a metrics registry.
+
+        Args:
+            cpu (MOS6502): Machine with the program loaded. It must have no devices attached, as
+                snapshots only cover the CPU and WRAM.
+            player (int): 0 or 1, the order in which the inputs are applied each frame.
+            sock (socket.socket): Bound datagram socket, e.g. UDP on localhost or one end of a
+                socketpair. Made non blocking.
+            peer (optional): Peer address for sendto, or None for a connected socket.
+            seed (int, optional): Session seed, the same for both players. Defaults to 0.
+            cycles_per_frame (int, optional): CPU cycles per frame. Defaults to CYCLES_PER_FRAME.
+            max_rollback (int, optional): Most frames run ahead of the remote input. Defaults to 8.
+            check_interval (int, optional): Frames between desync checks, 0 for none. Defaults to 30.
+            fps (float, optional): Frame rate setting the time budget. Defaults to NTSC_FPS.
+            timeout (float, optional): Seconds to wait for the peer before giving up. Defaults to 5.0.
+        """
+        if cpu.bus.devices:
+            raise ValueError("Rollback snapshots cover the CPU and WRAM only, detach the devices first")
+        self.cpu = cpu
+        self.player = player
+        self.sock = sock
+        self.sock.setblocking(False)
+        self.peer = peer
+        self.seed = seed
+        self.cycles_per_frame = cycles_per_frame
+        self.max_rollback = max_rollback
+        self.check_interval = check_interval
+        self.budget = 1 / fps
+        self.timeout = timeout
+
+        self.frame = 0  # Next frame to run
+        self.local_inputs = {}  # {frame: input}
+        self.remote_inputs = {}  # Confirmed remote inputs, {frame: input}
+        self.predicted = {}  # Remote inputs the frames were run with, {frame: input}
+        self.remote_frame = 0  # First frame without a confirmed remote input
+        self.peer_ack = 0  # First frame of local input the peer has not confirmed
+        self.snapshots = {}  # State at the start of each unconfirmed frame, {frame: Snapshot}
+        self.next_check = check_interval  # Next frame whose start state is compared with the peer's
+        self.checksums = {}  # Own digests, sent until the peer has them and compared, {frame: digest}
+        self.remote_checksums = {}  # The peer's digests not yet compared
+        self.remote_check = check_interval  # Next frame whose digest is expected from the peer
+        self.peer_check_ack = 0  # First frame whose digest the peer has not received
+        self.next_compare = check_interval
+
+        self.rollbacks = 0
+        self.resimulated_frames = 0
+        self.max_depth = 0
+        self.stalls = 0
+        self.desyncs = []  # Frames whose digests differed
+        self.snapshot_time = 0.0
+        self.snapshot_count = 0
+        self.restore_time = 0.0
+        self.resimulation_times = []  # Seconds per rollback, including the restore
+        self.frame_time = 0.0
+
+        if cpu.metrics is not None:
+            metrics = cpu.metrics
+            metrics.counter("rollbacks_total", "Rollbacks to correct a misprediction", lambda: self.rollbacks)
+            metrics.counter("resimulated_frames_total", "Frames simulated again", lambda: self.resimulated_frames)
+            metrics.counter("stalls_total", "Waits of up to 10 ms for the peer", lambda: self.stalls)
+            metrics.gauge(
+                "resimulation_seconds_max", "Longest rollback", lambda: max(self.resimulation_times, default=0.0)
+            )
+
+    def inputs(self, frame: int, remote: int) -> tuple:
+        local = self.local_inputs[frame]
+        return (local, remote) if self.player == 0 else (remote, local)
+
+    def simulate(self, frame: int) -> None:
+        """Snapshot the start of a frame and run it with the best known remote input."""
+        if frame >= self.remote_frame or frame == self.next_check:
+            start = time.perf_counter()
+            self.snapshots[frame] = Snapshot(self.cpu)
+            self.snapshot_time += time.perf_counter() - start
+            self.snapshot_count += 1
+        remote = self.remote_inputs.get(frame, 0)  # Predict no key press
+        self.predicted[frame] = remote
+        run_frame(self.cpu, frame, self.inputs(frame, remote), self.seed, self.cycles_per_frame)
+
+    def checkpoint(self) -> None:
+        """Digest the snapshot of the next checked frame once every input before it is confirmed,
+        and so any rollback before it has been made, and compare it with the peer's.
+        """
+        while self.check_interval and self.next_check < self.frame and self.next_check <= self.remote_frame:
+            frame = self.next_check
+            self.checksums[frame] = self.snapshots[frame].digest()
+            self.next_check += self.check_interval
+        self.compare()
+
+    def compare(self) -> None:
+        """Compare the digests both players have, in frame order."""
+        frame = self.next_compare
+        while frame in self.checksums and frame in self.remote_checksums:
+            if self.checksums[frame] != self.remote_checksums.pop(frame):
+                self.desyncs.append(frame)
+            frame += self.check_interval
+        self.next_compare = frame
+        for frame in [f for f in self.checksums if f < min(self.peer_check_ack, self.next_compare)]:
+            del self.checksums[frame]
+
+    def send(self) -> None:
+        first = max(self.peer_ack, self.frame - MAX_INPUTS)
+        inputs = bytes(self.local_inputs[f] for f in range(first, self.frame + 1))
+        checksums = list(self.checksums.items())[:MAX_CHECKSUMS]  # Oldest first
+        data = HEADER.pack(first, self.remote_frame, self.remote_check, len(inputs), len(checksums)) + inputs
+        data += b"".join(CHECKSUM.pack(frame, digest) for frame, digest in checksums)
+        try:
+            if self.peer is None:
+                self.sock.send(data)
+            else:
+                self.sock.sendto(data, self.peer)
+        except (BlockingIOError, ConnectionRefusedError):
+            pass  # The peer isn't there yet or is behind; the inputs go again with the next frame
+
+    def receive(self) -> int:
+        """Read every waiting datagram.
+
+        Returns:
+            int: Earliest frame already run with a wrong prediction, or None.
+        """
+        mispredicted = None
+        while True:
+            try:
+                data = self.sock.recv(MAX_DATAGRAM)
+            except (BlockingIOError, ConnectionRefusedError):
+                return mispredicted
+            first, ack, check_ack, n, n_checksums = HEADER.unpack_from(data)
+            self.peer_ack = max(self.peer_ack, ack)
+            self.peer_check_ack = max(self.peer_check_ack, check_ack)
+            for offset in range(HEADER.size + n, HEADER.size + n + n_checksums * CHECKSUM.size, CHECKSUM.size):
+                frame, digest = CHECKSUM.unpack_from(data, offset)
+                if frame == self.remote_check:  # Sent oldest first; earlier ones are resends
+                    self.remote_checksums[frame] = digest
+                    self.remote_check += self.check_interval
+            self.compare()
+            for frame, value in enumerate(data[HEADER.size : HEADER.size + n], first):
+                if frame < self.remote_frame or frame in self.remote_inputs:
+                    continue  # Resent
+                self.remote_inputs[frame] = value
+                if frame < self.frame and self.predicted[frame] != value:
+                    mispredicted = frame if mispredicted is None else min(mispredicted, frame)
+            while self.remote_frame in self.remote_inputs:
+                self.remote_frame += 1
+
+    def rollback(self, frame: int) -> None:
+        """Restore the start of `frame` and simulate up to the current frame again."""
+        start = time.perf_counter()
+        self.snapshots[frame].restore(self.cpu)
+        self.restore_time += time.perf_counter() - start
+        for f in range(frame, self.frame):
+            self.simulate(f)
+        self.rollbacks += 1
+        self.resimulated_frames += self.frame - frame
+        self.max_depth = max(self.max_depth, self.frame - frame)
+        self.resimulation_times.append(time.perf_counter() - start)
+
+    def advance(self, local_input: int) -> None:
+        """Run the next frame with the local player's input byte (0 for no key press).
+
+        Raises:
+            TimeoutError: The peer has sent nothing for `timeout` seconds while the session had
+                to wait for it.
+        """
+        start = time.perf_counter()
+        self.local_inputs[self.frame] = local_input
+        self.send()
+        mispredicted = self.receive()
+        deadline = time.monotonic() + self.timeout
+        while self.frame - self.remote_frame >= self.max_rollback:
+            # Too far ahead to predict: wait for the peer, resending in case a datagram was lost
+            self.stalls += 1
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"No input from player {1 - self.player} for {self.timeout} s")
+            select.select([self.sock], [], [], 0.01)
+            self.send()
+            frame = self.receive()
+            if frame is not None and (mispredicted is None or frame < mispredicted):
+                mispredicted = frame
+        if mispredicted is not None:
+            self.rollback(mispredicted)
+
+        self.simulate(self.frame)
+        self.frame += 1
+        self.checkpoint()
+        self.prune()
+        self.frame_time += time.perf_counter() - start
+
+    def prune(self) -> None:
+        """Drop what no rollback or resend can need any more."""
+        for frames, keep in (
+            (self.snapshots, self.remote_frame),
+            (self.predicted, self.remote_frame),
+            (self.remote_inputs, min(self.frame, self.remote_frame)),
+            (self.local_inputs, min(self.peer_ack, self.remote_frame)),
+        ):
+            for frame in [f for f in frames if f < keep]:
+                del frames[frame]
+
+    def report(self) -> dict:
+        """Costs of the session so far, in milliseconds."""
+        times = self.resimulation_times
+        return {
+            "frames": self.frame,
+            "rollbacks": self.rollbacks,
+            "resimulated_frames": self.resimulated_frames,
+            "max_rollback_depth": self.max_depth,
+            "stalls": self.stalls,
+            "desyncs": len(self.desyncs),
+            "snapshot_bytes": sum(snapshot.nbytes for snapshot in self.snapshots.values()),
+            "snapshot_ms": 1000 * self.snapshot_time / max(self.snapshot_count, 1),
+            "restore_ms": 1000 * self.restore_time / max(self.rollbacks, 1),
+            "resimulation_ms_mean": 1000 * sum(times) / max(len(times), 1),
+            "resimulation_ms_max": 1000 * max(times, default=0.0),
+            "frame_ms_mean": 1000 * self.frame_time / max(self.frame, 1),
+            "frame_budget_ms": 1000 * self.budget,
+            "rollbacks_over_budget": sum(t > self.budget for t in times),
+        }
+
+
+def play(session: RollbackSession, fps: float = NTSC_FPS) -> None:
+    """Play a session in a pygame window: the arrow keys are the local input, and each frame runs
+    through the session, paced to `fps` frames per second. The costs are printed at the end.
+
+    Args:
+        session (RollbackSession): Connected session.
+        fps (float, optional): Target frame rate. Defaults to NTSC_FPS.
+    """
+    import pygame  # Front end only, kept out of the headless core import
+
+    keys = {pygame.K_UP: 0x77, pygame.K_RIGHT: 0x61, pygame.K_DOWN: 0x73, pygame.K_LEFT: 0x64}
+    cpu = session.cpu
+    pygame.init()
+    pygame.event.set_allowed([pygame.QUIT, pygame.KEYDOWN])
+    screen = pygame.display.set_mode((640, 640))
+    data = np.zeros(32 * 32)  # Screen as last drawn
+    pacer = FramePacer(fps)
+
+    try:
+        while not cpu.r_status["flag_B0"]:
+            local_input = 0
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    return
+                if event.type == pygame.KEYDOWN and event.key in keys:
+                    local_input = keys[event.key]
+            session.advance(local_input)
+            render = pacer.end_frame()
+
+            screen_block = np.asarray(cpu.bus.read_block(0x0200, 0x0400))
+            if render and np.any(data != screen_block):
+                data = np.copy(screen_block)
+                data_c = np.copy(data)
+                data_c[data_c == 0] = 255  # White background
+                surf = pygame.surfarray.make_surface(np.reshape(data_c, (32, 32)))
+                screen.blit(pygame.transform.scale(surf, (640, 640)), (0, 0))
+                screen.blit(pygame.transform.rotate(screen, -90), (0, 0))
+                pygame.display.update()
+    finally:
+        pygame.quit()
+        for name, value in session.report().items():
+            print(f"{name}: {value:.3f}" if isinstance(value, float) else f"{name}: {value}")
@@ -0,0 +1,96 @@
+import atexit
+import copy
+import mmap
+import os
+import threading
+
+import numpy as np
+
+SAVE_RAM_START = 0x6000
+SAVE_RAM_SIZE = 0x2000
+
+
+class SaveRAM:
+    def __init__(self, cpu: "MOS6502", filename: str, flush_interval: float = 1.0) -> None:
+        """Battery backed cartridge RAM at $6000-$7FFF, memory mapped from a .sav file.
+
+        CPU writes go straight into the mapping, so there is no file I/O per write: the page cache
+        holds the data and a background thread flushes it to disk every `flush_interval` seconds
+        when anything has changed. close() flushes once more and is also registered to run at
+        interpreter exit, so a save survives both a crash of the emulated program and a normal
+        shutdown. A missing or short file is created or zero padded to 8 KiB.
+
+        The save RAM is not clocked, so unlike Device it has no sync or deadlines. A cloned
+        machine gets an in memory copy that is never written back to the file.
+
+        Args:
+            cpu (MOS6502): MOS6502 whose bus the RAM is mapped into.
+            filename (str): Save file.
+            flush_interval (float, optional): Seconds between flushes of a dirty mapping.
+                Defaults to 1.0.
+        """
+        self.cpu = cpu
+        self.filename = filename
+        self.flush_interval = flush_interval
+        self.file = open(filename, "a+b")
+        if os.fstat(self.file.fileno()).st_size < SAVE_RAM_SIZE:
+            self.file.truncate(SAVE_RAM_SIZE)
+        self.mmap = mmap.mmap(self.file.fileno(), SAVE_RAM_SIZE)
+        self.data = np.frombuffer(self.mmap, dtype=np.uint8)
+        self.dirty = False
+        self.flushes = 0
+
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.flush_periodically, name="SaveRAM", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def connect_to_bus(self) -> None:
+        self.cpu.bus.attach(self, SAVE_RAM_START, SAVE_RAM_START + SAVE_RAM_SIZE - 1)
+
+    def read(self, addr: np.uint16) -> np.uint8:
+        return self.data[addr - SAVE_RAM_START]
+
+    def write(self, addr: np.uint16, value: np.uint8) -> None:
+        self.data[addr - SAVE_RAM_START] = value
+        self.dirty = True
+
+    def flush(self) -> None:
+        """Write the mapping back to the file if it has changed since the last flush."""
+        if self.dirty and self.mmap is not None:
+            self.dirty = False  # Cleared first, so a write during the flush is kept for the next
+            self.mmap.flush()
+            self.flushes += 1
+
+    def flush_periodically(self) -> None:
+        while not self.stopped.wait(self.flush_interval):
+            self.flush()
+
+    def close(self) -> None:
+        """Stop the flush thread, flush and unmap the file."""
+        if self.mmap is None:
+            return
+        atexit.unregister(self.close)
+        self.stopped.set()
+        self.thread.join()
+        self.flush()
+        self.data = np.array(self.data)  # Keep the contents readable without the mapping
+        self.mmap.close()
+        self.file.close()
+        self.mmap = None
+
+    def __deepcopy__(self, memo: dict) -> "SaveRAM":
+        """Copy for MOS6502.clone: same contents in plain memory, detached from the file."""
+        clone = SaveRAM.__new__(SaveRAM)
+        memo[id(self)] = clone
+        clone.cpu = copy.deepcopy(self.cpu, memo)
+        clone.filename = None
+        clone.flush_interval = self.flush_interval
+        clone.file = None
+        clone.mmap = None
+        clone.data = np.array(self.data)
+        clone.dirty = False
+        clone.flushes = 0
+        clone.stopped = None
+        clone.thread = None
+        return clone
@@ -0,0 +1,294 @@
+import asyncio
+import socket
+import struct
+import threading
+
+import numpy as np
+
+KEYFRAME = 0
+DELTA = 1
+# Message header: kind, sequence, frame height, frame width, payload size
+HEADER = struct.Struct("<BIHHI")
+# Run length encoding: (run length, byte value) pairs
+RUN = np.dtype([("n", "<u2"), ("v", "u1")])
+MAX_RUN = 0xFFFF
+# Kernel send buffer per client, a few frames of the 32x32 screen, so that a slow client has
+# frames dropped rather than queued
+SEND_BUFFER = 4096
+
+
+def rle_encode(data: np.ndarray) -> bytes:
+    """Run length encode a uint8 array as (uint16 length, uint8 value) pairs, splitting runs
+    longer than MAX_RUN.
+    """
+    data = np.ravel(data)
+    if not data.size:
+        return b""
+    starts = np.flatnonzero(np.concatenate(([True], data[1:] != data[:-1])))
+    lengths = np.diff(np.append(starts, data.size))
+    values = data[starts]
+
+    if lengths.max() > MAX_RUN:
+        repeats = -(-lengths // MAX_RUN)
+        split = np.full(repeats.sum(), MAX_RUN, dtype=np.int64)
+        split[np.cumsum(repeats) - 1] = lengths - (repeats - 1) * MAX_RUN
+        lengths, values = split, np.repeat(values, repeats)
+
+    runs = np.empty(len(lengths), dtype=RUN)
+    runs["n"] = lengths
+    runs["v"] = values
+    return runs.tobytes()
+
+
+def rle_decode(payload: bytes) -> np.ndarray:
+    runs = np.frombuffer(payload, dtype=RUN)
+    return np.repeat(runs["v"], runs["n"])
+
+
+class FrameEncoder:
+    def __init__(self, keyframe_interval: int = 60) -> None:
+        """Encode a stream of frames as messages for a single client. Each frame is XORed with the
+        previous frame sent and the difference run length encoded, which for the snake screen
+        is a handful of runs. Every `keyframe_interval` frames the frame itself is encoded instead,
+        so a client can start from any keyframe.
+
+        Args:
+            keyframe_interval (int, optional): Frames between keyframes. Defaults to 60.
+        """
+        self.keyframe_interval = keyframe_interval
+        self.previous = None
+        self.count = 0
+
+    def encode(self, sequence: int, frame: np.ndarray) -> bytes:
+        """
+        Args:
+            sequence (int): Frame sequence number, sent along with the frame.
+            frame (np.ndarray): 2D uint8 frame.
+
+        Returns:
+            bytes: Header and payload.
+        """
+        frame = np.asarray(frame, dtype=np.uint8)
+        if self.previous is None or self.previous.shape != frame.shape or self.count % self.keyframe_interval == 0:
+            kind, payload = KEYFRAME, rle_encode(frame)
+        else:
+            kind, payload = DELTA, rle_encode(frame ^ self.previous)
+        self.previous = frame.copy()
+        self.count += 1
+        height, width = frame.shape
+        return HEADER.pack(kind, sequence & 0xFFFFFFFF, height, width, len(payload)) + payload
+
+
+class FrameDecoder:
+    def __init__(self) -> None:
+        """Rebuild frames from FrameEncoder messages."""
+        self.frame = None
+
+    def decode(self, header: tuple, payload: bytes) -> np.ndarray:
+        """
+        Args:
+            header (tuple): Unpacked HEADER.
+            payload (bytes): Message payload.
+
+        Returns:
+            np.ndarray: The frame, or None for a delta received before the first keyframe.
+        """
+        kind, _, height, width, _ = header
+        data = rle_decode(payload).reshape(height, width)
+        if kind == KEYFRAME:
+            self.frame = data
+        elif self.frame is None:
+            return None
+        else:
+            self.frame = self.frame ^ data
+        return self.frame
+
+
+class FrameServer:
+    def __init__(self, path: str = None, host: str = "127.0.0.1", port: int = 0, keyframe_interval: int = 60) -> None:
+        """Stream frames to local viewers over a Unix socket, or TCP on localhost, from an asyncio
+        loop running in a background thread.
+
+        publish() only stores a reference to the latest frame and wakes the loop, so the
+        emulation never waits on a client. Each client is sent the newest frame whenever its
+        previous write has drained; frames published in the meantime are dropped for that client
+        only, and deltas are always taken against the frame that client last received.
+
+        Has the same publish() method as framebuffer.FramePublisher, so it can be used as the
+        MOS6502's frame_publisher.
+
+        Args:
+            path (str, optional): Unix socket path. Defaults to None (use TCP).
+            host (str, optional): TCP host. Defaults to "127.0.0.1".
+            port (int, optional): TCP port, 0 for any free port. Defaults to 0.
+            keyframe_interval (int, optional): See FrameEncoder. Defaults to 60.
+        """
+        self.path = path
+        self.host = host
+        self.port = port
+        self.keyframe_interval = keyframe_interval
+
+        self.sequence = 0
+        self.latest = None  # (sequence, frame)
+        self.clients = {}  # {wake event: handler task}
+        self.dropped = 0  # Frames skipped for slow clients, summed over clients
+        self.pending = False
+        self.closing = False
+        self.loop = None
+        self.server = None
+        self.thread = None
+
+    def start(self) -> "FrameServer":
+        """Start serving in a daemon thread. Returns once the socket is listening."""
+        ready = threading.Event()
+        self.loop = asyncio.new_event_loop()
+
+        def serve() -> None:
+            asyncio.set_event_loop(self.loop)
+            if self.path is not None:
+                self.server = self.loop.run_until_complete(asyncio.start_unix_server(self.handle, self.path))
+            else:
+                self.server = self.loop.run_until_complete(asyncio.start_server(self.handle, self.host, self.port))
+                self.port = self.server.sockets[0].getsockname()[1]
+            ready.set()
+            self.loop.run_forever()
+
+        self.thread = threading.Thread(target=serve, name="FrameServer", daemon=True)
+        self.thread.start()
+        ready.wait()
+        return self
+
+    def publish(self, frame: np.ndarray) -> int:
+        """Make a frame the latest frame. Called from the emulation thread.
+
+        Returns:
+            int: Sequence number of the frame.
+        """
+        self.sequence += 1
+        self.latest = (self.sequence, np.array(frame, dtype=np.uint8, copy=True))
+        if not self.pending and self.clients:
+            self.pending = True
+            self.loop.call_soon_threadsafe(self.notify)
+        return self.sequence
+
+    def notify(self) -> None:
+        self.pending = False
+        for client in self.clients:
+            client.set()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Send frames to one client until it disconnects."""
+        # drain() only returns once the previous frame has left the transport's buffer
+        writer.transport.set_write_buffer_limits(high=0)
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_BUFFER)
+        wake = asyncio.Event()
+        self.clients[wake] = asyncio.current_task()
+        encoder = FrameEncoder(self.keyframe_interval)
+        sent = 0
+        if self.latest is not None:
+            wake.set()
+        try:
+            while True:
+                await wake.wait()
+                wake.clear()
+                if self.closing:
+                    break
+                sequence, frame = self.latest
+                if sequence == sent:
+                    continue
+                writer.write(encoder.encode(sequence, frame))
+                await writer.drain()  # Frames published while a slow client drains are dropped
+                if sent:
+                    self.dropped += sequence - sent - 1
+                sent = sequence
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.clients.pop(wake, None)
+            writer.close()
+
+    def close(self) -> None:
+        """Stop the server and its thread."""
+        if self.loop is None:
+            return
+
+        async def shutdown() -> None:
+            self.server.close()
+            self.closing = True
+            tasks = list(self.clients.values())
+            self.notify()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self.server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+        self.loop = None
+
+
+class FrameClient:
+    def __init__(self, path: str = None, host: str = "127.0.0.1", port: int = None) -> None:
+        """Blocking client for a FrameServer.
+
+        Args:
+            path (str, optional): Unix socket path. Defaults to None (use TCP).
+            host (str, optional): TCP host. Defaults to "127.0.0.1".
+            port (int, optional): TCP port.
+        """
+        if path is not None:
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.socket.connect(path)
+        else:
+            self.socket = socket.create_connection((host, port))
+        self.stream = self.socket.makefile("rb")
+        self.decoder = FrameDecoder()
+
+    def read(self) -> tuple:
+        """Wait for the next frame.
+
+        Returns:
+            tuple: (sequence, frame), or None once the server has closed the connection.
+        """
+        while True:
+            header = self.stream.read(HEADER.size)
+            if len(header) < HEADER.size:
+                return None
+            header = HEADER.unpack(header)
+            frame = self.decoder.decode(header, self.stream.read(header[4]))
+            if frame is not None:
+                return header[1], frame
+
+    def close(self) -> None:
+        self.stream.close()
+        self.socket.close()
+
+
+def view(client: FrameClient, scale: int = 20) -> None:
+    """Minimal pygame viewer, showing frames as they arrive until the window or stream closes.
+
+    Args:
+        client (FrameClient): Connected client.
+        scale (int, optional): Screen pixels per frame pixel. Defaults to 20.
+    """
+    import pygame  # Viewer only
+
+    pygame.init()
+    screen = None
+    while True:
+        received = client.read()
+        if received is None or pygame.event.peek(pygame.QUIT):
+            break
+        pygame.event.pump()
+        _, frame = received
+        if screen is None:
+            screen = pygame.display.set_mode((frame.shape[1] * scale, frame.shape[0] * scale))
+        # White background as in MOS6502.run_program; surfaces are indexed [x][y]
+        data = np.copy(frame)
+        data[data == 0] = 255
+        surf = pygame.surfarray.make_surface(data.T)
+        screen.blit(pygame.transform.scale(surf, screen.get_size()), (0, 0))
+        pygame.display.update()
+    pygame.quit()
@@ -0,0 +1,139 @@
+import gzip
+import itertools
+import re
+from collections import deque
+
+import cpu
+from cpu.opcode_table import INSTRUCTION_SIZES
+
+FIELDS = ("PC", "A", "X", "Y", "P", "SP", "CYC")
+FIELD_PATTERN = re.compile(r"\b(A|X|Y|P|SP):([0-9A-Fa-f]{2})\b|\bCYC:\s*(\d+)")
+
+
+def snapshot(daveNES: "cpu.MOS6502") -> tuple:
+    """Registers in FIELDS order."""
+    return (
+        int(daveNES.r_program_counter),
+        int(daveNES.r_accumulator),
+        int(daveNES.r_index_X),
+        int(daveNES.r_index_Y),
+        int(daveNES.status_to_value()),
+        int(daveNES.r_stack_pointer),
+        daveNES.cycles,
+    )
+
+
+def format_line(daveNES: "cpu.MOS6502") -> str:
+    """Trace line for the instruction about to run, in the nestest.log layout:
+    address, instruction bytes, mnemonic, then the registers and cycle count before it runs.
+    """
+    pc, a, x, y, p, sp, cycles = snapshot(daveNES)
+    opcode = int(daveNES.bus.wram.memory[pc])
+    entry = daveNES.lookup_table.get(opcode)
+    size = INSTRUCTION_SIZES[entry[2]] if entry else 1
+    code = " ".join(f"{int(daveNES.bus.wram.memory[(pc + i) & 0xFFFF]):02X}" for i in range(size))
+    mnemonic = entry[3] if entry else "???"
+    return f"{pc:04X}  {code:<8}  {mnemonic:<30}  A:{a:02X} X:{x:02X} Y:{y:02X} P:{p:02X} SP:{sp:02X} CYC:{cycles}"
+
+
+def parse_line(line: str) -> dict:
+    """Fields present in a trace line. The program counter is the leading hex address.
+
+    Returns:
+        dict: {field: value}
+    """
+    fields = {"PC": int(line[:4], 16)}
+    for name, value, cycles in FIELD_PATTERN.findall(line):
+        if name:
+            fields[name] = int(value, 16)
+        else:
+            fields["CYC"] = int(cycles)
+    return fields
+
+
+def open_trace(filename: str):
+    """Open a trace for streaming, transparently decompressing .gz files."""
+    if filename.endswith(".gz"):
+        return gzip.open(filename, "rt")
+    return open(filename)
+
+
+def record(daveNES: "cpu.MOS6502", filename: str, max_instructions: int) -> int:
+    """Write a trace of live execution, one line per instruction, until the program halts or
+    `max_instructions` have run.
+
+    Returns:
+        int: Number of lines written.
+    """
+    n = 0
+    with (gzip.open(filename, "wt") if filename.endswith(".gz") else open(filename, "w")) as f:
+        while n < max_instructions and not daveNES.r_status["flag_B0"]:
+            f.write(format_line(daveNES) + "\n")
+            daveNES.step_program()
+            n += 1
+    return n
+
+
+class Divergence:
+    def __init__(self, line_number: int, fields: list, expected: str, actual: str, before: list, after: list) -> None:
+        """First point at which live execution left the reference trace.
+
+        Args:
+            line_number (int): Trace line (1 based) which did not match.
+            fields (list): Names of the fields which differ.
+            expected (str): Reference trace line.
+            actual (str): Live state, formatted as a trace line.
+            before (list): Matching reference lines leading up to the divergence.
+            after (list): Reference lines following the divergence.
+        """
+        self.line_number = line_number
+        self.fields = fields
+        self.expected = expected
+        self.actual = actual
+        self.before = before
+        self.after = after
+
+    def __str__(self) -> str:
+        lines = [f"Divergence at line {self.line_number} ({', '.join(self.fields)})"]
+        lines += [f"    {line}" for line in self.before]
+        lines.append(f"  - {self.expected}")
+        lines.append(f"  + {self.actual}")
+        lines += [f"    {line}" for line in self.after]
+        return "\n".join(lines)
+
+
+def check(daveNES: "cpu.MOS6502", filename: str, context: int = 5, ignore: tuple = ()) -> Divergence:
+    """Stream a reference trace alongside live execution and stop at the first instruction where
+    the registers, flags or cycle count differ. Only `context` trace lines are held in memory, so
+    traces of any length can be checked.
+
+    Args:
+        daveNES (MOS6502): CPU with the program loaded, in the state of the first trace line.
+        filename (str): Reference trace (nestest.log layout, optionally gzipped).
+        context (int, optional): Lines of context kept either side of a divergence. Defaults to 5.
+        ignore (tuple, optional): Fields not to compare, e.g. ("CYC",). Defaults to ().
+
+    Returns:
+        Divergence: The first divergence, or None if the whole trace matched.
+    """
+    compared = [(i, name) for i, name in enumerate(FIELDS) if name not in ignore]
+    before = deque(maxlen=context)
+
+    with open_trace(filename) as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.rstrip("\n")
+            if not line.strip():
+                continue
+            expected = parse_line(line)
+            actual = snapshot(daveNES)
+            fields = [name for i, name in compared if name in expected and expected[name] != actual[i]]
+            if not fields and daveNES.r_status["flag_B0"]:
+                fields = ["halted"]
+            if fields:
+                after = [l.rstrip("\n") for l in itertools.islice(f, context)]
+                return Divergence(line_number, fields, line, format_line(daveNES), list(before), after)
+
+            before.append(line)
+            daveNES.step_program()
+
+    return None
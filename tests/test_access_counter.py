@@ -0,0 +1,61 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+import cpu
+from program import Program
+
+# LDX #$03; loop: INC $10; DEX; BNE loop; LDA $10; BRK
+program = "a2 03 e6 10 ca d0 fb a5 10 00".split()
+
+
+def test_access_counts():
+    """Executes, reads and writes land on the right addresses once flushed."""
+    daveNES = cpu.MOS6502(debug=False)
+    daveNES.connect_to_bus()
+    daveNES.load_program(Program(program))
+    counter = daveNES.bus.enable_access_counter(buffer_size=8)
+    while not daveNES.r_status["flag_B0"]:
+        daveNES.step_program()
+    counts = counter.counts()
+
+    assert counts["executes"][0x0602] == 3  # INC
+    assert counts["executes"][0x0609] == 1  # BRK
+    assert counts["writes"][0x10] == 3
+    assert counts["reads"][0x10] == 3 + 1  # INC read-modify-write, LDA
+    assert counter.top("writes", n=1, start=0x00, end=0xFD) == [(0x10, 3)]  # $FE is the random byte
+
+
+def test_disable_access_counter():
+    """Disabling restores the plain bus methods."""
+    daveNES = cpu.MOS6502(debug=False)
+    daveNES.connect_to_bus()
+    daveNES.bus.enable_access_counter()
+    daveNES.bus.disable_access_counter()
+
+    assert "read" not in vars(daveNES.bus)
+    assert daveNES.bus.fetch == daveNES.bus.read
+    assert daveNES.bus.access_counter is None
+
+
+def test_visualise_partial_rows(monkeypatch):
+    """A heatmap region which doesn't fill its last row is padded rather than rejected."""
+    pytest.importorskip("matplotlib")
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    daveNES = cpu.MOS6502(debug=False)
+    daveNES.connect_to_bus()
+    daveNES.load_program(Program(program))
+    counter = daveNES.bus.enable_access_counter()
+    daveNES.run_until(100)
+    images = []
+    monkeypatch.setattr(plt, "show", lambda: images.extend(ax.get_images()[0] for ax in plt.gcf().axes))
+    daveNES.bus.wram.visualise_memory(counter, start=0x0600, end=0x0734)
+    plt.close("all")
+
+    assert [image.get_array().shape for image in images][1:] == [(2, 256)] * 3
@@ -0,0 +1,80 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+import cpu
+from cpu import alu
+from program import Program
+
+
+def flags(result: int, carry: bool, overflow: bool = False) -> int:
+    return (
+        (alu.C if carry else 0)
+        | (alu.Z if result == 0 else 0)
+        | (alu.V if overflow else 0)
+        | (alu.N if result & 0x80 else 0)
+    )
+
+
+def test_add_subtract_tables():
+    """ADC and SBC tables match the widened arithmetic for every accumulator, operand and carry."""
+    for c in (0, 1):
+        for a in range(256):
+            for m in range(256):
+                index = c << 16 | a << 8 | m
+                total = a + m + c
+                result = total & 0xFF
+                assert alu.ADC[index] == result | flags(result, total > 255, ~(a ^ m) & (a ^ result) & 0x80)
+
+                total = a + (m ^ 0xFF) + c
+                result = total & 0xFF
+                assert alu.SBC[index] == result | flags(result, total > 255, ~((m ^ 0xFF) ^ a) & (a ^ result) & 0x80)
+
+
+def test_compare_and_shift_tables():
+    """CMP, ASL, LSR, ROL and ROR tables for every input."""
+    for r in range(256):
+        for m in range(256):
+            expected = (alu.C if r >= m else 0) | (alu.Z if r == m else 0) | (alu.N if (r - m) & 0x80 else 0)
+            assert alu.CMP[r << 8 | m] == expected
+
+    for v in range(256):
+        assert alu.ASL[v] == (v << 1) & 0xFF | flags((v << 1) & 0xFF, v & 0x80)
+        assert alu.LSR[v] == v >> 1 | flags(v >> 1, v & 1)
+        for c in (0, 1):
+            result = (v << 1 | c) & 0xFF
+            assert alu.ROL[c << 8 | v] == result | flags(result, v & 0x80)
+            result = v >> 1 | c << 7
+            assert alu.ROR[c << 8 | v] == result | flags(result, v & 1)
+
+
+@pytest.mark.parametrize("opcode", [0x69, 0xE9, 0xC9, 0x2A, 0x6A, 0x0A, 0x4A])
+def test_opcodes(opcode):
+    """The opcodes apply the table entries to the accumulator and status flags."""
+    daveNES = cpu.MOS6502(debug=False)
+    daveNES.connect_to_bus()
+    function, _, mode, name = daveNES.lookup_table[opcode]
+    table = getattr(alu, "CMP" if name == "CMP" else name)
+    for c in (0, 1):
+        for a in range(0, 256, 3):
+            for m in range(0, 256, 5):
+                daveNES.load_program(Program([f"{m:02x}"]))
+                daveNES.r_accumulator = np.uint8(a)
+                daveNES.r_status["flag_C"] = bool(c)
+                function(daveNES.opcodes, mode)
+
+                if name in ("ADC", "SBC"):
+                    entry = table[c << 16 | a << 8 | m]
+                elif name == "CMP":
+                    entry = table[a << 8 | m] | a
+                elif name in ("ROL", "ROR"):
+                    entry = table[c << 8 | a]
+                else:
+                    entry = table[a]
+                assert daveNES.r_accumulator == entry & 0xFF
+                assert daveNES.r_status["flag_C"] == bool(entry & alu.C)
+                assert daveNES.r_status["flag_Z"] == bool(entry & alu.Z)
+                assert daveNES.r_status["flag_N"] == bool(entry & alu.N)
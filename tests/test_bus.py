@@ -0,0 +1,54 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+import cpu
+from ppu import PPU
+
+
+def init_daveNES() -> cpu.MOS6502:
+    daveNES = cpu.MOS6502(debug=False)
+    daveNES.connect_to_bus()
+
+    return daveNES
+
+
+def test_block_round_trip():
+    """Blocks written to WRAM read back as zero copy views of the memory."""
+    daveNES = init_daveNES()
+    data = bytes(range(200))
+    daveNES.bus.write_block(0x0250, data)
+
+    block = daveNES.bus.read_block(0x0250, 200)
+    assert block.readonly
+    assert block.tobytes() == data
+    assert np.shares_memory(np.asarray(block), daveNES.bus.wram.memory)
+    assert daveNES.bus.read(0x0250 + 199) == 199
+
+
+def test_copy_block_overlap():
+    """Overlapping copies behave as if copied through a buffer."""
+    daveNES = init_daveNES()
+    daveNES.bus.write_block(0x0300, bytes(range(16)))
+    daveNES.bus.copy_block(0x0300, 0x0304, 16)
+
+    assert daveNES.bus.read_block(0x0300, 20).tobytes() == bytes([0, 1, 2, 3]) + bytes(range(16))
+
+
+def test_block_across_devices():
+    """Blocks spanning device pages route those bytes through the device registers."""
+    daveNES = init_daveNES()
+    ppu = PPU(daveNES)
+    ppu.connect_to_bus()
+    daveNES.bus.write_block(0x1FFE, bytes([0xAA, 0xBB, 0x80, 0x00]))
+
+    assert ppu.registers[0] == 0x80
+    block = daveNES.bus.read_block(0x1FFE, 4)
+    assert list(block) == [0xAA, 0xBB, 0x80, 0x00]
+    assert not np.shares_memory(np.asarray(block), daveNES.bus.wram.memory)
+
+    with pytest.raises(ValueError):
+        daveNES.bus.read_block(0xFFF0, 0x20)
@@ -0,0 +1,49 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+import cpu
+from ppu import PPU
+from program import Program
+
+programs_dir = os.path.join(os.path.dirname(__file__), "..", "programs")
+
+
+def init_daveNES() -> cpu.MOS6502:
+    daveNES = cpu.MOS6502(debug=False)
+    daveNES.connect_to_bus()
+    daveNES.load_program(Program.from_file(os.path.join(programs_dir, "snake_game.txt")))
+    daveNES.ppu = PPU(daveNES)
+    daveNES.ppu.connect_to_bus()
+
+    return daveNES
+
+
+def test_clone_is_independent():
+    """A clone starts in the same state and then runs independently of its parent."""
+    parent = init_daveNES()
+    np.random.seed(0)
+    parent.run_until(5_000)
+    child = parent.clone()
+
+    assert child.lookup_table is parent.lookup_table
+    assert child.opcodes.cpu is child
+    assert child.ppu is not parent.ppu and child.ppu.cpu is child
+    assert child.bus.io_pages[0x20] is child.ppu
+    assert [e[2] for e in child.scheduler.queue] == [e[2] for e in parent.scheduler.queue]
+
+    child.bus.write(0xFF, 0x77)
+    assert parent.bus.read(0xFF) != 0x77
+
+    # Same inputs and random stream give the same future
+    child.bus.write(0xFF, parent.bus.read(0xFF))
+    for daveNES in (parent, child):
+        np.random.seed(1)
+        daveNES.run_until(20_000)
+        daveNES.ppu.sync()
+    assert parent.cycles == child.cycles
+    assert parent.ppu.dots == child.ppu.dots
+    assert np.array_equal(parent.bus.wram.memory, child.bus.wram.memory)
+    assert not np.shares_memory(parent.bus.wram.memory, child.bus.wram.memory)
@@ -29,17 +29,18 @@ def get_json(json_filename: str = json_test) -> dict:
 
     return test
 
-def init_daveNES(test: dict):
+def init_daveNES(test: dict, **kwargs):
     """Initialises daveNES object and loads the test parameters into the appropriate
     registers and memory locations.
 
     Args:
         test (dict): json test
+        **kwargs: Passed to MOS6502, e.g. to select the backend.
 
     Returns:
         daveNES: Initialised daveNES object.
     """
-    daveNES = cpu.MOS6502()
+    daveNES = cpu.MOS6502(**kwargs)
     daveNES.connect_to_bus()
 
     # Load test program
@@ -56,18 +57,22 @@ def init_daveNES(test: dict):
     return daveNES
 
 # @pytest.mark.parametrize('json_filename, i',(all_json_files, np.arange(10)))
+@pytest.mark.parametrize("backend", ["python", "numba"])
 @pytest.mark.parametrize("json_filename, i", zip(json_files_reshaped, inds))
-def test_daveNES(i, json_filename):
+def test_daveNES(i, json_filename, backend):
     """Unit test for daveNES. Iterates over the json file. Decorated with a pytest
-    parametrize so as to iterate over the whole list of json test files.
+    parametrize so as to iterate over the whole list of json test files, for each backend.
 
     Args:
         i (int): Iterate of json
         json_filename (str): unit test file.
+        backend (str): MOS6502 backend.
     """
+    if backend == "numba":
+        pytest.importorskip("numba")
     print(f'ind: {i}, filename: {json_filename}')
     test = get_json(json_filename)[i]
-    daveNES = init_daveNES(test)
+    daveNES = init_daveNES(test, debug=backend == "python", backend=backend)
 
     daveNES.step_program()
 
@@ -0,0 +1,74 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+import cpu
+from program import Program
+
+programs_dir = os.path.join(os.path.dirname(__file__), "..", "programs")
+
+
+def init_daveNES(program: Program) -> cpu.MOS6502:
+    daveNES = cpu.MOS6502(debug=False)
+    daveNES.connect_to_bus()
+    daveNES.load_program(program)
+
+    return daveNES
+
+
+def test_breakpoint():
+    """Runs stop before a breakpoint's instruction, and resume past it."""
+    daveNES = init_daveNES(Program.from_file(os.path.join(programs_dir, "jsr_rts.txt")))
+    debugger = daveNES.enable_debugger()
+    debugger.add_breakpoint(0x060C)  # INX, the top of the loop
+
+    for x in range(5):
+        daveNES.run_until(10_000)
+        assert debugger.hit == ("break", 0x060C, None)
+        assert daveNES.r_program_counter == 0x060C
+        assert daveNES.r_index_X == x
+
+    daveNES.run_until(10_000)
+    assert debugger.hit is None
+    assert daveNES.r_status["flag_B0"]
+
+
+def test_conditional_breakpoint():
+    """Conditional breakpoints only stop when the condition holds."""
+    daveNES = init_daveNES(Program.from_file(os.path.join(programs_dir, "jsr_rts.txt")))
+    debugger = daveNES.enable_debugger()
+    debugger.add_breakpoint(0x060C, condition=lambda cpu: cpu.r_index_X == 3)
+
+    daveNES.run_until(10_000)
+    assert debugger.hit == ("break", 0x060C, None)
+    assert daveNES.r_index_X == 3
+
+
+def test_watchpoint():
+    """Watchpoints stop after the instruction accessing the address."""
+    # LDA #$77; STA $FF; LDX $FF; BRK
+    daveNES = init_daveNES(Program("a9 77 85 ff a6 ff 00".split()))
+    debugger = daveNES.enable_debugger()
+    debugger.add_watchpoint(0xFF, kind="access")
+
+    daveNES.run_until(10_000)
+    assert debugger.hit == ("write", 0xFF, 0x77)
+    assert daveNES.r_program_counter == 0x0604
+
+    daveNES.run_until(10_000)
+    assert debugger.hit == ("read", 0xFF, 0x77)
+    assert daveNES.r_index_X == 0x77
+
+
+def test_uninstrumented_when_empty():
+    """With nothing set the CPU and bus run their plain methods."""
+    daveNES = init_daveNES(Program.from_file(os.path.join(programs_dir, "jsr_rts.txt")))
+    debugger = daveNES.enable_debugger()
+    debugger.add_breakpoint(0x060C)
+    debugger.add_watchpoint(0x01FF)
+    assert "run_until" in vars(daveNES) and "write" in vars(daveNES.bus)
+
+    debugger.clear()
+    assert not debugger.active
+    assert "run_until" not in vars(daveNES)
+    assert not {"read", "write", "read_u16", "write_u16"} & set(vars(daveNES.bus))
@@ -0,0 +1,125 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+import cpu
+from disassembler import CodeMap, analyse, analyse_program
+from program import Program
+
+programs_dir = os.path.join(os.path.dirname(__file__), "..", "programs")
+
+
+def init_daveNES(program: Program) -> cpu.MOS6502:
+    daveNES = cpu.MOS6502(debug=False)
+    daveNES.connect_to_bus()
+    daveNES.load_program(program)
+    return daveNES
+
+
+def test_snake_graph():
+    """The snake program is traced from the reset vector through its subroutines and loops."""
+    code_map = analyse_program(Program.from_file(os.path.join(programs_dir, "snake_game.txt")))
+
+    assert code_map.entries == {0x0600: "reset"}
+    assert len(code_map.blocks) == 67 and len(code_map.instructions) == 165
+    assert code_map.data() == [] and code_map.unresolved == [] and code_map.invalid == []
+    assert code_map.blocks[0x0600].successors == {0x0606: "call", 0x0603: "return"}
+    # spinWheels: a two NOP delay loop
+    assert code_map.blocks[0x072F].successors == {0x072F: "branch", 0x0734: "fall"}
+    assert code_map.blocks[0x072F].predecessors == {0x072D: "fall", 0x0732: "branch"}
+
+    listing = code_map.listing()
+    assert "$0600  20 06 06  JSR sub_0606" in listing
+    assert "$0732  D0 FB     BNE L_072F" in listing
+    assert '"0638" -> "064D" [label="call", style=dashed];' in code_map.to_dot()
+
+
+def test_code_and_data():
+    """Bytes never reached from an entry point are listed as data, and indirect jumps are flagged."""
+    # JMP $0606; .byte 1, 2, 3; LDA #$01; JMP ($0200)
+    program = Program("4C 06 06 01 02 03 A9 01 6C 00 02".split())
+    code_map = analyse_program(program)
+
+    assert sorted(code_map.instructions) == [0x0600, 0x0606, 0x0608]
+    assert code_map.data() == [(0x0603, 0x0606)]
+    assert code_map.unresolved == [0x0608]
+    listing = code_map.listing()
+    assert "$0603  .byte $01, $02, $03" in listing
+    assert "JMP ($0200)  ; target unknown" in listing
+
+
+def test_save_and_load(tmp_path):
+    """A saved map keeps the entry points and block graph."""
+    code_map = analyse_program(Program.from_file(os.path.join(programs_dir, "snake_game.txt")))
+    filename = str(tmp_path / "snake.json")
+    code_map.save(filename)
+    loaded = CodeMap.load(filename)
+
+    assert loaded.entries == code_map.entries
+    assert loaded.calls == code_map.calls
+    assert {s: b.successors for s, b in loaded.blocks.items()} == {s: b.successors for s, b in code_map.blocks.items()}
+
+
+def run_snake(daveNES: cpu.MOS6502, frames: int) -> None:
+    for frame in range(frames):
+        daveNES.bus.write(0xFF, (0x77, 0x64, 0x73, 0x61)[frame // 2 % 4])
+        daveNES.run_until(daveNES.cycles + 29781)
+
+
+def test_block_cache_matches_interpreter():
+    """Running a block at a time gives exactly the same machine state as stepping, and a code map
+    removes the misses of the first frames.
+    """
+    program = Program.from_file(os.path.join(programs_dir, "snake_game.txt"))
+    results = []
+    for mode in ("step", "lazy", "map"):
+        np.random.seed(3)
+        daveNES = init_daveNES(program)
+        if mode != "step":
+            cache = daveNES.enable_block_cache(analyse_program(program) if mode == "map" else None)
+        run_snake(daveNES, 6)
+        results.append((daveNES.cycles, daveNES.instructions, daveNES.status_to_value(), bytes(daveNES.bus.wram.memory)))
+
+    assert results[0] == results[1] == results[2]
+    assert cache.misses == 0 and cache.hits > 0
+
+
+def test_block_cache_invalidation():
+    """A block whose code has been overwritten is translated again."""
+    # LDA #$01; INX; BRK
+    daveNES = init_daveNES(Program("A9 01 E8 00".split()))
+    cache = daveNES.enable_block_cache()
+    cache.translate(0x0600)
+    daveNES.bus.write(0x0602, 0xC8)  # INX becomes INY
+
+    daveNES.run_until(100)
+    assert daveNES.r_index_Y == 1 and daveNES.r_index_X == 0
+    assert cache.invalidations == 1
+
+    daveNES.disable_block_cache()
+    assert "run_until" not in vars(daveNES)
+
+
+def test_block_cache_with_breakpoints():
+    """Breakpoints take over from the block cache while set, whichever was enabled first, and
+    removing them leaves the cache in use only if it is still enabled.
+    """
+    # LDA #$01; INX; INX; BRK
+    daveNES = init_daveNES(Program("A9 01 E8 E8 00".split()))
+    debugger = daveNES.enable_debugger()
+    debugger.add_breakpoint(0x0603)
+    cache = daveNES.enable_block_cache()
+    daveNES.run_until(100)
+    assert debugger.hit == ("break", 0x0603, None) and daveNES.r_index_X == 1
+
+    debugger.remove_breakpoint(0x0603)
+    assert daveNES.run_until == cache.run_until
+    daveNES.run_until(100)
+    assert daveNES.r_index_X == 2 and cache.hits + cache.misses > 0
+
+    debugger.add_breakpoint(0x0600)
+    daveNES.disable_block_cache()
+    debugger.remove_breakpoint(0x0600)
+    assert "run_until" not in vars(daveNES)
@@ -0,0 +1,69 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+from env import ACTIONS, SnakeEnv, SubprocessVecEnv
+from saveram import SaveRAM
+
+
+def test_snake_env():
+    """Steps write the action to $FF, run the requested frames and return a view of the screen."""
+    env = SnakeEnv(frame_skip=2, cycles_per_frame=1000)
+    observation = env.reset(seed=0)
+    assert observation.shape == (32, 32)
+    assert np.shares_memory(observation, env.cpu.bus.wram.memory)
+
+    observation, reward, done, info = env.step(1)
+    assert env.cpu.bus.read(0xFF) == ACTIONS[1]
+    assert info["cycles"] >= 2000
+    assert info["length"] == 4
+    assert observation.any()
+
+
+def test_seeded_runs_match():
+    """Two environments with the same seed and actions produce the same screens."""
+    screens = []
+    for _ in range(2):
+        env = SnakeEnv(frame_skip=1, cycles_per_frame=3000)
+        env.reset(seed=3)
+        for action in (1, 1, 2, 2):
+            observation, _, _, _ = env.step(action)
+        screens.append(np.copy(observation))
+
+    assert np.array_equal(*screens)
+
+
+def test_reset_through_bus(tmp_path):
+    """Reset clears memory through the bus, so device pages are cleared and the state hash sees
+    every page change.
+    """
+    env = SnakeEnv(frame_skip=1, cycles_per_frame=3000)
+    env.cpu.bus.enable_state_hash()
+    save_ram = SaveRAM(env.cpu, str(tmp_path / "env.sav"))
+    save_ram.connect_to_bus()
+    env.reset(seed=3)
+    expected = env.cpu.fingerprint()
+    env.step(1)
+    env.cpu.bus.write(0x6000, 0x12)
+
+    env.reset(seed=3)
+    assert env.cpu.bus.read(0x6000) == 0
+    assert env.cpu.fingerprint() == expected
+    save_ram.close()
+
+
+def test_subprocess_vec_env():
+    """Observations from the worker processes arrive through the shared array."""
+    vec_env = SubprocessVecEnv(2, frame_skip=1, cycles_per_frame=3000)
+    try:
+        observations = vec_env.reset([0, 0])
+        observations, rewards, dones, infos = vec_env.step([1, 1])
+
+        assert observations.shape == (2, 32, 32)
+        assert np.array_equal(observations[0], observations[1])
+        assert observations[0].any()
+        assert rewards.shape == dones.shape == (2,)
+    finally:
+        vec_env.close()
@@ -0,0 +1,74 @@
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+import farm
+
+programs_dir = os.path.join(os.path.dirname(__file__), "..", "programs")
+run_session = farm.run_session
+
+
+def crashing_run_session(session: dict) -> dict:
+    """run_session, except that seed 13 kills the worker process. The other sessions take a
+    moment, so they are still running when it does.
+    """
+    if session["seed"] == 13:
+        os._exit(1)
+    time.sleep(0.05)
+    return run_session(session)
+
+
+def test_farm(tmp_path):
+    """Every session is streamed to the JSON Lines file, and identical sessions hash identically."""
+    programs = [os.path.join(programs_dir, p) for p in ("jsr_rts.txt", "branch_program.txt")]
+    sessions = farm.make_sessions(programs, [1, 1], None, 10_000)
+    out = tmp_path / "results.jsonl"
+    farm.farm(sessions, str(out), workers=2)
+
+    with open(out) as f:
+        results = [json.loads(line) for line in f]
+    assert len(results) == 4
+    assert all(r["status"] == "halted" for r in results)
+
+    jsr_rts = [r for r in results if r["program"].endswith("jsr_rts.txt")]
+    assert jsr_rts[0]["state_hash"] == jsr_rts[1]["state_hash"]
+    assert jsr_rts[0]["instructions"] == 22
+    assert jsr_rts[0]["cycles"] == 69
+
+
+def test_load_movie(tmp_path):
+    """Movie lines map an instruction count to the byte written to $FF."""
+    movie = tmp_path / "movie.txt"
+    movie.write_text("# snake inputs\n10 77\n\n250 64\n")
+
+    assert farm.load_movie(str(movie)) == {10: 0x77, 250: 0x64}
+
+
+def test_crash_retries(tmp_path, monkeypatch):
+    """A session which keeps crashing its worker uses up only its own retries, and the sessions
+    queued behind it still run.
+    """
+    monkeypatch.setattr(farm, "run_session", crashing_run_session)
+    program = os.path.join(programs_dir, "jsr_rts.txt")
+    sessions = farm.make_sessions([program], [13, 1, 2, 3, 4], None, 10_000)
+    results = farm.farm(sessions, str(tmp_path / "results.jsonl"), workers=1, retries=1)
+
+    assert len(results) == 5
+    assert [r["seed"] for r in results if r["status"] == "crashed"] == [13]
+    assert sorted(r["seed"] for r in results if r["status"] == "halted") == [1, 2, 3, 4]
+
+
+def test_crash_retries_shared_pool(tmp_path, monkeypatch):
+    """A healthy session running alongside a crashing one in the same pool is not charged for the
+    crash: it is rerun alone and completes.
+    """
+    monkeypatch.setattr(farm, "run_session", crashing_run_session)
+    program = os.path.join(programs_dir, "jsr_rts.txt")
+    sessions = farm.make_sessions([program], [13, 1, 2, 3], None, 10_000)
+    results = farm.farm(sessions, str(tmp_path / "results.jsonl"), workers=2, retries=1)
+
+    assert len(results) == 4
+    assert [r["seed"] for r in results if r["status"] == "crashed"] == [13]
+    assert sorted(r["seed"] for r in results if r["status"] == "halted") == [1, 2, 3]
@@ -0,0 +1,54 @@
+import multiprocessing
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+from framebuffer import FramePublisher, FrameSubscriber
+
+
+def read_latest(name: str, queue: multiprocessing.Queue) -> None:
+    subscriber = FrameSubscriber(name)
+    sequence, frame = subscriber.latest()
+    queue.put((sequence, int(frame.sum()), subscriber.is_current(sequence)))
+    subscriber.close()
+
+
+def test_double_buffer():
+    """Frames alternate between the two buffers and readers see the latest complete frame."""
+    publisher = FramePublisher()
+    subscriber = FrameSubscriber(publisher.name)
+    try:
+        assert subscriber.latest()[0] == 0
+
+        publisher.publish(np.full(32 * 32, 1, dtype=np.uint8))
+        sequence, frame = subscriber.latest()
+        assert sequence == 1
+        assert frame.shape == (32, 32)
+        assert np.all(frame == 1)
+
+        publisher.publish(np.full((32, 32), 2, dtype=np.uint8))
+        assert not subscriber.is_current(sequence)
+        sequence, frame = subscriber.latest()
+        assert sequence == 2
+        assert np.all(frame == 2)
+        assert subscriber.is_current(sequence)
+    finally:
+        subscriber.close()
+        publisher.close()
+
+
+def test_other_process():
+    """A separate process maps the latest frame by name."""
+    publisher = FramePublisher(shape=(4, 8))
+    try:
+        publisher.publish(np.arange(32, dtype=np.uint8))
+        queue = multiprocessing.Queue()
+        process = multiprocessing.Process(target=read_latest, args=(publisher.name, queue))
+        process.start()
+        process.join()
+
+        assert queue.get() == (1, sum(range(32)), True)
+    finally:
+        publisher.close()
@@ -0,0 +1,28 @@
+import json
+import os
+import subprocess
+import sys
+
+src = os.path.join(os.path.dirname(__file__), "..", "src")
+
+# Import the core with NumPy already loaded, so only the emulator's own import cost is timed
+script = """
+import json, sys, time
+import numpy
+start = time.perf_counter()
+import cpu, program
+elapsed = time.perf_counter() - start
+print(json.dumps({"elapsed": elapsed, "modules": sorted(sys.modules)}))
+"""
+
+
+def test_headless_import():
+    """The core package imports without pygame or matplotlib, and quickly."""
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=src, capture_output=True, text=True, check=True
+    )
+    startup = json.loads(result.stdout)
+
+    assert "pygame" not in startup["modules"]
+    assert "matplotlib" not in startup["modules"]
+    assert startup["elapsed"] < 0.25
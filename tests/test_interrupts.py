@@ -0,0 +1,71 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+import cpu
+from program import Program
+
+# $0600: CLI; INX; JMP $0601
+# $0605: INY; RTI (interrupt handler)
+program = "58 e8 4c 01 06 c8 40".split()
+
+
+def init_daveNES() -> cpu.MOS6502:
+    """Initialises daveNES object with the test program loaded and both interrupt
+    vectors pointing at the handler at $0605.
+
+    Returns:
+        daveNES: Initialised daveNES object.
+    """
+    daveNES = cpu.MOS6502()
+    daveNES.connect_to_bus()
+    daveNES.load_program(Program(program))
+    daveNES.bus.write_u16(0xFFFA, 0x0605)
+    daveNES.bus.write_u16(0xFFFE, 0x0605)
+
+    return daveNES
+
+
+def test_nmi():
+    """NMI is delivered at the scheduled cycle and RTI returns to the interrupted code."""
+    daveNES = init_daveNES()
+    daveNES.scheduler.schedule_nmi(4)
+    daveNES.step_program()  # CLI (2 cycles)
+    daveNES.step_program()  # INX (2 cycles)
+    assert daveNES.r_program_counter == 0x0602
+
+    daveNES.step_program()  # NMI entry then INY
+    assert daveNES.r_index_Y == 1
+    assert daveNES.r_stack_pointer == 0xFC
+    assert daveNES.r_status["flag_I"]
+    assert daveNES.cycles == 4 + 7 + 2
+
+    daveNES.step_program()  # RTI
+    assert daveNES.r_program_counter == 0x0602
+    assert daveNES.r_stack_pointer == 0xFF
+    assert not daveNES.r_status["flag_I"]
+
+
+def test_irq_masked():
+    """IRQ stays pending while the I flag is set and is taken once it is cleared."""
+    daveNES = init_daveNES()
+    daveNES.scheduler.schedule_irq(0)
+    daveNES.step_program()  # IRQ masked after reset, so CLI runs
+    assert daveNES.r_program_counter == 0x0601
+
+    daveNES.step_program()  # IRQ taken, then INY
+    assert daveNES.r_index_Y == 1
+    assert daveNES.bus.read(0x01FD) & 0b0001_0000 == 0  # B flag clear on the stack
+
+
+def test_brk():
+    """BRK pushes PC + 2 with the B flag set and jumps through $FFFE."""
+    daveNES = init_daveNES()
+    daveNES.bus.write(0x0601, 0x00)  # Replace INX with BRK
+    daveNES.step_program()
+    daveNES.step_program()
+
+    assert daveNES.r_program_counter == 0x0605
+    assert daveNES.bus.read_u16(0x01FE) == 0x0603
+    assert daveNES.bus.read(0x01FD) & 0b0001_0000
+    assert not daveNES.r_status["flag_B0"]
@@ -0,0 +1,153 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+import cpu
+from ppu import PPU
+from program import Program
+from saveram import SaveRAM
+
+pytest.importorskip("numba")
+
+programs_dir = os.path.join(os.path.dirname(__file__), "..", "programs")
+
+
+def init_daveNES(program: Program, backend: str) -> cpu.MOS6502:
+    daveNES = cpu.MOS6502(debug=False, backend=backend)
+    daveNES.connect_to_bus()
+    daveNES.load_program(program)
+
+    return daveNES
+
+
+def state(daveNES: cpu.MOS6502) -> tuple:
+    memory = np.copy(daveNES.bus.wram.memory)
+    memory[0xFE] = 0  # Random byte for the snake program
+    return (
+        int(daveNES.r_program_counter),
+        int(daveNES.r_stack_pointer),
+        int(daveNES.r_accumulator),
+        int(daveNES.r_index_X),
+        int(daveNES.r_index_Y),
+        int(daveNES.status_to_value()),
+        daveNES.cycles,
+        memory.tobytes(),
+    )
+
+
+@pytest.mark.parametrize("filename", ["branch_program.txt", "jsr_rts.txt", "jump_program.txt", "program2.txt"])
+def test_matches_python(filename):
+    """The compiled loop reaches the same state as the Python core."""
+    program = Program.from_file(os.path.join(programs_dir, filename))
+    python, numba = init_daveNES(program, "python"), init_daveNES(program, "numba")
+    assert numba.backend == "numba"
+
+    assert python.run_until(10_000) == numba.run_until(10_000)
+    assert state(python) == state(numba)
+
+
+def test_step_matches_python():
+    """Single stepping through the compiled loop matches the Python core."""
+    program = Program.from_file(os.path.join(programs_dir, "jsr_rts.txt"))
+    python, numba = init_daveNES(program, "python"), init_daveNES(program, "numba")
+    for _ in range(10):
+        python.step_program()
+        numba.step_program()
+        assert state(python) == state(numba)
+
+
+def test_io_handoff():
+    """Device register accesses and due events are handed back to Python."""
+    # LDA #$80; STA $2000; loop: BIT $2002; BPL loop; BRK
+    program = Program("a9 80 8d 00 20 2c 02 20 10 fb 00".split())
+    daveNES = init_daveNES(program, "numba")
+    daveNES.bus.write_u16(0xFFFA, 0x060A)  # NMI straight into the BRK
+    ppu = PPU(daveNES)
+    ppu.connect_to_bus()
+    daveNES.run_until(100_000)
+
+    assert daveNES.r_status["flag_B0"]
+    assert ppu.frame == 0
+    assert ppu.registers[0] == 0x80
+    assert daveNES.cycles >= PPU.VBLANK_START // 3
+
+
+@pytest.mark.parametrize(
+    "code, memory, steps, expected",
+    [
+        ("08 68", {}, 2, (0x0602, 0x34)),  # PHP; PLA: the pushed status has both B flags set
+        ("00 ea 68", {0xFFFE: 0x02, 0xFFFF: 0x06}, 2, (0x0603, 0x34)),  # BRK into PLA
+        ("6c ff 02", {0x02FF: 0x34, 0x0300: 0x56, 0x0200: 0x12}, 1, (0x1234, 0)),  # JMP ($02FF)
+    ],
+)
+def test_semantics_match_python(code, memory, steps, expected):
+    """Single steps of PHP, BRK and JMP ($xxFF), whose pointer wraps within its page, through the
+    compiled loop match the Python core.
+    """
+    python, numba = init_daveNES(Program(code.split()), "python"), init_daveNES(Program(code.split()), "numba")
+    for daveNES in (python, numba):
+        for addr, value in memory.items():
+            daveNES.bus.write(addr, value)
+    for _ in range(steps):
+        python.step_program()
+        numba.step_program()
+        assert state(python) == state(numba)
+    assert (python.r_program_counter, python.r_accumulator) == expected
+
+
+def test_php_plp_across_backends():
+    """A status pushed by the compiled loop (B set) and pulled by the Python core doesn't halt."""
+    # PHP; PLP; INX; INX; BRK
+    program = Program("08 28 e8 e8 00".split())
+    daveNES = init_daveNES(program, "numba")
+    daveNES.scheduler.schedule(3, lambda cycle: None)  # Sends the PLP through the Python core
+    daveNES.run_until(100)
+
+    assert daveNES.r_index_X == 2
+    assert daveNES.r_program_counter == 0x0606  # Halted by the BRK, past its padding byte
+
+
+def test_code_in_device_page(tmp_path):
+    """Code, operands and pointers in a device mapped page are read from the device, not the WRAM
+    underneath.
+    """
+    # JMP $6000
+    daveNES = init_daveNES(Program("4c 00 60".split()), "numba")
+    save_ram = SaveRAM(daveNES, str(tmp_path / "code.sav"))
+    save_ram.connect_to_bus()
+    daveNES.bus.write_block(0x6000, bytes.fromhex("e8 e8 ad 00 70 4c 10 06"))  # INX; INX; LDA $7000; JMP $0610
+    daveNES.bus.write_block(0x0610, bytes.fromhex("6c 00 61"))  # JMP ($6100)
+    daveNES.bus.write_block(0x0620, bytes.fromhex("ac 01 70 00"))  # LDY $7001; BRK
+    daveNES.bus.write_block(0x6100, bytes.fromhex("20 06"))
+    daveNES.bus.write_block(0x7000, bytes.fromhex("42 24"))
+    daveNES.run_until(100)
+    save_ram.close()
+
+    assert (daveNES.r_index_X, daveNES.r_accumulator, daveNES.r_index_Y) == (2, 0x42, 0x24)
+    assert daveNES.r_program_counter == 0x0625  # Halted by the BRK, past its padding byte
+    assert daveNES.bus.io_mask[0x60] == 1 and daveNES.bus.io_mask[0x06] == 0
+
+
+def test_seeded_runs_match():
+    """Seeding the machine seeds the compiled loop's generator, which the Python core shares when
+    the loop hands off, so numba runs are reproducible.
+    """
+    program = Program.from_file(os.path.join(programs_dir, "snake_game.txt"))
+    fingerprints = []
+    for _ in range(2):
+        daveNES = init_daveNES(program, "numba")
+        daveNES.seed(3)
+        for cycle in range(1000, 20_000, 1000):
+            daveNES.scheduler.schedule(cycle, lambda cycle: None)  # Hands off to the Python core
+        daveNES.run_until(20_000)
+        fingerprints.append(daveNES.fingerprint())
+    assert fingerprints[0] == fingerprints[1]
+
+
+def test_debug_warns():
+    """The compiled loop can't print each step, so asking for both warns."""
+    with pytest.warns(UserWarning, match="debug=False"):
+        cpu.MOS6502(debug=True, backend="numba")
@@ -0,0 +1,52 @@
+import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+import cpu
+from env import SnakeEnv
+from program import Program
+
+programs_dir = os.path.join(os.path.dirname(__file__), "..", "programs")
+
+
+def test_counters_and_rates():
+    """Sampling reads the CPU counts and derives the per second rates."""
+    daveNES = cpu.MOS6502(debug=False)
+    daveNES.connect_to_bus()
+    daveNES.load_program(Program.from_file(os.path.join(programs_dir, "jsr_rts.txt")))
+    metrics = daveNES.enable_metrics()
+
+    instructions = daveNES.run_until(10_000)
+    metrics.sample(frames=1, dropped=1)
+    values = metrics.as_dict()
+
+    assert values["instructions_total"] == daveNES.instructions == instructions == 22
+    assert values["cycles_total"] == daveNES.cycles
+    assert values["frames_total"] == values["dropped_frames_total"] == 1
+    assert values["instructions_per_second"] > 0
+    assert values["speed_ratio"] == values["cycles_per_second"] / metrics.clock
+
+
+def test_exports(tmp_path):
+    """Metrics export as JSON Lines and the Prometheus text format, including custom sources."""
+    env = SnakeEnv(frame_skip=2)
+    metrics = env.cpu.enable_metrics()
+    metrics.gauge("snake_length", "Length of the snake", lambda: int(env.cpu.bus.read(0x03)))
+    env.reset(seed=0)
+    env.step(0)
+
+    log = tmp_path / "metrics.jsonl"
+    metrics.write_jsonl(str(log))
+    metrics.write_jsonl(str(log))
+    lines = [json.loads(line) for line in log.read_text().splitlines()]
+    assert len(lines) == 2
+    assert lines[0]["frames_total"] == 2
+    assert lines[0]["snake_length"] == env.cpu.bus.read(0x03)
+
+    prom = tmp_path / "davenes.prom"
+    metrics.write_prometheus(str(prom))
+    text = prom.read_text()
+    assert "# TYPE davenes_frames_total counter\ndavenes_frames_total 2\n" in text
+    assert "# TYPE davenes_speed_ratio gauge" in text
+    assert sorted(os.listdir(tmp_path)) == ["davenes.prom", "metrics.jsonl"]  # No temporary file left
@@ -0,0 +1,84 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+from pacing import FramePacer
+
+
+class FakeClock:
+    """Clock which only moves when slept on or advanced by the test."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def make_pacer(**kwargs) -> tuple:
+    clock = FakeClock()
+    pacer = FramePacer(fps=10, clock=clock, sleep=clock.sleep, **kwargs)
+    pacer.start()
+    return pacer, clock
+
+
+def test_sleeps_until_deadline():
+    """A host ahead of schedule sleeps off the rest of each frame and renders every frame."""
+    pacer, clock = make_pacer()
+    for _ in range(5):
+        clock.now += 0.03  # Emulating a frame takes 30ms of a 100ms period
+        assert pacer.end_frame()
+
+    assert len(clock.slept) == 5 and all(abs(s - 0.07) < 1e-9 for s in clock.slept)
+    assert abs(clock.now - 0.5) < 1e-9
+    assert pacer.dropped == 0
+
+
+def test_skips_rendering_when_behind():
+    """A slow host skips up to max_skip frames in a row, then renders one regardless."""
+    pacer, clock = make_pacer(max_skip=2)
+    renders = []
+    for _ in range(6):
+        clock.now += 0.15  # Every frame takes 150ms of a 100ms period
+        renders.append(pacer.end_frame())
+
+    assert renders == [False, False, True, False, False, True]
+    assert pacer.frames == 6 and pacer.dropped == 4
+    assert clock.slept == []
+
+
+def test_catches_up():
+    """After a stall, frames go unrendered until emulation is back on schedule."""
+    pacer, clock = make_pacer()
+    clock.now += 0.25  # 2.5 periods late, within max_skip
+    assert not pacer.end_frame()
+    assert not pacer.end_frame()
+    assert pacer.end_frame()  # Back ahead of the deadline at 0.3s
+    assert clock.slept and abs(clock.now - 0.3) < 1e-9
+
+
+def test_resynchronises_after_long_stall():
+    """A stall longer than max_skip frames moves the schedule forward instead of catching up."""
+    pacer, clock = make_pacer(max_skip=4)
+    clock.now += 10.0
+    assert not pacer.end_frame()
+    assert abs(pacer.deadline - 10.1) < 1e-9
+    clock.now += 0.01
+    assert pacer.end_frame()  # On time again straight away
+
+
+def test_turbo():
+    """Turbo mode never sleeps and renders at the target rate of wall clock time."""
+    pacer, clock = make_pacer(turbo=True)
+    for _ in range(100):
+        clock.now += 0.01  # Ten frames per period
+        pacer.end_frame()
+
+    assert clock.slept == []
+    assert pacer.frames == 100
+    assert 9 <= pacer.rendered <= 10
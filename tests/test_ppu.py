@@ -0,0 +1,95 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+import cpu
+from ppu import OAMDMA, PPU
+from program import Program
+
+# $0600: LDA #$80; STA $2000; INX; JMP $0605
+# $060A: INC $10; BIT $2002; RTI (NMI handler)
+program = "a9 80 8d 00 20 e8 4c 05 06 00 e6 10 2c 02 20 40".split()
+
+
+def init_daveNES(lazy: bool) -> cpu.MOS6502:
+    """Initialises daveNES object with a PPU attached and the test program loaded.
+
+    Args:
+        lazy (bool): Whether the PPU catches up lazily or in lockstep.
+
+    Returns:
+        daveNES: Initialised daveNES object.
+    """
+    daveNES = cpu.MOS6502()
+    daveNES.connect_to_bus()
+    daveNES.load_program(Program(program))
+    daveNES.bus.write_u16(0xFFFA, 0x060A)
+    daveNES.ppu = PPU(daveNES, lazy=lazy)
+    daveNES.ppu.connect_to_bus()
+
+    return daveNES
+
+
+def test_lazy_matches_lockstep():
+    """Lazy catch-up gives the same machine state as lockstep stepping, with far fewer syncs."""
+    lazy, lockstep = init_daveNES(True), init_daveNES(False)
+    for _ in range(60_000):
+        lazy.step_program()
+        lockstep.step_program()
+    lazy.ppu.sync()
+    lockstep.ppu.sync()
+
+    assert lazy.ppu.frame == lockstep.ppu.frame == 5
+    assert lazy.bus.read(0x10) == lockstep.bus.read(0x10) == 5  # One NMI per vblank
+    assert lazy.r_program_counter == lockstep.r_program_counter
+    assert lazy.r_index_X == lockstep.r_index_X
+    assert lazy.cycles == lockstep.cycles
+    lazy.bus.write(0xFE, 0)  # Random byte for the snake program
+    lockstep.bus.write(0xFE, 0)
+    assert np.array_equal(lazy.bus.wram.memory, lockstep.bus.wram.memory)
+    assert lazy.ppu.catch_ups < 20
+    assert lockstep.ppu.catch_ups > 50_000
+
+
+def test_vblank_flag():
+    """PPUSTATUS reports vblank after the vblank start and clears it when read."""
+    daveNES = init_daveNES(True)
+    daveNES.cycles = PPU.VBLANK_START // 3 + 1
+
+    assert daveNES.bus.read(0x2002) & 0x80
+    assert daveNES.bus.read(0x2002) & 0x80 == 0
+    assert daveNES.ppu.catch_ups == 1
+
+
+@pytest.mark.parametrize(
+    "store, cycles, stall",
+    [
+        ("8d 14 40", 4, 514),  # STA $4014, writing on cycle 11
+        ("9d 14 40", 5, 513),  # STA $4014,X, writing on cycle 12
+        ("91 20", 6, 514),  # STA ($20),Y, writing on cycle 13
+    ],
+)
+def test_oam_dma(store, cycles, stall):
+    """Writing a page to $4014 copies it into OAM from OAMADDR and stalls the CPU, one cycle longer
+    when the write falls on an odd cycle.
+    """
+    # LDA #$03; STA $2003; LDA #$07; <store>; BRK
+    daveNES = cpu.MOS6502(debug=False)
+    daveNES.connect_to_bus()
+    daveNES.load_program(Program(f"a9 03 8d 03 20 a9 07 {store} 00".split()))
+    daveNES.bus.write_u16(0x20, 0x4014)
+    ppu = PPU(daveNES)
+    ppu.connect_to_bus()
+    dma = OAMDMA(daveNES, ppu)
+    dma.connect_to_bus()
+    sprites = np.arange(0x100, dtype=np.uint8)
+    daveNES.bus.write_block(0x0700, sprites)
+
+    daveNES.run_until(10_000)
+    assert dma.transfers == 1
+    assert np.array_equal(ppu.oam, np.roll(sprites, 3))
+    # Three 2 and 4 cycle instructions, the store starting on cycle 8, the DMA, then BRK
+    assert daveNES.cycles == 2 + 4 + 2 + cycles + stall + 7
@@ -0,0 +1,50 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+import cpu
+from program import Program
+
+# JSR $0606; NOP; BRK; (padding) LDX #$02; DEX; BNE -3; RTS
+program = "20 06 06 ea 00 ea a2 02 ca d0 fd 60".split()
+
+
+def init_daveNES() -> cpu.MOS6502:
+    """Initialises daveNES object with the profiler enabled and the test program loaded.
+
+    Returns:
+        daveNES: Initialised daveNES object.
+    """
+    daveNES = cpu.MOS6502()
+    daveNES.connect_to_bus()
+    daveNES.load_program(Program(program))
+    daveNES.enable_profiler()
+
+    return daveNES
+
+
+def test_profiler_counts():
+    """Instruction and cycle counts per address and per opcode."""
+    daveNES = init_daveNES()
+    for _ in range(8):  # JSR, LDX, DEX, BNE, DEX, BNE, RTS, NOP
+        daveNES.step_program()
+    profiler = daveNES.profiler
+
+    assert profiler.pc_instructions.sum() == 8
+    assert profiler.pc_instructions[0x0608] == 2
+    assert profiler.opcode_instructions[0xCA] == 2
+    assert profiler.opcode_cycles[0x20] == 6
+    assert profiler.pc_cycles.sum() == 6 + 2 + 2 + 2 + 2 + 2 + 6 + 2
+
+
+def test_profiler_call_tree():
+    """Inclusive and exclusive cycles for subroutines built from JSR/RTS pairs."""
+    daveNES = init_daveNES()
+    for _ in range(8):
+        daveNES.step_program()
+    profiler = daveNES.profiler
+
+    subroutines = profiler.subroutines()
+    assert subroutines["main"] == (24, 8)
+    assert subroutines["sub_0606"] == (16, 16)
+    assert profiler.folded().splitlines() == ["main 8", "main;sub_0606 16"]
@@ -0,0 +1,116 @@
+import os
+import socket
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+import cpu
+from program import Program
+from rollback import RollbackSession, Snapshot, run_frame
+
+programs_dir = os.path.join(os.path.dirname(__file__), "..", "programs")
+SNAKE = Program.from_file(os.path.join(programs_dir, "snake_game.txt"))
+CYCLES = 2000  # Short frames keep the Python core quick
+
+UP, RIGHT, DOWN, LEFT = 0x77, 0x61, 0x73, 0x64
+
+
+def init_daveNES() -> cpu.MOS6502:
+    daveNES = cpu.MOS6502(debug=False)
+    daveNES.connect_to_bus()
+    daveNES.load_program(SNAKE)
+    return daveNES
+
+
+def init_sessions(check_interval: int = 5, **kwargs) -> tuple:
+    a, b = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+    return tuple(
+        RollbackSession(
+            init_daveNES(), player, sock, seed=7, cycles_per_frame=CYCLES, check_interval=check_interval, **kwargs
+        )
+        for player, sock in enumerate((a, b))
+    )
+
+
+def test_snapshot_restore():
+    """Restoring a snapshot and running the same frames again gives the same state."""
+    daveNES = init_daveNES()
+    for frame in range(3):
+        run_frame(daveNES, frame, (RIGHT, 0), cycles_per_frame=CYCLES)
+    snapshot = Snapshot(daveNES)
+    for frame in range(3, 6):
+        run_frame(daveNES, frame, (0, DOWN), cycles_per_frame=CYCLES)
+    expected = daveNES.fingerprint()
+
+    snapshot.restore(daveNES)
+    assert daveNES.cycles == snapshot.cycles
+    assert Snapshot(daveNES).digest() == snapshot.digest()
+    for frame in range(3, 6):
+        run_frame(daveNES, frame, (0, DOWN), cycles_per_frame=CYCLES)
+    assert daveNES.fingerprint() == expected  # The state hash saw the restored pages
+
+
+def test_rollback_converges():
+    """A player running ahead of the other mispredicts, rolls back, and both end in the state of
+    a run with every input known in advance.
+    """
+    player_0, player_1 = init_sessions()
+    inputs_0 = [UP if frame % 7 == 0 else 0 for frame in range(30)] + [0] * 4
+    inputs_1 = [LEFT if frame % 5 == 2 else 0 for frame in range(30)] + [0] * 4
+
+    for frame in range(33):  # Player 1 starts three frames late
+        player_0.advance(inputs_0[frame])
+        if frame >= 3:
+            player_1.advance(inputs_1[frame - 3])
+    for frame in range(30, 34):
+        player_1.advance(inputs_1[frame])
+    player_0.advance(inputs_0[33])  # Receives the last inputs
+
+    reference = init_daveNES()
+    for frame in range(34):
+        run_frame(reference, frame, (inputs_0[frame], inputs_1[frame]), 7, CYCLES)
+    assert player_0.cpu.fingerprint() == player_1.cpu.fingerprint() == reference.fingerprint()
+
+    report = player_0.report()
+    assert report["rollbacks"] > 0 and report["max_rollback_depth"] <= player_0.max_rollback
+    assert report["resimulated_frames"] >= report["rollbacks"]
+    assert report["desyncs"] == 0 and player_1.report()["rollbacks"] == 0
+    for key in ("snapshot_ms", "restore_ms", "resimulation_ms_mean", "resimulation_ms_max", "frame_budget_ms"):
+        assert report[key] > 0
+
+
+def test_desync_detected():
+    """Machines which drift apart are reported at the next check."""
+    player_0, player_1 = init_sessions()
+    player_1.cpu.bus.write(0x0300, 0xAA)
+    for _ in range(14):
+        player_0.advance(0)
+        player_1.advance(0)
+    assert player_0.desyncs == player_1.desyncs == [5, 10]
+
+
+def test_stall_and_timeout():
+    """A player the maximum number of frames ahead waits for the other, then gives up."""
+    player_0, _ = init_sessions(max_rollback=2, timeout=0.05)
+    player_0.advance(0)
+    player_0.advance(0)
+    with pytest.raises(TimeoutError):
+        player_0.advance(0)
+    assert player_0.stalls > 0 and player_0.frame == 2
+
+
+def test_every_checksum_compared():
+    """Checks which fall due together, after a player catches up, are all sent and compared."""
+    player_0, player_1 = init_sessions(check_interval=1)
+    player_1.cpu.bus.write(0x0300, 0xAA)
+    for _ in range(6):
+        player_0.advance(0)
+    for _ in range(6):
+        player_1.advance(0)
+    for _ in range(5):  # Player 0 digests frames 1 to 6 in one go, then both run in step
+        player_0.advance(0)
+        player_1.advance(0)
+
+    assert player_0.desyncs[:6] == player_1.desyncs[:6] == list(range(1, 7))
+    assert len(player_0.checksums) <= 3 and len(player_0.remote_checksums) <= 1
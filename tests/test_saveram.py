@@ -0,0 +1,84 @@
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+import cpu
+from program import Program
+from saveram import SAVE_RAM_SIZE, SaveRAM
+
+
+def init_daveNES(filename: str, flush_interval: float = 1.0) -> tuple:
+    daveNES = cpu.MOS6502(debug=False)
+    daveNES.connect_to_bus()
+    save_ram = SaveRAM(daveNES, filename, flush_interval)
+    save_ram.connect_to_bus()
+    return daveNES, save_ram
+
+
+def test_persists_across_restarts(tmp_path):
+    """Writes to $6000-$7FFF land in the save file and are there for the next session."""
+    filename = str(tmp_path / "game.sav")
+    daveNES, save_ram = init_daveNES(filename)
+    assert os.path.getsize(filename) == SAVE_RAM_SIZE
+
+    daveNES.bus.write(0x6000, 0x12)
+    daveNES.bus.write(0x7FFF, 0x34)
+    daveNES.bus.write_block(0x6100, b"save")
+    assert daveNES.bus.wram.memory[0x6000] == 0  # Not in WRAM
+    save_ram.close()
+    assert save_ram.flushes == 1
+
+    data = open(filename, "rb").read()
+    assert data[0] == 0x12 and data[-1] == 0x34 and data[0x100:0x104] == b"save"
+
+    daveNES, save_ram = init_daveNES(filename)
+    assert daveNES.bus.read(0x6000) == 0x12
+    assert bytes(daveNES.bus.read_block(0x6100, 4)) == b"save"
+    save_ram.close()
+
+
+def test_lazy_flush(tmp_path):
+    """The mapping is flushed on the timer only when it has been written to."""
+    daveNES, save_ram = init_daveNES(str(tmp_path / "game.sav"), flush_interval=0.01)
+    time.sleep(0.05)
+    assert save_ram.flushes == 0
+
+    daveNES.bus.write(0x6000, 1)
+    deadline = time.monotonic() + 2
+    while save_ram.flushes == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert save_ram.flushes == 1 and not save_ram.dirty
+    save_ram.close()
+    assert save_ram.flushes == 1  # Nothing left to flush
+
+
+def test_clone_is_detached(tmp_path):
+    """A cloned machine writes to its own copy of the save RAM, never to the file."""
+    filename = str(tmp_path / "game.sav")
+    daveNES, save_ram = init_daveNES(filename)
+    daveNES.bus.write(0x6000, 7)
+    clone = daveNES.clone()
+    clone.bus.write(0x6000, 9)
+
+    assert clone.bus.read(0x6000) == 9
+    assert daveNES.bus.read(0x6000) == 7
+    save_ram.close()
+    assert open(filename, "rb").read(1) == b"\x07"
+
+
+def test_code_in_save_ram(tmp_path):
+    """Operands and pointers read as 16 bit words come from the save RAM, not the WRAM underneath."""
+    daveNES, save_ram = init_daveNES(str(tmp_path / "code.sav"))
+    daveNES.load_program(Program("4c 00 60".split()))  # JMP $6000
+    daveNES.bus.write_block(0x6000, bytes.fromhex("ad 00 70 6c 00 61"))  # LDA $7000; JMP ($6100)
+    daveNES.bus.write(0x7000, 0x42)
+    daveNES.bus.write_u16(0x6100, 0x0610)  # BRK at $0610
+    daveNES.bus.write(0x5FFF, 0x34)
+    daveNES.run_until(100)
+
+    assert daveNES.r_accumulator == 0x42
+    assert daveNES.r_program_counter == 0x0612  # Halted by the BRK, past its padding byte
+    assert daveNES.bus.read_u16(0x5FFF) == 0xAD34  # Straddling WRAM and the save RAM
+    assert not daveNES.bus.wram.memory[0x6000:0x8000].any()
+    save_ram.close()
@@ -0,0 +1,117 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+import cpu
+from program import Program
+
+programs_dir = os.path.join(os.path.dirname(__file__), "..", "programs")
+SNAKE = Program.from_file(os.path.join(programs_dir, "snake_game.txt"))
+
+
+def init_daveNES(backend: str = "python") -> cpu.MOS6502:
+    daveNES = cpu.MOS6502(debug=False, backend=backend)
+    daveNES.connect_to_bus()
+    daveNES.load_program(SNAKE)
+    return daveNES
+
+
+def run(daveNES: cpu.MOS6502, seed: int, frames: int = 2) -> None:
+    np.random.seed(seed)
+    daveNES.bus.write(0xFF, 0x64)
+    for _ in range(frames):
+        daveNES.run_until(daveNES.cycles + 29781)
+
+
+def test_fingerprint_tracks_state():
+    """Equal runs give equal fingerprints, and any difference in memory or registers shows."""
+    a, b = init_daveNES(), init_daveNES()
+    assert a.fingerprint() == b.fingerprint()
+    run(a, 0)
+    run(b, 0)
+    assert a.fingerprint() == b.fingerprint()
+
+    b.bus.write(0x0345, int(b.bus.read(0x0345)) ^ 1)
+    assert a.fingerprint() != b.fingerprint()
+    assert a.bus.state_hash.diff(b.bus.state_hash) == [0x03]
+    b.bus.write(0x0345, int(b.bus.read(0x0345)) ^ 1)
+    assert a.fingerprint() == b.fingerprint()
+
+    b.r_accumulator = np.uint8(b.r_accumulator + 1)
+    assert a.fingerprint() != b.fingerprint()
+
+
+def test_incremental_matches_full_rehash():
+    """Rehashing only the written pages gives the same hash as rehashing everything."""
+    daveNES = init_daveNES()
+    daveNES.fingerprint()
+    state_hash = daveNES.bus.state_hash
+    rehashed = state_hash.rehashed
+    run(daveNES, 1)
+    daveNES.bus.write_block(0x1FF0, bytes(range(32)))  # Across a page boundary
+    daveNES.bus.write_u16(0x30FF, 0xBEEF)
+
+    incremental = daveNES.fingerprint()
+    assert state_hash.rehashed - rehashed < 16
+    state_hash.invalidate()
+    assert daveNES.fingerprint() == incremental
+
+
+def test_clone_and_disable():
+    """A clone starts with the same fingerprint and hashes its own writes."""
+    daveNES = init_daveNES()
+    run(daveNES, 2, frames=1)
+    clone = daveNES.clone()
+    assert clone.fingerprint() == daveNES.fingerprint()
+    clone.bus.write(0x10, 0xAA)
+    assert clone.fingerprint() != daveNES.fingerprint()
+
+    daveNES.bus.disable_state_hash()
+    assert not {"write", "write_u16", "write_block"} & set(vars(daveNES.bus))
+
+
+def test_numba_marks_written_pages():
+    """The compiled loop flags the pages it writes, so its fingerprints stay current."""
+    pytest.importorskip("numba")
+    program = Program.from_file(os.path.join(programs_dir, "branch_program.txt"))  # Writes to page 2
+    machines = []
+    for backend in ("python", "numba"):
+        daveNES = cpu.MOS6502(debug=False, backend=backend)
+        daveNES.connect_to_bus()
+        daveNES.fingerprint()
+        daveNES.load_program(program)
+        daveNES.run_until(10_000)
+        daveNES.bus.write(0xFE, 0)  # Random byte, drawn from different generators
+        machines.append(daveNES)
+
+    python, numba = machines
+    incremental = numba.fingerprint()
+    assert incremental == python.fingerprint()
+    numba.bus.state_hash.invalidate()
+    assert numba.fingerprint() == incremental
+
+
+def test_hooks_stack():
+    """Instrumentation installed or removed around the state hash leaves its write hook in place."""
+    daveNES = init_daveNES()
+    daveNES.fingerprint()
+    counter = daveNES.bus.enable_access_counter()
+    debugger = daveNES.enable_debugger()
+    debugger.add_watchpoint(0x0010)
+    before = daveNES.fingerprint()
+
+    daveNES.bus.write(0x0345, 0x01)
+    assert counter.counts()["writes"][0x0345] == 1
+    daveNES.bus.disable_access_counter()
+    debugger.clear()
+    after = daveNES.fingerprint()
+    assert after != before
+
+    daveNES.bus.write(0x0345, 0x02)
+    assert daveNES.fingerprint() != after
+    daveNES.bus.disable_state_hash()
+    assert not {"read", "write", "read_u16", "write_u16", "write_block"} & set(vars(daveNES.bus))
+    assert daveNES.bus.fetch == daveNES.bus.read
@@ -0,0 +1,82 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+import streaming
+from streaming import FrameClient, FrameDecoder, FrameEncoder, FrameServer
+
+
+def test_rle_round_trip():
+    """Run length encoding round trips, including runs longer than a uint16 count."""
+    data = np.zeros(200_000, dtype=np.uint8)
+    data[5:9] = 3
+    data[-1] = 7
+    encoded = streaming.rle_encode(data)
+
+    assert len(encoded) == 7 * streaming.RUN.itemsize  # The long zero run is split in four
+    assert np.array_equal(streaming.rle_decode(encoded), data)
+    assert streaming.rle_encode(np.zeros(0, dtype=np.uint8)) == b""
+
+
+def test_keyframes_and_deltas():
+    """Deltas against the previous frame, with a keyframe every N frames."""
+    encoder, decoder = FrameEncoder(keyframe_interval=3), FrameDecoder()
+    rng = np.random.default_rng(0)
+    frame = np.zeros((32, 32), dtype=np.uint8)
+    kinds = []
+    for sequence in range(1, 8):
+        frame[rng.integers(32), rng.integers(32)] = rng.integers(16)
+        message = encoder.encode(sequence, frame)
+        header = streaming.HEADER.unpack(message[: streaming.HEADER.size])
+        kinds.append(header[0])
+        assert np.array_equal(decoder.decode(header, message[streaming.HEADER.size :]), frame)
+
+    assert kinds == [streaming.KEYFRAME, 1, 1, streaming.KEYFRAME, 1, 1, streaming.KEYFRAME]
+
+
+def test_server(tmp_path):
+    """Clients receive the latest frame, skipping frames published faster than they are read."""
+    path = str(tmp_path / "frames.sock")
+    server = FrameServer(path).start()
+    client = FrameClient(path)
+    try:
+        frame = np.zeros((32, 32), dtype=np.uint8)
+        server.publish(frame)
+        assert client.read()[0] == 1
+
+        for i in range(1000):
+            frame[i % 32, i // 32] = 1 + i % 15
+            server.publish(frame)
+        received = []
+        while not received or received[-1][0] != 1001:
+            received.append(client.read())
+        assert len(received) < 1000
+        assert np.array_equal(received[-1][1], frame)
+    finally:
+        client.close()
+        server.close()
+
+
+def test_slow_client(tmp_path):
+    """A client which stops reading has frames dropped after a few, rather than queued, so it
+    catches up to the latest frame as soon as it reads again.
+    """
+    path = str(tmp_path / "frames.sock")
+    server = FrameServer(path, keyframe_interval=1).start()
+    client = FrameClient(path)
+    try:
+        rng = np.random.default_rng(0)
+        for _ in range(200):
+            server.publish(rng.integers(0, 256, (32, 32), dtype=np.uint8))  # About 3 KiB encoded
+            time.sleep(0.002)
+        received = [client.read()[0]]
+        while received[-1] != 200:
+            received.append(client.read()[0])
+        assert len(received) < 20
+        assert server.dropped > 180
+    finally:
+        client.close()
+        server.close()
@@ -0,0 +1,55 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+import cpu
+import tracecheck
+from program import Program
+
+programs_dir = os.path.join(os.path.dirname(__file__), "..", "programs")
+
+
+def init_daveNES(filename: str) -> cpu.MOS6502:
+    np.random.seed(0)
+    daveNES = cpu.MOS6502(debug=False)
+    daveNES.connect_to_bus()
+    daveNES.load_program(Program.from_file(os.path.join(programs_dir, filename)))
+
+    return daveNES
+
+
+def test_format_line():
+    """Trace lines follow the nestest.log layout and parse back to the same registers."""
+    daveNES = init_daveNES("jsr_rts.txt")
+    line = tracecheck.format_line(daveNES)
+
+    assert line.startswith("0600  20 09 06  JSR")
+    assert line.endswith("A:00 X:00 Y:00 P:24 SP:FF CYC:0")
+    assert tracecheck.parse_line(line) == dict(zip(tracecheck.FIELDS, tracecheck.snapshot(daveNES)))
+
+
+def test_record_and_check(tmp_path):
+    """A recorded trace replays cleanly, including gzipped traces."""
+    for name in ("trace.log", "trace.log.gz"):
+        filename = str(tmp_path / name)
+        assert tracecheck.record(init_daveNES("jsr_rts.txt"), filename, 10_000) == 22
+        assert tracecheck.check(init_daveNES("jsr_rts.txt"), filename) is None
+
+
+def test_divergence(tmp_path):
+    """Checking stops at the first differing line and reports the surrounding context."""
+    filename = tmp_path / "trace.log"
+    tracecheck.record(init_daveNES("jsr_rts.txt"), str(filename), 10_000)
+    lines = filename.read_text().splitlines()
+    lines[10] = lines[10].replace(lines[10][lines[10].index("X:"):][:4], "X:7F")
+    filename.write_text("\n".join(lines) + "\n")
+
+    divergence = tracecheck.check(init_daveNES("jsr_rts.txt"), str(filename), context=3)
+    assert divergence.line_number == 11
+    assert divergence.fields == ["X"]
+    assert divergence.before == lines[7:10]
+    assert divergence.after == lines[11:14]
+
+    assert tracecheck.check(init_daveNES("jsr_rts.txt"), str(filename), ignore=("X",)) is None